@@ -11,9 +11,25 @@ from discord.ext import tasks, commands
 
 from dotenv import load_dotenv
 
+from cogs.aux_methods.api_client import ApiClient
+from cogs.aux_methods.events import EventListener
+from cogs.aux_methods.guild_config import GuildConfigCache
+from cogs.aux_methods.stages import StageCatalogCache
+
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 GUILD_ID = int(os.getenv('DISCORD_GUILD'))
+GUILD_CONFIG_TTL = int(os.getenv('GUILD_CONFIG_TTL', 300))
+
+# API connection (API_SOCKET is the path of a Unix socket, if the API listens on one)
+API_URL = os.getenv('API_URL', "http://127.0.0.1:8000")
+API_SOCKET = os.getenv('API_SOCKET')
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', 20))
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 10))
+
+# Events pushed by the API (Postgres LISTEN/NOTIFY). Disabled if EVENTS_DSN is not set
+EVENTS_DSN = os.getenv('EVENTS_DSN')
+EVENTS_CHANNEL = os.getenv('EVENTS_CHANNEL', 'sbots_events')
 
 # Logger Configuration
 logger = logging.getLogger('discord')
@@ -36,13 +52,30 @@ class SmashBotSpain(commands.Bot):
     def __init__(self, command_prefix, intents):
         super().__init__(command_prefix=command_prefix, intents=intents)        
         self.help_command = None
+        self.api = ApiClient(base_url=API_URL, socket_path=API_SOCKET, pool_size=API_POOL_SIZE, timeout=API_TIMEOUT)
+        self.guild_config = GuildConfigCache(self, ttl=GUILD_CONFIG_TTL)
+        self.stages = StageCatalogCache(self)
+        self.events = EventListener(self, EVENTS_DSN, channel=EVENTS_CHANNEL)
 
     async def on_ready(self):        
-        self.session = aiohttp.ClientSession()        
+        # on_ready is called again after every reconnection: the session is only opened once
+        await self.api.start()
+        await self.events.start()
         
         logger.info(f'{client.user} is connected')
         matchmaking = self.get_cog('Matchmaking')       
         await matchmaking.setup_matchmaking()    
+
+    async def on_api_event(self, event):
+        if event['type'] in ('guild_changed', 'tier_changed'):
+            self.guild_config.invalidate(event['guild'])
+        elif event['type'] == 'stages_changed':
+            self.stages.invalidate()
+
+    async def close(self):
+        await self.events.close()
+        await self.api.close()
+        await super().close()
         
 intents = discord.Intents.default()  # All but the two privileged ones
 intents.members = True
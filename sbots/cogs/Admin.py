@@ -4,7 +4,6 @@ from .params.roles import DEFAULT_TIERS, SMASH_CHARACTERS, SPANISH_REGIONS
 import aiohttp
 import discord
 import asyncio
-import json
 import logging
 
 from discord.ext import commands
@@ -53,10 +52,9 @@ class Admin(commands.Cog):
         }
 
         # Set winner in DB
-        async with self.bot.session.post(f'http://127.0.0.1:8000/gamesets/set_winner/', json=body) as response:
+        async with self.bot.api.post(f'/gamesets/set_winner/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 # Get winner and loser
                 winner = guild.get_member(resp_body['winner_info']['player'])
@@ -71,7 +69,7 @@ class Admin(commands.Cog):
             elif response.status == 404:                
                 html = await response.text()
                 logger.error(f"Error in set_winner: {html}")
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 if error_type := resp_body.get('error'):
                     logger.error(f"Error setting set winner by admin {ctx.author.nickname()}.")
@@ -129,16 +127,14 @@ class Admin(commands.Cog):
             'add': add_mode            
         }
 
-        async with self.bot.session.post(f'http://127.0.0.1:8000/ratings/score/', json=body) as response:
+        async with self.bot.api.post(f'/ratings/score/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 point_difference = int(resp_body['diff'])
                 difference = f"{'+' if point_difference >= 0 else ''}{point_difference}"        
                 await ctx.send(f"La puntuación de **{player.nickname()}** ha pasado a ser {resp_body['score']} ({difference}).")
             elif response.status == 404:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 error_type = resp_body.get('error')
 
@@ -183,10 +179,9 @@ class Admin(commands.Cog):
             'losses': losses
         }
 
-        async with self.bot.session.post(f'http://127.0.0.1:8000/ratings/promotion/', json=body) as response:
+        async with self.bot.api.post(f'/ratings/promotion/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 new_wins = resp_body.get('wins')
                 new_losses = resp_body.get('losses')
                 
@@ -198,8 +193,7 @@ class Admin(commands.Cog):
                 
                 await ctx.send(promo_text)
             elif response.status == 404:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 error_type = resp_body.get('error')
 
@@ -228,10 +222,9 @@ class Admin(commands.Cog):
             'tier': tier.id,
         }
 
-        async with self.bot.session.post(f'http://127.0.0.1:8000/players/{player.id}/tier/', json=body) as response:
+        async with self.bot.api.post(f'/players/{player.id}/tier/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 # Get info
                 old_tier_id = resp_body.get('old_tier')
@@ -259,8 +252,7 @@ class Admin(commands.Cog):
                 
                 await ctx.send(text)
             elif response.status == 404:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 error_type = resp_body.get('error')
 
@@ -289,10 +281,9 @@ class Admin(commands.Cog):
         guild = ctx.guild
         tester_role = discord.utils.get(guild.roles, name="Beta Tester")
 
-        async with self.bot.session.post(f'http://127.0.0.1:8000/guilds/{guild.id}/beta_reward/') as response:
+        async with self.bot.api.post(f'/guilds/{guild.id}/beta_reward/') as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 testers = resp_body['testers']
 
@@ -311,7 +302,7 @@ class Admin(commands.Cog):
                 
                 for tier_id in tiers:
                     tier_role = guild.get_role(tier_id)
-                    asyncio.create_task(ranked.update_leaderboard(tier_role))            
+                    ranked.schedule_leaderboard(tier_role)            
             else:
                 logger.error("Error with beta rewards")
                 logger.error(response)
@@ -361,6 +352,23 @@ class Admin(commands.Cog):
         tasks_name = [task.get_name() for task in tasks]
         await ctx.send(tasks_name)
 
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def api_metrics(self, ctx, reset=None):
+        """
+        Prints the latency of the API endpoints used since the bot started (or since the last reset)
+        """
+        metrics = self.bot.api.metrics()
+
+        lines = [f"{endpoint}: {m.count} llamadas, media {m.mean * 1000:.1f} ms, máx. {m.max * 1000:.1f} ms, {m.errors} errores"
+                    for endpoint, m in metrics[:20]]
+        text = "\n".join(lines) if lines else "No se ha llamado a la API todavía."
+        await ctx.send(f"```{text}```")
+
+        if reset == "reset":
+            self.bot.api.reset_metrics()
+
 
     # ***************************
     #   G U I L D  P A R A M S
@@ -383,14 +391,25 @@ class Admin(commands.Cog):
 
         body = {'channel_id': channel.id}
 
-        async with self.bot.session.patch(f'http://127.0.0.1:8000/tiers/{tier.id}/', json=body) as response:
+        async with self.bot.api.patch(f'/tiers/{tier.id}/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
+                self.bot.guild_config.set_tier_channel(guild.id, tier.id, channel.id)
                 await ctx.send(f"Hecho: a partir de ahora el canal de {tier} será {channel.mention}.")
             else:
                 await ctx.send("Ha habido un error. ¿Quizá ese canal ya lo está usando otra tier?")
 
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def reload_config(self, ctx):
+        """
+        Drops the cached settings of this guild, so they're fetched again from the API.
+        Use it after changing the guild params (channels, timeouts...).
+        """
+        self.bot.guild_config.invalidate(ctx.guild.id)
+        await ctx.send("Configuración del servidor recargada.", delete_after=10)
+
     # ***********************
     #      F L A I R I N G
     # ***********************
@@ -460,10 +479,9 @@ class Admin(commands.Cog):
             'roles' : relevant_ids
         }
         
-        async with self.bot.session.post(f'http://127.0.0.1:8000/{role_type}/import/', json=body) as response:
+        async with self.bot.api.post(f'/{role_type}/import/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 count = resp_body['count']
                 
@@ -474,7 +492,12 @@ class Admin(commands.Cog):
                 elif role_type == 'tiers':
                     count_text = f"{count} tier" if count == 1 else f"{count} tiers"
 
-                await ctx.send(f"Se han creado **{count_text}**.")
+                if role_type == 'tiers':
+                    self.bot.guild_config.invalidate(guild.id)
+
+                updated = resp_body.get('updated', 0)
+                updated_text = f" ({updated} ya existían y se han actualizado)" if updated else ""
+                await ctx.send(f"Se han creado **{count_text}**{updated_text}.")
             else:
                 await ctx.send(f"Error con el import.")
     
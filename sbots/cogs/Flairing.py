@@ -1,7 +1,6 @@
 import discord
 import asyncio
 import aiohttp
-import json
 import logging
 
 
@@ -16,6 +15,7 @@ from .checks.flairing_checks import (in_flairing_channel, in_spam_channel, playe
 from .formatters.text import list_with_and
 from .params.roles import SPANISH_REGIONS, SMASH_CHARACTERS, DEFAULT_TIERS
 from .aux_methods.roles import update_or_create_roles, find_role
+from .aux_methods.pages import send_pages, split_names
 
 logger = logging.getLogger('discord')
 
@@ -44,7 +44,7 @@ class Flairing(commands.Cog):
         
         # GET ROLE
         guild_roles = await guild.fetch_roles()
-        role = find_role(param, guild_roles)
+        role = find_role(param, guild_roles, fuzzy=True)
         if not role:
             return await ctx.send(f"No se ha encontrado ningún rol con el nombre de **{param}**... ¿Lo has escrito bien?",
                 delete_after=25)        
@@ -56,10 +56,9 @@ class Flairing(commands.Cog):
             'role_id' : role.id,
         }        
         
-        async with self.bot.session.post(f'http://127.0.0.1:8000/players/{player.id}/roles/', json=body) as response:            
+        async with self.bot.api.post(f'/players/{player.id}/roles/', json=body) as response:            
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 
                 # Get params                
                 action = resp_body['action']                
@@ -104,8 +103,7 @@ class Flairing(commands.Cog):
                 await ctx.send(message_text, delete_after=ROLE_MESSAGE_TIME)
 
             elif response.status == 400:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 mains = resp_body.get('mains', [])
                 tier_error = resp_body.get('tier_error', False)
@@ -152,7 +150,7 @@ class Flairing(commands.Cog):
             elif response.status == 404:
                 html = await response.text()
                 if html:
-                    resp_body = json.loads(html)
+                    resp_body = await response.json()
                     ROLE_MESSAGE_TIME = resp_body.get('role_message_time', 25)
                     
                     if role_type in ('main', 'second', 'pocket'):
@@ -185,7 +183,7 @@ class Flairing(commands.Cog):
         guild_roles = await guild.fetch_roles()
                         
         # GET ROLE
-        role = find_role(param, guild_roles)
+        role = find_role(param, guild_roles, fuzzy=True)
 
         if not role:
             return await ctx.send(f"No existe el rol **{param}**... ¿Seguro que lo has escrito bien?")
@@ -214,10 +212,9 @@ class Flairing(commands.Cog):
             'role_type': role_type,
         }
 
-        async with self.bot.session.get(f'http://127.0.0.1:8000/players/roles/', json=body) as response:
+        async with self.bot.api.get(f'/players/roles/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 roles = resp_body['roles']
             else:
@@ -229,36 +226,30 @@ class Flairing(commands.Cog):
         if not role_list:
             return await ctx.send(f"Nadie tiene un rol de la categoría **{role_type.capitalize()}**")                
 
-        # Build the message
-        header = f"**__{role_type.upper()}__**\n"
-        messages = []
+        # Build the message: a block per role
+        header = f"**__{role_type.upper()}__**"
+        blocks = []
         
         for role in role_list:
-            role_message = ""
             members = [guild.get_member(player_id) for player_id in role['players']]
             members = [member for member in members if member]
-            num_members = len(members)
-
             discord_role = guild.get_role(role['id'])
-            role_message += f"**{discord_role.name}** [{num_members}]:\n"
-            role_message += f"```{', '.join([member.nickname() for member in members])}```\n"
-            
-            messages.append(role_message)
+            if not discord_role or not members:
+                continue
+
+            # A block per page-sized chunk of nicknames
+            chunks = split_names([member.nickname() for member in members])
+            for i, nicknames in enumerate(chunks):
+                continued = " (cont.)" if i else ""
+                role_message = f"**{discord_role.name}** [{len(members)}]{continued}:\n"
+                role_message += f"```{nicknames}```\n"
+                blocks.append(role_message)
         
-        # Join full message in n messages (if needed)
-        full_message = [header]
-        message_index = 0
-
-        for message in messages:
-            if len(full_message[message_index]) + len(message) >= 2000:
-                message_index += 1
-                full_message.append("")
-            
-            full_message[message_index] += message
+        if not blocks:
+            return await ctx.send(f"Nadie tiene un rol de la categoría **{role_type.capitalize()}**")
 
-        # Send the message
-        for message in full_message:
-            await ctx.send(message)
+        # Send the message (in pages, if needed)
+        await send_pages(self.bot, ctx.channel, header, blocks)
 
 
     @commands.command(aliases=["perfil"])
@@ -274,10 +265,9 @@ class Flairing(commands.Cog):
         }
 
         # GET ROLE
-        async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player.id}/profile/', json=body) as response:
+        async with self.bot.api.get(f'/players/{player.id}/profile/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 regions = resp_body['regions']
                 
@@ -401,18 +391,17 @@ class Flairing(commands.Cog):
             'roles': [role.id for role in player.roles]
         }
 
-        async with self.bot.session.post(f'http://127.0.0.1:8000/players/', json=body) as response:
+        async with self.bot.api.post(f'/players/', json=body) as response:
             if response.status == 200:                
                 await player.send("¡Perfil creado! Ya puedes usar el resto de comandos del bot.")
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 tier_id = resp_body.get('tier')
                 
                 if tier_id:
                     tier = guild.get_role(resp_body['tier'])
                     ranked = self.bot.get_cog('Ranked')
-                    asyncio.create_task(ranked.update_leaderboard(tier))
+                    ranked.schedule_leaderboard(tier)
                 return True
             else:
                 logger.error("PLAYER CREATION ERROR")
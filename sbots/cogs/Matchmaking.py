@@ -20,6 +20,8 @@ from .params.matchmaking_params import (EMOJI_CONFIRM, EMOJI_CROSSED_SWORDS, EMO
 from .checks.flairing_checks import player_exists
 from .checks.matchmaking_checks import (in_arena, in_arena_or_ranked, in_ranked, in_tier_channel)
 
+from .aux_methods.list_message import ListMessageUpdater
+
 logger = logging.getLogger('discord')
 
 class Matchmaking(commands.Cog):
@@ -27,7 +29,22 @@ class Matchmaking(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.arena_invites = defaultdict(list)
+        self.list_message = ListMessageUpdater(bot, self.list_message_content)
     
+    @commands.Cog.listener()
+    async def on_api_event(self, event):
+        """
+        Arenas changed by anyone (another command, the admin, the API itself) are shown in the list.
+        """
+        if event['type'] not in ('arena_changed', 'arena_deleted'):
+            return
+        
+        guild = self.bot.get_guild(event['guild'])
+        
+        # An update that hasn't started yet will already show this change
+        if guild and not self.list_message.is_scheduled(guild.id):
+            await self.update_list_message(guild=guild)
+
     async def setup_matchmaking(self):        
         self.reset_matchmaking.start()
         await self.reset_arenas(startup=True)
@@ -50,10 +67,9 @@ class Matchmaking(commands.Cog):
 
     async def ranked_messages(self):
         guilds = []
-        async with self.bot.session.get(f'http://127.0.0.1:8000/guilds/ranked_messages/') as response:
+        async with self.bot.api.get(f'/guilds/ranked_messages/') as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 guilds = resp_body.get('guilds')
         
         if not guilds:
@@ -82,17 +98,16 @@ class Matchmaking(commands.Cog):
         }
         
         # CHECK PLAYER IS CREATED, ELSE DO IT
-        async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player.id}') as response:
+        async with self.bot.api.get(f'/players/{player.id}') as response:
             if response.status != 200:
                 logger.info(f"Player with id {player.id} isn't registered. Registering:")
                 flairing = self.bot.get_cog('Flairing')
                 await flairing.register(player, guild)
 
-        async with self.bot.session.post('http://127.0.0.1:8000/arenas/ranked/', json=body) as response:            
+        async with self.bot.api.post('/arenas/ranked/', json=body) as response:            
             # MATCH FOUND OR STARTED SEARCHING
             if response.status == 201:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 
                 if resp_body['match_found']:
                     player1 = guild.get_member(resp_body['player_one'])
@@ -120,7 +135,6 @@ class Matchmaking(commands.Cog):
             
             # STATUS_CONFLICT ERROR
             elif response.status == 409:
-                html = await response.text()
 
                 error_messages = {
                     "CONFIRMATION" : "¡Tienes una partida pendiente de ser aceptada! Mira tus MDs.",
@@ -129,15 +143,14 @@ class Matchmaking(commands.Cog):
                     "ALREADY_SEARCHING" : f"Pero {player.mention}, ¡si ya estabas en la cola de ranked! Pulsa el otro botón para dejar de buscar.",
                 }
                 
-                errors = json.loads(html)
+                errors = await response.json()
 
                 player_status = errors["cant_join"]
                 logger.warning(f"Player: {player.nickname()} Error: {player_status}")
                 await player.send(error_messages[player_status])
             
             elif response.status == 400:
-                html = await response.text()
-                errors = json.loads(html)
+                errors = await response.json()
                 
                 error = errors.get("cant_join", False)                                                
                 error_messages = {
@@ -154,11 +167,11 @@ class Matchmaking(commands.Cog):
         
 
     @commands.command(aliases=['freeplays', 'friendlies-here'])
-    @commands.check(player_exists)
     @commands.check(in_tier_channel)
     async def friendlies(self, ctx):
         """
         You can join the list of friendlies with this command.
+        The API checks the player, searches and sends back the list message in a single call.
         """
         # Get player and tier
         player = ctx.author
@@ -176,11 +189,10 @@ class Matchmaking(commands.Cog):
             'mode': 'FRIENDLIES'
         }
 
-        async with self.bot.session.post('http://127.0.0.1:8000/arenas/', json=body) as response:            
+        async with self.bot.api.post('/arenas/search/', json=body) as response:            
             # MATCH FOUND OR STARTED SEARCHING
             if response.status == 201:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 
                 if resp_body['match_found']:
                     player1 = ctx.guild.get_member(resp_body['player_one'])
@@ -188,6 +200,7 @@ class Matchmaking(commands.Cog):
 
                     messages = resp_body.get('messages', [])
                     await self.edit_messages(ctx, messages, f"¡Match encontrado entre **{player1.nickname()}** y **{player2.nickname()}**!")                    
+                    await self.update_list_message(guild=ctx.guild, info=resp_body['list_message'])
                     return await self.matchmaking(ctx, player1, player2)                    
 
                 else:
@@ -200,12 +213,11 @@ class Matchmaking(commands.Cog):
                         mention_messages.append({'id': message.id, 'tier': tier_role.id, 'arena': resp_body['id']})
                     
                     await self.save_messages(mention_messages)
-                    await self.update_list_message(guild=ctx.guild)
+                    await self.update_list_message(guild=ctx.guild, info=resp_body['list_message'])
             
             # UPDATE SEARCH
             elif response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 
                 # Add tiers
                 mention_messages = []
@@ -227,11 +239,21 @@ class Matchmaking(commands.Cog):
                 
                 removed_messages = resp_body.get('removed_messages', [])
                 await self.delete_messages(guild, removed_messages)
-                await self.update_list_message(guild=ctx.guild)
+                await self.update_list_message(guild=ctx.guild, info=resp_body['list_message'])
             
+            # NOT REGISTERED YET
+            elif response.status == 404:
+                errors = await response.json()
+                if errors.get('cant_join') != "PLAYER_DOES_NOT_EXIST":
+                    return await ctx.send("Error, contacta con algún admin")
+
+                await ctx.send("¡Aún no tienes tu perfil creado! Mira en tus MD.", delete_after=180)
+                flairing = self.bot.get_cog('Flairing')
+                if await flairing.register(player, guild):
+                    return await ctx.reinvoke()
+
             # STATUS_CONFLICT ERROR
             elif response.status == 409:
-                html = await response.text()
 
                 error_messages = {
                     "CONFIRMATION" : "¡Tienes una partida pendiente de ser aceptada! Mira tus MDs.",
@@ -239,14 +261,13 @@ class Matchmaking(commands.Cog):
                     "PLAYING" : "¡Ya estás jugando! Cierra la arena escribiendo en ella el comando `.ggs`."
                 }
                 
-                errors = json.loads(html)
+                errors = await response.json()
 
                 player_status = errors["cant_join"]
                 await ctx.send(error_messages[player_status])
             
             elif response.status == 400:
-                html = await response.text()
-                errors = json.loads(html)
+                errors = await response.json()
                 
                 error = errors.get("cant_join", False)
                 wanted_tier_id = errors.get('wanted_tier', None)
@@ -288,10 +309,9 @@ class Matchmaking(commands.Cog):
             'ranked' : is_ranked
         }
 
-        async with self.bot.session.post('http://127.0.0.1:8000/arenas/ggs/', json=body) as response:
+        async with self.bot.api.post('/arenas/ggs/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 is_closed = resp_body.get('closed', True)
                 messages = resp_body.get('messages', [])
@@ -336,7 +356,7 @@ class Matchmaking(commands.Cog):
 
     async def cancel(self, player, guild, mode, channel):
         # CHECK PLAYER IS CREATED, ELSE DO IT
-        async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player.id}') as response:
+        async with self.bot.api.get(f'/players/{player.id}') as response:
             if response.status != 200:
                 flairing = self.bot.get_cog('Flairing')
                 await flairing.register(player, guild)
@@ -347,10 +367,9 @@ class Matchmaking(commands.Cog):
             'mode': mode
         }
         
-        async with self.bot.session.post(f'http://127.0.0.1:8000/arenas/cancel/', json=body) as response:
+        async with self.bot.api.post(f'/arenas/cancel/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 
                 if mode == 'FRIENDLIES':
                     await channel.send(f"Vale **{player.nickname()}**, te saco de la cola. ¡Hasta pronto!")
@@ -366,8 +385,7 @@ class Matchmaking(commands.Cog):
                 await self.delete_messages(guild, messages)
                 
             elif response.status == 400:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 if mode == "FRIENDLIES":
                     search_tip = f"No estás en ninguna cola de friendlies, {player.mention}. Usa `.friendlies` para unirte a una."
@@ -414,7 +432,7 @@ class Matchmaking(commands.Cog):
 
         # Add as invited
         body = {'channel' : arena.id }
-        async with self.bot.session.post(f'http://127.0.0.1:8000/players/{guest.id}/invite/', json=body) as response:
+        async with self.bot.api.post(f'/players/{guest.id}/invite/', json=body) as response:
             if response.status == 200:
                 # html = await response.text()
                 # resp_body = json.loads(html)
@@ -484,7 +502,7 @@ class Matchmaking(commands.Cog):
         body = {'messages' : messages}
         logger.info(f"Saving messages: {messages}")
         
-        async with self.bot.session.post('http://127.0.0.1:8000/messages/', json=body) as response:
+        async with self.bot.api.post('/messages/', json=body) as response:
             if response.status != 201:
                 logger.error("ERROR CREATING MESSAGES")
                 logger.error(response)
@@ -552,10 +570,9 @@ class Matchmaking(commands.Cog):
                     body = {'guild': guild.id}                
                     
                 # SEARCH AGAIN
-                async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player_id}/{"ranked_" if is_ranked else ""}matchmaking/', json=body) as response:
+                async with self.bot.api.get(f'/players/{player_id}/{"ranked_" if is_ranked else ""}matchmaking/', json=body) as response:
                     if response.status == 200:
-                        html = await response.text()
-                        resp_body = json.loads(html)
+                        resp_body = await response.json()
 
                         logger.info(f'Arena matched')
 
@@ -573,8 +590,7 @@ class Matchmaking(commands.Cog):
                         await self.update_list_message(guild=ctx.guild)
                         
                     elif response.status == 404:
-                        html = await response.text()
-                        resp_body = json.loads(html)
+                        resp_body = await response.json()
                         
                         #  Ping tiers again
                         player = ctx.guild.get_member(player_id)
@@ -631,10 +647,9 @@ class Matchmaking(commands.Cog):
 
         # Set channel in API
         body = { 'channel_id' : arena.id }
-        async with self.bot.session.patch(f'http://127.0.0.1:8000/arenas/{arena_id}/', json=body) as response:
+        async with self.bot.api.patch(f'/arenas/{arena_id}/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
         #Set Permissions
         arena_permissions = [arena.set_permissions(player, read_messages=True, send_messages=True) for player in match]
         await asyncio.gather(*arena_permissions)
@@ -697,17 +712,13 @@ class Matchmaking(commands.Cog):
 
         # Get TIMEOUT_TIMES
         guild = ctx.guild
-        async with self.bot.session.get(f'http://127.0.0.1:8000/guilds/{guild.id}/') as response:
-            if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
-
-                MATCH_TIMEOUT = resp_body['match_timeout']
-                CANCEL_TIMEOUT = resp_body['cancel_time']
-            
-            else:
-                MATCH_TIMEOUT = 900
-                CANCEL_TIMEOUT = 90
+        config = await self.bot.guild_config.get(guild.id)
+        if config is not None:
+            MATCH_TIMEOUT = config.match_timeout
+            CANCEL_TIMEOUT = config.cancel_time
+        else:
+            MATCH_TIMEOUT = 900
+            CANCEL_TIMEOUT = 90
 
         @asyncio.coroutine
         async def reactions(message):
@@ -747,10 +758,9 @@ class Matchmaking(commands.Cog):
                 # API Call
                 body = { 'accepted' : str(emoji) == EMOJI_CONFIRM, 'timeout' : is_timeout, 'guild': ctx.guild.id}
 
-                async with self.bot.session.patch(f'http://127.0.0.1:8000/players/{player.id}/confirmation/', json=body) as response:                    
+                async with self.bot.api.patch(f'/players/{player.id}/confirmation/', json=body) as response:                    
                     if response.status == 200:
-                        html = await response.text()
-                        resp_body = json.loads(html)
+                        resp_body = await response.json()
 
                         all_accepted = resp_body.get('all_accepted', False)
                         player_accepted = resp_body.get('player_accepted', False)
@@ -788,10 +798,9 @@ class Matchmaking(commands.Cog):
                             cancel_other_tasks()
                             body = {'accepted' : False, 'timeout': True}
 
-                            async with self.bot.session.patch(f'http://127.0.0.1:8000/players/{missing_player_id}/confirmation/', json=body) as response:
+                            async with self.bot.api.patch(f'/players/{missing_player_id}/confirmation/', json=body) as response:
                                 if response.status == 200:
-                                    html = await response.text()
-                                    resp_body = json.loads(html)
+                                    resp_body = await response.json()
                         
                         cancel_other_tasks()
                         return resp_body
@@ -889,10 +898,9 @@ class Matchmaking(commands.Cog):
                 'channel': arena.id,                
             }
             
-            async with self.bot.session.patch(f'http://127.0.0.1:8000/players/{guest.id}/confirmation/', json=body) as response:
+            async with self.bot.api.patch(f'/players/{guest.id}/confirmation/', json=body) as response:
                 if response.status == 200:
-                    html = await response.text()
-                    resp_body = json.loads(html)
+                    resp_body = await response.json()
 
                     messages = resp_body.get('messages', [])
                     players = resp_body.get('players', {})
@@ -975,58 +983,57 @@ class Matchmaking(commands.Cog):
     #           L I S T
     # *******************************
 
-    async def update_list_message(self, guild=None):
+    async def update_list_message(self, guild=None, info=None):
+        """
+        Schedules an update of the list message of the guild.
+        Updates close in time are merged into a single edit (see ListMessageUpdater).
+        """
+        self.list_message.schedule(guild, info=info)
 
+    def list_message_content(self, guild, resp_body):
+        """
+        Builds the text of the list message from the info of /guilds/<id>/list_message/
+        """
         new_message = "__**BUSCANDO**__\n"
-        async with self.bot.session.get(f'http://127.0.0.1:8000/guilds/{guild.id}/list_message/') as response:
-            if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
-
-                # SEARCHING
-                for tier in resp_body['tiers']:
-                    tier_role = guild.get_role(tier['id'])
-                    friendlies_players = [guild.get_member(player_id) for player_id in tier['friendlies_players']]
-                    
-                    ranked_players = [guild.get_member(player_id) for player_id in tier['ranked_players']]                   
-                    player_names = ", ".join([player.nickname() for player in friendlies_players])            
-                    # RANKED SEARCHING
-                    ranked_info = ""
-                    if ranked_players:
-                        ranked_info = " | " if player_names else ""
-                        ranked_info += f"Gente buscando en ranked: {len(ranked_players)}"
-                    
-                    if not player_names and not ranked_info:
-                        ranked_info = "---"
 
-                    new_message += f"**{tier_role.name}**:\n```\n{player_names}{ranked_info} \n```\n"
-                
-                if resp_body['confirmation']:
-                    new_message += "\n**CONFIRMANDO:**\n"
-
-                for arena in resp_body['confirmation']:
-                    player1, player2 = [{'name' : guild.get_member(player['id']).nickname(), 'tier': guild.get_role(player['tier']).name, 'status' : player['status']} for player in arena]
-                    if arena[0]['mode'] == 'RANKED':
-                        player1['name'], player2['name'] = "Alguien", "Alguien"
-                    new_message += (
-                        f"**[{EMOJI_CONFIRM if player1['status'] == 'ACCEPTED' else EMOJI_HOURGLASS}]  {player1['name']}** ({player1['tier']})"
-                        f" vs. **{player2['name']}** ({player2['tier']}) **[{EMOJI_CONFIRM if player2['status'] == 'ACCEPTED' else EMOJI_HOURGLASS}]**\n"
-                    )
-                if resp_body['playing']:
-                    new_message += "\n**ARENAS:**\n"
-                
-                for arena in resp_body['playing']:                    
-                    players = [{'name' : guild.get_member(player['id']).nickname(), 'tier': guild.get_role(player['tier']).name} for player in arena]
-                    players_text = [f"**{player['name']}** ({player['tier']})" for player in players]
-                    new_message += f"{f'{EMOJI_CROSSED_SWORDS} ' if arena[0]['mode'] == 'RANKED' else ''}{' vs. '.join(players_text)}\n"
+        # SEARCHING
+        for tier in resp_body['tiers']:
+            tier_role = guild.get_role(tier['id'])
+            friendlies_players = [guild.get_member(player_id) for player_id in tier['friendlies_players']]
+            
+            ranked_players = [guild.get_member(player_id) for player_id in tier['ranked_players']]                   
+            player_names = ", ".join([player.nickname() for player in friendlies_players])            
+            # RANKED SEARCHING
+            ranked_info = ""
+            if ranked_players:
+                ranked_info = " | " if player_names else ""
+                ranked_info += f"Gente buscando en ranked: {len(ranked_players)}"
+            
+            if not player_names and not ranked_info:
+                ranked_info = "---"
 
-                list_channel = guild.get_channel(resp_body['list_channel'])
-                list_message = await list_channel.fetch_message(resp_body['list_message'])
+            new_message += f"**{tier_role.name}**:\n```\n{player_names}{ranked_info} \n```\n"
+        
+        if resp_body['confirmation']:
+            new_message += "\n**CONFIRMANDO:**\n"
+
+        for arena in resp_body['confirmation']:
+            player1, player2 = [{'name' : guild.get_member(player['id']).nickname(), 'tier': guild.get_role(player['tier']).name, 'status' : player['status']} for player in arena]
+            if arena[0]['mode'] == 'RANKED':
+                player1['name'], player2['name'] = "Alguien", "Alguien"
+            new_message += (
+                f"**[{EMOJI_CONFIRM if player1['status'] == 'ACCEPTED' else EMOJI_HOURGLASS}]  {player1['name']}** ({player1['tier']})"
+                f" vs. **{player2['name']}** ({player2['tier']}) **[{EMOJI_CONFIRM if player2['status'] == 'ACCEPTED' else EMOJI_HOURGLASS}]**\n"
+            )
+        if resp_body['playing']:
+            new_message += "\n**ARENAS:**\n"
+        
+        for arena in resp_body['playing']:                    
+            players = [{'name' : guild.get_member(player['id']).nickname(), 'tier': guild.get_role(player['tier']).name} for player in arena]
+            players_text = [f"**{player['name']}** ({player['tier']})" for player in players]
+            new_message += f"{f'{EMOJI_CROSSED_SWORDS} ' if arena[0]['mode'] == 'RANKED' else ''}{' vs. '.join(players_text)}\n"
 
-                return await list_message.edit(content=new_message)
-            else:
-                logger.error(f"Error updating the list message")
-                return False        
+        return new_message
     
     async def invite_mention_list(self, ctx):        
         message_text = (f"**__Lista de menciones:__**\n"
@@ -1038,10 +1045,9 @@ class Matchmaking(commands.Cog):
         body = {'channel': arena.id}
 
         # Get unique players
-        async with self.bot.session.get('http://127.0.0.1:8000/arenas/invite_list/', json=body) as response:
+        async with self.bot.api.get('/arenas/invite_list/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
                 
                 players = resp_body['players']
                 hosts = resp_body['hosts']
@@ -1097,10 +1103,9 @@ class Matchmaking(commands.Cog):
         """
         # GET ARENAS INFO
         body = {'startup': startup}
-        async with self.bot.session.delete('http://127.0.0.1:8000/arenas/clean_up/', json=body) as response:
+        async with self.bot.api.delete('/arenas/clean_up/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 arenas = resp_body.get('arenas', [])
             else:
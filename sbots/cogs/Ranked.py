@@ -32,8 +32,21 @@ class Ranked(commands.Cog):
     This Cog handles the sets of ranked matches.
     """
     
+    # Seconds to gather the changes of a leaderboard before updating it
+    LEADERBOARD_DELAY = 2
+
     def __init__(self, bot):
         self.bot = bot
+        self.leaderboard_tasks = {}
+
+    @commands.Cog.listener()
+    async def on_api_event(self, event):
+        if event['type'] != 'rating_changed' or not event['tier']:
+            return
+        
+        guild = self.bot.get_guild(event['guild'])
+        if guild:
+            self.schedule_leaderboard(guild.get_role(event['tier']))
     
     def game_title(self, game_number):
         """
@@ -59,10 +72,9 @@ class Ranked(commands.Cog):
                 task.cancel()
             
         # Surrender in DB
-        async with self.bot.session.post(f'http://127.0.0.1:8000/players/{player.id}/surrender/') as response:
+        async with self.bot.api.post(f'/players/{player.id}/surrender/') as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 # Get winner and loser
                 winner = guild.get_member(resp_body['winner_info']['player'])
@@ -116,10 +128,9 @@ class Ranked(commands.Cog):
                     break
         
         # DO REMATCH
-        async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player1.id}/rematch/') as response:
+        async with self.bot.api.get(f'/players/{player1.id}/rematch/') as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 player1_id = resp_body['player1']
                 player2_id = resp_body['player2']
@@ -134,6 +145,23 @@ class Ranked(commands.Cog):
         asyncio.create_task(self.game_setup(player1, player2, channel, 1))
 
 
+    def schedule_leaderboard(self, tier):
+        """
+        Updates the leaderboard of the tier in LEADERBOARD_DELAY seconds.
+        Every change in between (i.e both players of a set) is shown in that single update.
+        """
+        if not tier or tier.id in self.leaderboard_tasks:
+            return
+
+        async def delayed_update():
+            try:
+                await asyncio.sleep(self.LEADERBOARD_DELAY)
+            finally:
+                self.leaderboard_tasks.pop(tier.id, None)
+            await self.update_leaderboard(tier)
+        
+        self.leaderboard_tasks[tier.id] = asyncio.create_task(delayed_update(), name=f"leaderboard-{tier.id}")
+
     async def update_leaderboard(self, tier):
         """
         Updates the leaderboard message of the given tier
@@ -142,10 +170,9 @@ class Ranked(commands.Cog):
             logger.error("No tier to update.")
             return False
         
-        async with self.bot.session.get(f'http://127.0.0.1:8000/tiers/{tier.id}/leaderboards/') as response:
+        async with self.bot.api.get(f'/tiers/{tier.id}/leaderboards/') as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
             else:
                 return False
                 
@@ -234,11 +261,11 @@ class Ranked(commands.Cog):
         
         # Update leaderboards        
         old_tier = guild.get_role(info['tier']['old_id'])
-        asyncio.create_task(self.update_leaderboard(old_tier))
+        self.schedule_leaderboard(old_tier)
         
         if is_promoted or is_demoted:
             new_tier = guild.get_role(info['tier']['new_id'])
-            asyncio.create_task(self.update_leaderboard(new_tier))
+            self.schedule_leaderboard(new_tier)
 
             await player.remove_roles(old_tier)
             await player.add_roles(new_tier)
@@ -266,10 +293,9 @@ class Ranked(commands.Cog):
         """
         Returns the information of the current score in the game
         """
-        async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player.id}/score/') as response:
+        async with self.bot.api.get(f'/players/{player.id}/score/') as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 p1_wins = resp_body['player_wins']
                 p2_wins = resp_body['other_player_wins']
@@ -301,10 +327,9 @@ class Ranked(commands.Cog):
         else:
             body = {'player_id': player1.id}
             
-            async with self.bot.session.get(f'http://127.0.0.1:8000/games/last_winner/', json=body) as response:
+            async with self.bot.api.get(f'/games/last_winner/', json=body) as response:
                 if response.status == 200:
-                    html = await response.text()
-                    resp_body = json.loads(html)                    
+                    resp_body = await response.json()                    
                     last_winner = channel.guild.get_member(resp_body['last_winner'])
                 else:
                     html = await response.text()
@@ -317,10 +342,9 @@ class Ranked(commands.Cog):
                 await asyncio.create_task(self.character_pick(other_player, guild, channel, blind=False))                            
 
         # Get characters
-        async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player1.id}/game_info/') as response:
+        async with self.bot.api.get(f'/players/{player1.id}/game_info/') as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 game_players = resp_body['game_players']
                 
@@ -462,10 +486,9 @@ class Ranked(commands.Cog):
             winner = players_info[i]['player']
         
         # Set winner in DB
-        async with self.bot.session.post(f'http://127.0.0.1:8000/players/{winner.id}/win_game/') as response:
+        async with self.bot.api.post(f'/players/{winner.id}/win_game/') as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 loser = player1 if winner == player2 else player2
                 resp_body['winner'] = winner
@@ -483,18 +506,12 @@ class Ranked(commands.Cog):
         asyncio.current_task().set_name(f"stagestrike-{channel.id}")
 
         # Get stages
-        async with self.bot.session.get(f'http://127.0.0.1:8000/stages/') as response:
-            if response.status == 200:
-                html = await response.text()
-                stages = json.loads(html)
-            else:
-                html = await response.text()
-                await channel.send("Error al buscar los escenarios.")
-                logger.error(f"Error in get stages: {html}")
-                return False
+        catalog = await self.bot.stages.get()
+        if catalog is None:
+            await channel.send("Error al buscar los escenarios.")
+            return False
         
-        if is_first:
-            stages = [stage for stage in stages if stage.get('type', '') == 'STARTER']
+        stages = catalog.for_game(is_first)
 
         def get_stage_text(next_player, open_stages, mode, number):
             """
@@ -504,9 +521,9 @@ class Ranked(commands.Cog):
             number_of_bans_text = f" {number} escenarios" if number > 1 else ""
 
             text = f"Le toca **{action.upper()}**{number_of_bans_text} a {next_player.mention}. Reacciona con el número de stage que quieres {action.lower()}.\n"
-            text += "\n".join([f"{r'~~' if stage not in open_stages else ''}{i + 1}.\
-                {stage['emoji']} {stage['name']}{r'~~' if stage not in open_stages else ''}"
-                for i, stage in enumerate(stages)])
+            text += "\n".join([f"{r'~~' if i not in open_stages else ''}{i + 1}.\
+                {stage['emoji']} {stage['name']}{r'~~' if i not in open_stages else ''}"
+                for i, stage in enumerate(stages.stages)])
             return text
 
         def stages_to_ban(ban_order, i):
@@ -536,8 +553,9 @@ class Ranked(commands.Cog):
             other_player = player1 if first_ban.id == player2.id else player2            
             ban_order = [first_ban, first_ban, first_ban, other_player]
         
-        open_stages = list(stages.copy())
-        open_emojis = list(NUMBER_EMOJIS[:len(open_stages)])
+        # Indexes of the stages that can still be banned or picked
+        open_stages = set(range(len(stages)))
+        open_emojis = list(stages.emojis)
 
         # Send bans message
         number_of_bans = stages_to_ban(ban_order, 0)
@@ -561,7 +579,7 @@ class Ranked(commands.Cog):
 
             #  Update open_stages
             if mode != "PICK":                
-                open_stages = list(filter(lambda x: NUMBER_EMOJIS[stages.index(x)] != emoji, open_stages))
+                open_stages.discard(stages.index(emoji))
 
             # Get next player
             if idx + 1 < len(ban_order):
@@ -581,9 +599,9 @@ class Ranked(commands.Cog):
                 await message.edit(content=text)
         
         if is_first:
-            stage = open_stages[0]
+            stage = stages.stages[min(open_stages)]
         else:
-            stage = list(filter(lambda x: NUMBER_EMOJIS[stages.index(x)] == emoji, open_stages))[0]
+            stage = stages.stages[stages.index(emoji)]
 
         
         # SET STAGE
@@ -592,7 +610,7 @@ class Ranked(commands.Cog):
             'stage_name': stage['name']
         }
 
-        async with self.bot.session.post(f'http://127.0.0.1:8000/games/stage/', json=body) as response:
+        async with self.bot.api.post(f'/games/stage/', json=body) as response:
             if response.status == 200:                
                 await channel.send(f"El combate tendrá lugar en **{stage['name']}** {stage['emoji']}")
                 await message.clear_reactions()
@@ -619,10 +637,9 @@ class Ranked(commands.Cog):
 
         # Get guild id if in DMs
         if not guild:
-            async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player.id}/game_info/') as response:
+            async with self.bot.api.get(f'/players/{player.id}/game_info/') as response:
                 if response.status == 200:
-                    html = await response.text()
-                    resp_body = json.loads(html)
+                    resp_body = await response.json()
 
                     # Get guild
                     guild_id = resp_body['guild']
@@ -664,7 +681,7 @@ class Ranked(commands.Cog):
         if is_asked:
             body = {'character' : character_role.name}
             
-            async with self.bot.session.post(f'http://127.0.0.1:8000/players/{player.id}/character/', json=body) as response:
+            async with self.bot.api.post(f'/players/{player.id}/character/', json=body) as response:
                 if response.status == 200:
                     message_text = f"**{player.nickname()}** ha elegido a {character_role.name} {character_role.emoji()}."
                     
@@ -712,10 +729,9 @@ class Ranked(commands.Cog):
             }
             
             # GET CHARACTERS
-            async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player.id}/profile/', json=body) as response:
+            async with self.bot.api.get(f'/players/{player.id}/profile/', json=body) as response:
                 if response.status == 200:
-                    html = await response.text()
-                    resp_body = json.loads(html)                
+                    resp_body = await response.json()                
                     
                     mains = resp_body['mains']
                     seconds = resp_body['seconds']
@@ -746,7 +762,7 @@ class Ranked(commands.Cog):
             }
         
             # SAVE THE CHOICE IN THE DATABASE
-            async with self.bot.session.post(f'http://127.0.0.1:8000/players/{player.id}/character/', json=body) as response:
+            async with self.bot.api.post(f'/players/{player.id}/character/', json=body) as response:
                 if response.status == 200:
                     html = await response.text()                    
                     if blind:
@@ -762,10 +778,9 @@ class Ranked(commands.Cog):
             return True
         except CancelledError as e:
             # Check if it was cancelled with play
-            async with self.bot.session.get(f'http://127.0.0.1:8000/players/{player.id}/game_info/') as response:
+            async with self.bot.api.get(f'/players/{player.id}/game_info/') as response:
                 if response.status == 200:
-                    html = await response.text()
-                    resp_body = json.loads(html)
+                    resp_body = await response.json()
                     game_players = resp_body['game_players']
                 else:
                     raise
@@ -785,10 +800,9 @@ class Ranked(commands.Cog):
             'player_id': ctx.author.id
         }
         
-        async with self.bot.session.post(f'http://127.0.0.1:8000/games/remake/', json=body) as response:
+        async with self.bot.api.post(f'/games/remake/', json=body) as response:
             if response.status == 200:
-                html = await response.text()
-                resp_body = json.loads(html)
+                resp_body = await response.json()
 
                 game_number = resp_body['game_number']
                 other_player_id = resp_body['other_player_id']
@@ -0,0 +1,167 @@
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+
+import aiohttp
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+logger = logging.getLogger('discord')
+
+# Ids in the paths are grouped, so /players/1234/profile/ and /players/5678/profile/
+# are measured as the same endpoint.
+ID_REGEX = re.compile(r'/\d+')
+
+
+class ApiResponse:
+    """
+    Response of the API. The body is read once, and decoded when needed.
+    """
+    __slots__ = ('status', '_body')
+
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+
+    def __repr__(self):
+        return f"<ApiResponse {self.status}: {self._body[:200]!r}>"
+
+    async def read(self):
+        return self._body
+
+    async def text(self):
+        return self._body.decode('utf-8')
+
+    async def json(self):
+        """
+        Returns the decoded body, or None if it's empty.
+        """
+        return json_loads(self._body) if self._body else None
+
+
+class EndpointMetrics:
+    __slots__ = ('count', 'errors', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed, error=False):
+        self.count += 1
+        self.errors += int(error)
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class ApiRequest:
+    """
+    Async context manager for a single request: `async with bot.api.get('/players/1234/') as response:`
+    """
+
+    def __init__(self, client, method, path, kwargs):
+        self.client = client
+        self.method = method
+        self.path = path
+        self.kwargs = kwargs
+
+    async def __aenter__(self):
+        return await self.client.request(self.method, self.path, **self.kwargs)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class ApiClient:
+    """
+    Client of the SmashBotSpain API, shared by every cog.
+
+    Owns a single aiohttp session, with a pool of keep-alive connections.
+    The API can be reached by TCP (base_url) or through a Unix socket (socket_path),
+    in which case base_url is only used for the Host header.
+
+    The latency of every endpoint is measured (see metrics()).
+    """
+
+    def __init__(self, base_url="http://127.0.0.1:8000", socket_path=None, pool_size=20, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.socket_path = socket_path
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+        self.session = None
+        self._metrics = defaultdict(EndpointMetrics)
+
+    async def start(self):
+        """
+        Opens the session. Does nothing if it's already open, so it's safe to call on every reconnection.
+        """
+        if self.session is not None and not self.session.closed:
+            return
+
+        if self.socket_path:
+            connector = aiohttp.UnixConnector(path=self.socket_path, limit=self.pool_size)
+        else:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300, keepalive_timeout=60)
+
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def request(self, method, path, **kwargs):
+        """
+        Sends a request to the API, and returns an ApiResponse with the whole body already read.
+        Connection errors and timeouts are raised as usual.
+        """
+        await self.start()
+
+        endpoint = f"{method} {ID_REGEX.sub('/{id}', path)}"
+        start = time.perf_counter()
+        error = True
+
+        try:
+            async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+                body = await response.read()
+                error = response.status >= 500
+                return ApiResponse(response.status, body)
+        finally:
+            self._metrics[endpoint].add(time.perf_counter() - start, error=error)
+
+    def get(self, path, **kwargs):
+        return ApiRequest(self, 'GET', path, kwargs)
+
+    def post(self, path, **kwargs):
+        return ApiRequest(self, 'POST', path, kwargs)
+
+    def patch(self, path, **kwargs):
+        return ApiRequest(self, 'PATCH', path, kwargs)
+
+    def delete(self, path, **kwargs):
+        return ApiRequest(self, 'DELETE', path, kwargs)
+
+    # ****************************
+    #       M E T R I C S
+    # ****************************
+
+    def metrics(self):
+        """
+        Returns a list of (endpoint, EndpointMetrics), slowest (in total) first.
+        """
+        return sorted(self._metrics.items(), key=lambda item: item[1].total, reverse=True)
+
+    def reset_metrics(self):
+        self._metrics.clear()
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger('discord')
+
+
+class EventListener:
+    """
+    Receives the events the API sends through Postgres (LISTEN/NOTIFY) and dispatches them
+    to the bot as `api_event`, so any cog can handle them with:
+
+        @commands.Cog.listener()
+        async def on_api_event(self, event):
+
+    Every event is a dict with at least 'type' and 'guild' (its discord id, None if the event is not
+    about a single guild, like stages_changed).
+    Needs asyncpg. Without it (or without a DSN) the bot works as usual, just without events.
+    """
+
+    def __init__(self, bot, dsn, channel='sbots_events', retry_time=30):
+        self.bot = bot
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_time = retry_time
+
+        self.connection = None
+        self._watcher = None
+
+    @property
+    def connected(self):
+        return self.connection is not None and not self.connection.is_closed()
+
+    async def start(self):
+        """
+        Starts listening. Safe to call on every reconnection of the bot.
+        """
+        if not self.dsn or self._watcher is not None:
+            return
+
+        self._watcher = asyncio.create_task(self._watch(), name="api-events")
+
+    async def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        if self.connected:
+            await self.connection.close()
+
+    async def _watch(self):
+        """
+        Keeps the connection open, reconnecting if it's lost.
+        """
+        try:
+            import asyncpg
+        except ImportError:
+            return logger.error("asyncpg is not installed: the bot won't receive events from the API.")
+
+        while True:
+            if not self.connected:
+                try:
+                    self.connection = await asyncpg.connect(self.dsn)
+                    await self.connection.add_listener(self.channel, self._on_notification)
+                    logger.info(f"Listening to the API events.")
+                except Exception as e:
+                    logger.error(f"Error connecting to the API events: {e}")
+
+            await asyncio.sleep(self.retry_time)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return logger.error(f"Bad API event: {payload}")
+
+        self.bot.dispatch('api_event', event)
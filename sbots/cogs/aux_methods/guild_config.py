@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger('discord')
+
+
+class GuildConfig:
+    """
+    The settings of a guild the bot needs on every command: its special channels,
+    the channels of its tiers and its timeouts (in seconds).
+    """
+    __slots__ = ('guild_id', 'spam_channel', 'flairing_channel', 'list_channel', 'list_message',
+                'ranked_channel', 'ranked_message', 'leaderboard_channel',
+                'match_timeout', 'cancel_time', 'ggs_time', 'role_message_time',
+                'tier_channels', 'tier_channel_ids')
+
+    def __init__(self, guild_id, resp_body, tiers=()):
+        self.guild_id = guild_id
+
+        # {tier_id: channel_id}
+        self.tier_channels = {tier['discord_id']: tier['channel_id'] for tier in tiers if tier['channel_id']}
+        self.tier_channel_ids = set(self.tier_channels.values())
+
+        self.spam_channel = resp_body.get('spam_channel')
+        self.flairing_channel = resp_body.get('flairing_channel')
+        self.list_channel = resp_body.get('list_channel')
+        self.list_message = resp_body.get('list_message')
+        self.ranked_channel = resp_body.get('ranked_channel')
+        self.ranked_message = resp_body.get('ranked_message')
+        self.leaderboard_channel = resp_body.get('leaderboard_channel')
+
+        self.match_timeout = resp_body.get('match_timeout', 900)
+        self.cancel_time = resp_body.get('cancel_time', 90)
+        self.ggs_time = resp_body.get('ggs_time', 300)
+        self.role_message_time = resp_body.get('role_message_time', 25)
+
+    def set_tier_channel(self, tier_id, channel_id):
+        self.tier_channels[tier_id] = channel_id
+        self.tier_channel_ids = set(self.tier_channels.values())
+
+
+class GuildConfigCache:
+    """
+    Keeps the GuildConfig of every guild in memory, so the command checks don't
+    need to ask the API each time.
+
+    A config is fetched the first time it's needed and kept for `ttl` seconds,
+    or until it's invalidated (i.e after an admin changes the guild settings).
+    Guilds the API doesn't know are cached as None, with the same TTL.
+    """
+
+    def __init__(self, bot, ttl=300):
+        self.bot = bot
+        self.ttl = ttl
+        self._configs = {}
+        self._pending = {}
+        # Change on every invalidation (of every guild, or of one), so a fetch that started before is not kept
+        self._version = 0
+        self._guild_versions = {}
+
+    async def get(self, guild_id):
+        """
+        Returns the GuildConfig of the guild, or None if it isn't registered in the API.
+        """
+        cached = self._configs.get(guild_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        # Concurrent commands in the same guild share the same request
+        pending = self._pending.get(guild_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(guild_id))
+            self._pending[guild_id] = pending
+            pending.add_done_callback(lambda done: self._fetched(guild_id, done))
+
+        return await asyncio.shield(pending)
+
+    def _fetched(self, guild_id, pending):
+        if self._pending.get(guild_id) is pending:
+            del self._pending[guild_id]
+
+    def _get_version(self, guild_id):
+        return self._version, self._guild_versions.get(guild_id, 0)
+
+    async def _fetch(self, guild_id):
+        version = self._get_version(guild_id)
+        try:
+            guild_body, tiers = await asyncio.gather(
+                self._get_json(f'/guilds/{guild_id}/'),
+                self._get_json(f'/tiers/?guild={guild_id}')
+            )
+        except Exception as e:
+            logger.error(f"Error fetching the config of guild {guild_id}: {e}")
+            return None
+
+        config = GuildConfig(guild_id, guild_body, tiers or ()) if guild_body is not None else None
+        if version == self._get_version(guild_id):
+            self._configs[guild_id] = (time.monotonic() + self.ttl, config)
+        return config
+
+    async def _get_json(self, path):
+        """
+        Returns the decoded body, or None if the API answered 404.
+        """
+        async with self.bot.api.get(path) as response:
+            if response.status == 200:
+                return await response.json()
+            elif response.status == 404:
+                return None
+            else:
+                raise Exception(f"GET {path} answered {response.status}")
+
+    def set_tier_channel(self, guild_id, tier_id, channel_id):
+        """
+        Updates the channel of a tier, if the config of its guild is cached.
+        """
+        cached = self._configs.get(guild_id)
+        if cached is not None and cached[1] is not None:
+            cached[1].set_tier_channel(tier_id, channel_id)
+
+    def invalidate(self, guild_id=None):
+        """
+        Drops the config of the given guild, or all of them if guild_id is None.
+        A fetch in flight is not kept: the next get() fetches the config again.
+        """
+        if guild_id is None:
+            self._version += 1
+            self._configs.clear()
+            self._pending.clear()
+        else:
+            self._guild_versions[guild_id] = self._guild_versions.get(guild_id, 0) + 1
+            self._configs.pop(guild_id, None)
+            self._pending.pop(guild_id, None)
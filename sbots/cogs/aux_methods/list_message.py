@@ -0,0 +1,109 @@
+import asyncio
+import logging
+
+import discord
+
+logger = logging.getLogger('discord')
+
+
+class ListMessageUpdater:
+    """
+    Keeps the list message of every guild up to date.
+
+    Updates are debounced: every change scheduled within `delay` seconds
+    (and while an edit is on its way) collapses into a single edit.
+    The discord.Message of each guild is cached, and the message is only
+    edited when its content has actually changed.
+    """
+
+    def __init__(self, bot, render, delay=1.0):
+        self.bot = bot
+        self.render = render
+        self.delay = delay
+
+        self._tasks = {}
+        self._dirty = set()
+        self._infos = {}
+        self._messages = {}
+        self._contents = {}
+
+    def schedule(self, guild, info=None):
+        """
+        Marks the list of the guild as outdated. It'll be updated in the next `delay` seconds.
+        If the caller already has the info of the list (i.e from /arenas/search/), it's used
+        instead of asking the API again.
+        """
+        self._dirty.add(guild.id)
+
+        if info is not None:
+            self._infos[guild.id] = info
+        else:
+            # Something else changed since that info was sent
+            self._infos.pop(guild.id, None)
+
+        if guild.id not in self._tasks:
+            self._tasks[guild.id] = asyncio.create_task(self._run(guild), name=f"list-message-{guild.id}")
+
+    def is_scheduled(self, guild_id):
+        """
+        True if there's an update of the guild that hasn't started yet.
+        """
+        return guild_id in self._dirty
+
+    def forget(self, guild_id):
+        """
+        Drops the cached message and content of the guild.
+        """
+        self._messages.pop(guild_id, None)
+        self._contents.pop(guild_id, None)
+
+    async def _run(self, guild):
+        try:
+            while guild.id in self._dirty:
+                await asyncio.sleep(self.delay)
+                self._dirty.discard(guild.id)
+
+                try:
+                    await self._update(guild)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error updating the list message of {guild}: {e}")
+                    self.forget(guild.id)
+        finally:
+            self._tasks.pop(guild.id, None)
+
+    async def _update(self, guild):
+        resp_body = self._infos.pop(guild.id, None)
+
+        if resp_body is None:
+            async with self.bot.api.get(f'/guilds/{guild.id}/list_message/') as response:
+                if response.status != 200:
+                    return logger.error(f"Error updating the list message")
+
+                resp_body = await response.json()
+
+        content = self.render(guild, resp_body)
+        if content == self._contents.get(guild.id):
+            return
+
+        message = await self._get_message(guild, resp_body['list_channel'], resp_body['list_message'])
+
+        try:
+            await message.edit(content=content)
+        except discord.NotFound:
+            # The message was deleted: fetch it again next time
+            return self.forget(guild.id)
+
+        self._contents[guild.id] = content
+
+    async def _get_message(self, guild, channel_id, message_id):
+        message = self._messages.get(guild.id)
+
+        if message is None or message.id != message_id or message.channel.id != channel_id:
+            self._contents.pop(guild.id, None)
+            list_channel = guild.get_channel(channel_id)
+            message = await list_channel.fetch_message(message_id)
+            self._messages[guild.id] = message
+
+        return message
@@ -0,0 +1,93 @@
+import asyncio
+
+import discord
+
+from ..params.matchmaking_params import EMOJI_ARROW_BACKWARD, EMOJI_ARROW_FORWARD
+
+# Discord's limit for the content of a message
+MESSAGE_LIMIT = 2000
+
+
+def split_pages(blocks, limit=MESSAGE_LIMIT):
+    """
+    Joins the blocks of text in pages of up to `limit` characters, without splitting any block.
+    Blocks longer than a page are split in several pages (by lines, if possible).
+    """
+    pages = [""]
+    for block in blocks:
+        while len(block) > limit:
+            cut = block.rfind("\n", 0, limit) + 1 or limit
+            pages.append(block[:cut])
+            block = block[cut:]
+            pages.append("")
+
+        if len(pages[-1]) + len(block) > limit:
+            pages.append("")
+        pages[-1] += block
+
+    return [page for page in pages if page] or [""]
+
+
+def split_names(names, limit=1800, separator=", "):
+    """
+    Joins the names in chunks of up to `limit` characters, without splitting any name.
+    Returns a list with the text of every chunk.
+    """
+    chunks = []
+    chunk = ""
+    for name in names:
+        if chunk and len(chunk) + len(separator) + len(name) > limit:
+            chunks.append(chunk)
+            chunk = ""
+        chunk = f"{chunk}{separator}{name}" if chunk else name
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+async def send_pages(bot, channel, header, blocks, timeout=120):
+    """
+    Sends the blocks as a single message, with a page at a time.
+    Anyone can turn the pages with the arrow reactions, until nobody does for `timeout` seconds.
+    """
+    # Room for the header and the page number
+    limit = MESSAGE_LIMIT - len(header) - 20
+    pages = split_pages(blocks, limit=limit)
+
+    def page_text(i):
+        page_number = f" ({i + 1}/{len(pages)})" if len(pages) > 1 else ""
+        return f"{header}{page_number}\n{pages[i]}"
+
+    message = await channel.send(page_text(0))
+    if len(pages) == 1:
+        return message
+
+    await message.add_reaction(EMOJI_ARROW_BACKWARD)
+    await message.add_reaction(EMOJI_ARROW_FORWARD)
+
+    def check(reaction, user):
+        return reaction.message.id == message.id and str(reaction.emoji) in (EMOJI_ARROW_BACKWARD, EMOJI_ARROW_FORWARD) \
+            and user != bot.user
+
+    current = 0
+    while True:
+        try:
+            reaction, user = await bot.wait_for('reaction_add', timeout=timeout, check=check)
+        except asyncio.TimeoutError:
+            break
+
+        step = 1 if str(reaction.emoji) == EMOJI_ARROW_FORWARD else -1
+        current = (current + step) % len(pages)
+        await message.edit(content=page_text(current))
+
+        try:
+            await message.remove_reaction(reaction.emoji, user)
+        except discord.Forbidden:
+            pass
+
+    try:
+        await message.clear_reactions()
+    except discord.Forbidden:
+        pass
+    return message
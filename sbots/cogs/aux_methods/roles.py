@@ -1,7 +1,10 @@
+import difflib
+from collections import defaultdict
+
 import discord
 
 from .text import key_format
-from ..params.roles import SMASH_CHARACTERS, NORMALIZED_SMASH_CHARACTERS
+from ..params.roles import SMASH_CHARACTERS, CHARACTER_ALIASES
 
 async def update_or_create_roles(guild, all_roles, all_roles_names, roles, update=False):
     """
@@ -31,128 +34,95 @@ async def update_or_create_roles(guild, all_roles, all_roles_names, roles, updat
     return created_count, updated_count
     
 
-def normalize_character(character_name):
+# Shortest part of a name that is accepted (i.e "pika" for Pikachu)
+MIN_PREFIX = 3
+# How similar a misspelled name has to be (0 to 1, see difflib)
+FUZZY_CUTOFF = 0.85
+
+
+def build_character_index(names, aliases):
+    """
+    Returns two dicts to look up the characters:
+        - {name or alias: character name}, with the keys in key_format
+        - {prefix: character name}, with the prefixes of those keys that only match one character
+    """
+    index = {}
+    for name, character_aliases in aliases.items():
+        for alias in character_aliases:
+            index[key_format(alias)] = name
+    # The names are never taken by an alias
+    for name in names:
+        index[key_format(name)] = name
+
+    prefix_matches = defaultdict(set)
+    for key, name in index.items():
+        for end in range(MIN_PREFIX, len(key)):
+            prefix_matches[key[:end]].add(name)
+
+    prefixes = {prefix: next(iter(matches)) for prefix, matches in prefix_matches.items()
+                if len(matches) == 1 and prefix not in index}
+
+    return index, prefixes
+
+CHARACTER_INDEX, CHARACTER_PREFIXES = build_character_index(SMASH_CHARACTERS.keys(), CHARACTER_ALIASES)
+
+
+def normalize_character(character_name, fuzzy=False):
     """
     Accepts other ways of calling the characters, and returns the correct one.
+    With fuzzy, the beginning of a name and small typos are accepted too.
     False if the character doesn't exist
     """
     char = key_format(character_name)
 
-    if char in NORMALIZED_SMASH_CHARACTERS:
-        return next((char_name for char_name in SMASH_CHARACTERS.keys() if key_format(char_name) == char), None)
-
-    if char in ('dk', 'donkey', 'donkey kong'):
-        return 'Donkey Kong'    
-    if char in ('damus', 'upb'):
-        return 'Dark Samus'
-    if char in ('captain falcon', 'capitan falcon', 'falcon'):
-        return 'Captain Falcon'    
-    if char in ('ice climbers', 'icies', 'ics', 'ic'):
-        return 'Ice Climbers'
-    if char in ('dr. mario', 'dr.mario', 'doc', 'doctor mario', 'dr mario'):
-        return 'Dr. Mario'
-    if char in ('young link', 'link niño', 'yink'):
-        return 'Young Link'
-    if char in ('ganondorf', 'ganon'):
-        return 'Ganondorf'
-    if char in ('gaw', 'mr. game & watch', 'mr. game and watch', 'g&w', 'mr gaw', 'mr. gaw', 'game and watch', 'game & watch', 'game&watch'):
-        return 'Mr. Game & Watch'
-    if char in ('meta knight', 'metaknight', 'mk', 'metalknight'):
-        return 'Meta Knight'    
-    if char in ('pittoo', 'dpit', 'pit sombrio'):
-        return 'Dark Pit'
-    if char in ('zero suit samus', 'zss', 'zzs', 'samus zero'):
-        return 'Zero Suit Samus'
-    if char in ('pokemon trainer', 'pkmn trainer', 'pokemon', 'charizard', 'ivysaur', 'squirtle'):
-        return 'Pokémon Trainer'
-    if char in ('diddy kong', 'diddy', 'ddk'):
-        return 'Diddy Kong'
-    if char in ('king dedede', 'rey dedede', 'ddd', 'd3', '3d', 'dedede'):
-        return 'King Dedede'
-    if char in ('olimar', 'alph'):
-        return 'Olimar'
-    if char in ('r.o.b.', 'rob', 'r.o.b', 'r.ob', 'robot'):
-        return 'R.O.B.'
-    if char in ('atun', 'toon', 'tink', 'tlink'):
-        return 'Toon Link'
-    if char in ('aldeano'):
-        return 'Villager'
-    if char in ('megaman', 'mega', 'mega-man'):
-        return 'Mega Man'
-    if char in ('wft', 'wii fit', 'entrenadora', 'entrenadora de wii fit'):
-        return 'Wii Fit Trainer'
-    if char in ('rosalina and luma', 'estela y destello', 'rosalina', 'estela', 'luma', 'destello', 'estela & destello'):
-        return 'Rosalina & Luma'
-    if char in ('mac', 'lmac', 'lm'):
-        return 'Little Mac'
-    if char in ('mii espadachin', 'espadachin', 'swordfighter', 'mii sword'):
-        return 'Mii Swordfighter'
-    if char in ('mii karateka', 'karateka', 'brawler'):
-        return 'Mii Brawler'
-    if char in ('pacman', 'pac man', 'pac', 'waka'):
-        return 'Pac-Man'
-    if char in ('palu', 'patulena'):
-        return 'Palutena'
-    if char in ('daraen'):
-        return 'Robin'
-    if char in ('bowser jr', 'bjr', 'jr', 'bowsy', 'larry', 'ludwig', 'lemmy', 'iggy', 'wendy', 'morton', 'roy koopa', 'koopaling', 'koopalings'):
-        return 'Bowser Jr.'
-    if char in ('dhd', 'duck hunt duo', 'duo duck hunt', 'perro', 'perropato', 'duckhunt', 'dick hunt', 'ddh', 'dog'):
-        return 'Duck Hunt'
-    if char in ('bayonneta', 'bayonneta', 'bayo'):
-        return 'Bayonetta'
-    if char in ('rydle', 'ridel', 'ridli'):
-        return 'Ridley'
-    if char in ('belmonts', 'belmont'):
-        return 'Simon'
-    if char in ('king k rool', 'k rool', 'kkr', 'king krool', 'k. rool', 'cocodrilo'):
-        return 'King K. Rool'
-    if char in ('canela'):
-        return 'Isabelle'
-    if char in ('pp', 'planta pirana', 'planta', 'plant'):
-        return 'Piranha Plant'
-    if char in ('el bromas', 'bromista', 'arsene', 'persona'):
-        return 'Joker'
-    if char in ('heroe', 'dragon quest', 'dq'):
-        return 'Hero'
-    if char in ('b&k', 'banjo', 'kazooie', 'banjo and kazooie', 'banjo&kazooie'):
-        return 'Banjo & Kazooie'
-    if char in ('minmin', 'min-min', 'ramen', 'noodle'):
-        return 'Min Min'
-    if char in ('minecraft', 'esteban', 'alex', 'zombi', 'zombie', 'enderman', 'ender'):
-        return 'Steve'
-    if char in ('sefirot', 'sefiroth', 'sephirot'):
-        return 'Sephiroth'
-    if char in ('pyra', 'mythra', 'pythra', 'aegis', 'homura', 'hikari', 'homura/hikari'):
-        return 'Pyra/Mythra'
-    if char in ('yakuza', 'mishima', 'tekken'):
-        return 'Kazuya'
+    if char in CHARACTER_INDEX:
+        return CHARACTER_INDEX[char]
+
+    if not fuzzy:
+        return False
+    
+    if char in CHARACTER_PREFIXES:
+        return CHARACTER_PREFIXES[char]
+    
+    close_matches = difflib.get_close_matches(char, CHARACTER_INDEX.keys(), n=1, cutoff=FUZZY_CUTOFF)
+    if close_matches:
+        return CHARACTER_INDEX[close_matches[0]]
     
     return False
 
-def find_role(param, role_list, only_chars = False):
+def find_role(param, role_list, only_chars = False, fuzzy = False):
     """
     Given a param, this method returns the role 
     with an "acceptable" name in that list,
     acceptable meaning lowercase + no accent matching,
-    and for characters some name variations are allowed as well.
+    and for characters some name variations are allowed as well
+    (and with fuzzy, prefixes and small typos, see normalize_character).
     """
     key_param = key_format(param)
-    
-    role_dict = {key_format(role.name): role for role in role_list}
 
     if not only_chars:
-        # DIRECTLY:
-        if key_param in role_dict.keys():
-            return role_dict[key_param]
-
-        # CHECK IF TIER ROLE
-        tier_key = f'tier {key_param}'
-        if tier_key in role_dict.keys():
-            return role_dict[tier_key]
+        # DIRECTLY, OR TIER ROLE
+        role = search_role([key_param, f'tier {key_param}'], role_list)
+        if role:
+            return role
 
     # CHECK IF CHARACTER    
-    if normalized_key := normalize_character(key_param):
-        return role_dict[key_format(normalized_key)]
+    if normalized_key := normalize_character(key_param, fuzzy=fuzzy):
+        return search_role([key_format(normalized_key)], role_list)
+
+    return False
+
+def search_role(keys, role_list):
+    """
+    Returns the role whose name (in key_format) is the first of keys found, or False.
+    Stops at the first key, so role_list is only read once and not completely.
+    """
+    found = {}
+    for role in role_list:
+        role_key = key_format(role.name)
+        if role_key in keys and role_key not in found:
+            found[role_key] = role
+            if role_key == keys[0]:
+                break
 
-    return False    
\ No newline at end of file
+    return next((found[key] for key in keys if key in found), False)
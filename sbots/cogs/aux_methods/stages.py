@@ -0,0 +1,98 @@
+import asyncio
+import logging
+
+from ..params.matchmaking_params import NUMBER_EMOJIS
+
+logger = logging.getLogger('discord')
+
+
+class StageList:
+    """
+    The stages shown in a stage strike, in order. Every stage is picked with the
+    number emoji of its position, so the emoji -> index map is built once.
+    """
+    __slots__ = ('stages', 'emojis', 'indexes')
+
+    def __init__(self, stages):
+        self.stages = tuple(stages[:len(NUMBER_EMOJIS)])
+        self.emojis = NUMBER_EMOJIS[:len(self.stages)]
+        # {emoji: index in stages}
+        self.indexes = {emoji: i for i, emoji in enumerate(self.emojis)}
+
+    def __len__(self):
+        return len(self.stages)
+
+    def index(self, emoji):
+        return self.indexes[emoji]
+
+
+class StageCatalog:
+    """
+    All the stages, and the ones used in the first game of a set (starters).
+    Read-only: a new catalog is built when the stages change.
+    """
+    __slots__ = ('all', 'starters', 'counterpicks')
+
+    def __init__(self, stages):
+        self.all = StageList(stages)
+        self.starters = StageList([stage for stage in stages if stage.get('type', '') == 'STARTER'])
+        self.counterpicks = StageList([stage for stage in stages if stage.get('type', '') == 'COUNTERPICK'])
+
+    def for_game(self, is_first):
+        return self.starters if is_first else self.all
+
+
+class StageCatalogCache:
+    """
+    Keeps the StageCatalog in memory, so the stage strikes don't need to ask the API.
+
+    It's fetched the first time it's needed and kept until it's invalidated
+    (the API sends a stages_changed event when a stage is saved or deleted).
+    Errors are not cached: the next strike tries again.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._catalog = None
+        self._pending = None
+        # Changes on every invalidation, so a fetch that started before is not kept
+        self._version = 0
+
+    async def get(self):
+        """
+        Returns the StageCatalog, or None if the API couldn't be reached.
+        """
+        if self._catalog is not None:
+            return self._catalog
+
+        # Concurrent strikes share the same request
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._fetch())
+            self._pending.add_done_callback(self._fetched)
+
+        return await asyncio.shield(self._pending)
+
+    def _fetched(self, pending):
+        if self._pending is pending:
+            self._pending = None
+
+    async def _fetch(self):
+        version = self._version
+        try:
+            async with self.bot.api.get('/stages/') as response:
+                if response.status != 200:
+                    raise Exception(f"GET /stages/ answered {response.status}")
+                stages = await response.json()
+        except Exception as e:
+            logger.error(f"Error fetching the stages: {e}")
+            return None
+
+        catalog = StageCatalog(stages)
+        if version == self._version:
+            self._catalog = catalog
+        return catalog
+
+    def invalidate(self):
+        self._version += 1
+        self._catalog = None
+        self._pending = None
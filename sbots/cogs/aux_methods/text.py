@@ -1,4 +1,5 @@
 import unicodedata
+from functools import lru_cache
 
 def no_accents(text):
     text = unicodedata.normalize('NFD', text)\
@@ -6,6 +7,8 @@ def no_accents(text):
         .decode("utf-8")
     return str(text)
 
+# Role and character names are formatted again and again
+@lru_cache(maxsize=4096)
 def key_format(text):
     return no_accents(text.lower()) if text else ""
 
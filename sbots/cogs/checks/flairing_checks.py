@@ -15,15 +15,8 @@ async def in_flairing_channel(ctx):
     if isinstance(channel, discord.DMChannel):
         return False
     
-    async with ctx.bot.session.get(f'http://127.0.0.1:8000/guilds/{guild.id}') as response:
-        if response.status == 200:
-            html = await response.text()
-            resp_body = json.loads(html)
-
-            flairing_channel = guild.get_channel(channel_id=resp_body['flairing_channel'])
-            return channel == flairing_channel            
-        else:
-            return False
+    config = await ctx.bot.guild_config.get(guild.id)
+    return config is not None and channel.id == config.flairing_channel
 
 async def in_spam_channel(ctx):
     channel = ctx.channel
@@ -32,21 +25,14 @@ async def in_spam_channel(ctx):
     if isinstance(channel, discord.DMChannel):
         return False
     
-    async with ctx.bot.session.get(f'http://127.0.0.1:8000/guilds/{guild.id}') as response:
-        if response.status == 200:
-            html = await response.text()
-            resp_body = json.loads(html)
-
-            spam_channel = guild.get_channel(channel_id=resp_body['spam_channel'])
-            return channel == spam_channel
-        else:
-            return False
+    config = await ctx.bot.guild_config.get(guild.id)
+    return config is not None and channel.id == config.spam_channel
 
 async def player_exists(ctx):
     player = ctx.author
     guild = ctx.guild
     
-    async with ctx.bot.session.get(f'http://127.0.0.1:8000/players/{player.id}') as response:
+    async with ctx.bot.api.get(f'/players/{player.id}') as response:
         if response.status == 200:
             return True
         else:
@@ -34,12 +34,8 @@ async def in_tier_channel(ctx):
     channel = ctx.channel
     guild = ctx.guild
 
-    async with ctx.bot.session.get(f'http://127.0.0.1:8000/tiers/') as response:
-        if response.status == 200:
-            html = await response.text()
-            resp_body = json.loads(html)
-
-            channel_ids = [tier['channel_id'] for tier in resp_body]            
-            return channel.id in channel_ids
-        else:
-            return False
\ No newline at end of file
+    if isinstance(channel, discord.DMChannel):
+        return False
+
+    config = await ctx.bot.guild_config.get(guild.id)
+    return config is not None and channel.id in config.tier_channel_ids
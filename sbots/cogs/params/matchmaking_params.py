@@ -19,6 +19,9 @@ EMOJI_WHITE_MEDIUM_SMALL_SQUARE = "\U000025fd"
 
 EMOJI_RECYCLE = "\U0000267b"
 
+EMOJI_ARROW_BACKWARD = "\U000025c0" #◀
+EMOJI_ARROW_FORWARD = "\U000025b6" #▶
+
 
 NUMBER_EMOJIS = (
     *[f'{i}\N{variation selector-16}\N{combining enclosing keycap}' for i in range(1, 10)],
@@ -1,5 +1,3 @@
-from ..aux_methods.text import key_format
-
 SPANISH_REGIONS = {
     "Albacete": {'emoji' : r"<:albacete:821185419685003324>", 'color': 0x981932},
     "Alicante": {'emoji' : r"<:alicante:821185419881480192>", 'color': 0x1885D6},
@@ -122,4 +120,49 @@ DEFAULT_TIERS = {
     "Tier 4": {"emoji": "", "color": 0xE91E63, "weight": 1},
 }
 
-NORMALIZED_SMASH_CHARACTERS =  [key_format(character_name) for character_name in SMASH_CHARACTERS.keys()]
\ No newline at end of file
+# Other ways of calling the characters (nicknames, spanish names, typos...)
+CHARACTER_ALIASES = {
+    "Donkey Kong": ("dk", "donkey"),
+    "Dark Samus": ("damus", "upb"),
+    "Captain Falcon": ("capitan falcon", "falcon"),
+    "Ice Climbers": ("icies", "ics", "ic"),
+    "Dr. Mario": ("dr.mario", "doc", "doctor mario", "dr mario"),
+    "Young Link": ("link niño", "yink"),
+    "Ganondorf": ("ganon",),
+    "Mr. Game & Watch": ("gaw", "mr. game and watch", "g&w", "mr gaw", "mr. gaw", "game and watch", "game & watch", "game&watch"),
+    "Meta Knight": ("metaknight", "mk", "metalknight"),
+    "Dark Pit": ("pittoo", "dpit", "pit sombrio"),
+    "Zero Suit Samus": ("zss", "zzs", "samus zero"),
+    "Pokémon Trainer": ("pkmn trainer", "pokemon", "charizard", "ivysaur", "squirtle"),
+    "Diddy Kong": ("diddy", "ddk"),
+    "King Dedede": ("rey dedede", "ddd", "d3", "3d", "dedede"),
+    "Olimar": ("alph",),
+    "R.O.B.": ("rob", "r.o.b", "r.ob", "robot"),
+    "Toon Link": ("atun", "toon", "tink", "tlink"),
+    "Villager": ("aldeano",),
+    "Mega Man": ("megaman", "mega", "mega-man"),
+    "Wii Fit Trainer": ("wft", "wii fit", "entrenadora", "entrenadora de wii fit"),
+    "Rosalina & Luma": ("rosalina and luma", "estela y destello", "rosalina", "estela", "luma", "destello", "estela & destello"),
+    "Little Mac": ("mac", "lmac", "lm"),
+    "Mii Swordfighter": ("mii espadachin", "espadachin", "swordfighter", "mii sword"),
+    "Mii Brawler": ("mii karateka", "karateka", "brawler"),
+    "Pac-Man": ("pacman", "pac man", "pac", "waka"),
+    "Palutena": ("palu", "patulena"),
+    "Robin": ("daraen",),
+    "Bowser Jr.": ("bowser jr", "bjr", "jr", "bowsy", "larry", "ludwig", "lemmy", "iggy", "wendy", "morton", "roy koopa", "koopaling", "koopalings"),
+    "Duck Hunt": ("dhd", "duck hunt duo", "duo duck hunt", "perro", "perropato", "duckhunt", "dick hunt", "ddh", "dog"),
+    "Bayonetta": ("bayonneta", "bayo"),
+    "Ridley": ("rydle", "ridel", "ridli"),
+    "Simon": ("belmonts", "belmont"),
+    "King K. Rool": ("king k rool", "k rool", "kkr", "king krool", "k. rool", "cocodrilo"),
+    "Isabelle": ("canela",),
+    "Piranha Plant": ("pp", "planta pirana", "planta", "plant"),
+    "Joker": ("el bromas", "bromista", "arsene", "persona"),
+    "Hero": ("heroe", "dragon quest", "dq"),
+    "Banjo & Kazooie": ("b&k", "banjo", "kazooie", "banjo and kazooie", "banjo&kazooie"),
+    "Min Min": ("minmin", "min-min", "ramen", "noodle"),
+    "Steve": ("minecraft", "esteban", "alex", "zombi", "zombie", "enderman", "ender"),
+    "Sephiroth": ("sefirot", "sefiroth", "sephirot"),
+    "Pyra/Mythra": ("pyra", "mythra", "pythra", "aegis", "homura", "hikari", "homura/hikari"),
+    "Kazuya": ("yakuza", "mishima", "tekken"),
+}
@@ -2,19 +2,27 @@ import discord
 
 from cogs.params.roles import SMASH_CHARACTERS, SPANISH_REGIONS, DEFAULT_TIERS
 
+def build_role_metadata():
+    """
+    Returns {role name: metadata (emoji, color...)} for all the roles the bot creates.
+    If two tables have the same name, characters go first, then regions, then tiers.
+    """
+    metadata = {}
+    for db in (DEFAULT_TIERS, SPANISH_REGIONS, SMASH_CHARACTERS):
+        metadata.update(db)
+    return metadata
+
+# Built once: emoji() is called for every role shown in a message
+ROLE_METADATA = build_role_metadata()
+ROLE_EMOJIS = {role_name: role.get("emoji", "") for role_name, role in ROLE_METADATA.items()}
+
 def emoji(self):
     """
     Returns the emoji associated to this role (or an empty string)
     if there isn't one.
     """
-    role_name = self.name
-
-    for db in (SMASH_CHARACTERS, SPANISH_REGIONS, DEFAULT_TIERS):
-        if role := db.get(role_name, False):
-            return role.get("emoji", "")
-    
-    return ""
+    return ROLE_EMOJIS.get(self.name, "")
 
 def setup(bot):
     # pass
-    discord.Role.emoji = emoji
\ No newline at end of file
+    discord.Role.emoji = emoji
@@ -5,12 +5,59 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
+
+Serving the API with ASGI:
+
+    API_ASYNC=1 uvicorn sbots_api.asgi:application
+
+Always with a single worker: the matchmaking queue and the role caches live in the memory
+of the process (see smashbotspain/matchmaking.py), so a second worker would serve stale data.
+A second process started from this module fails with ImproperlyConfigured (on hosts without
+fcntl, only WEB_CONCURRENCY is checked).
+
+With API_ASYNC=1 the matchmaking endpoints (see smashbotspain/urls.py) run in a pool of
+API_THREADS threads (16 by default), so the parallel requests of the bot don't queue behind
+each other. By default (API_ASYNC=0) they are served one by one, as Django does with sync views.
+Every thread uses its own database connection, so the API needs up to API_THREADS connections.
+
+Measure an endpoint with:
+
+    python manage.py benchmark_api /guilds/<id>/list_message/ --concurrency 20
 """
 
 import os
+import tempfile
 
 from django.core.asgi import get_asgi_application
+from django.core.exceptions import ImproperlyConfigured
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sbots_api.settings')
 
+
+def lock_single_worker():
+    """
+    Takes an exclusive lock on API_LOCK_FILE, held while the process lives.
+    Raises ImproperlyConfigured if another worker already holds it.
+    Returns None where file locks aren't available (no fcntl): only WEB_CONCURRENCY is checked there.
+    """
+    if int(os.getenv('WEB_CONCURRENCY', 1)) > 1:
+        raise ImproperlyConfigured("The API must run with a single worker (WEB_CONCURRENCY > 1)")
+
+    try:
+        import fcntl
+    except ImportError:
+        return None
+
+    path = os.getenv('API_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'sbots_api.lock'))
+    lock_file = open(path, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise ImproperlyConfigured(f"The API must run with a single worker ({path} is locked by another process)")
+    return lock_file
+
+
+_worker_lock = lock_single_worker()
+
 application = get_asgi_application()
@@ -0,0 +1,51 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Postgres backend for persistent connections (CONN_MAX_AGE), with health checks.
+
+    When CONN_HEALTH_CHECKS is set, a connection kept from a previous request is checked
+    before its first use in the next one, and replaced if it's broken (i.e Postgres was
+    restarted, or closed it for being idle), instead of failing that request.
+    Backport of CONN_HEALTH_CHECKS of Django 4.1.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def connect(self):
+        # A brand new connection doesn't need to be checked (set before connecting:
+        # connect() itself calls ensure_connection() once the connection is open)
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        self.close_if_health_check_failed()
+        super().ensure_connection()
+
+    def close_if_health_check_failed(self):
+        if self.connection is None or not self.health_check_enabled or self.health_check_done:
+            return
+
+        # Never in the middle of a transaction: it'd be lost without notice
+        if self.in_atomic_block:
+            return
+
+        self.health_check_done = True
+        if not self.is_usable():
+            self.close()
+
+    def close_if_unusable_or_obsolete(self):
+        """
+        Called at the start and end of every request. If the connection is kept,
+        it's checked again before being used by the next request.
+        """
+        super().close_if_unusable_or_obsolete()
+        if self.connection is not None:
+            self.health_check_done = False
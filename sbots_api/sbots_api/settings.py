@@ -90,17 +90,41 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST", 'localhost')
 DB_PORT = os.getenv("DB_PORT", '')
 
+# Persistent connections: every worker (every thread of the pool, under ASGI) keeps its connection
+# for DB_CONN_MAX_AGE seconds, instead of opening one per request. 0 closes it after every request.
+# So the pool of connections is API_THREADS (see below) under ASGI, or one with the sync views.
+# The API always runs in a single process (see sbots_api/asgi.py).
+# Reused connections are checked before the first query of every request (DB_HEALTH_CHECKS).
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", 60))
+DB_HEALTH_CHECKS = os.getenv("DB_HEALTH_CHECKS", '1') == '1'
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", 5))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'sbots_api.db',
         'NAME': DB_NAME,
         'USER': DB_USER,
         'PASSWORD': DB_PASSWORD,
         'HOST': DB_HOST,
         'PORT': DB_PORT,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_HEALTH_CHECKS,
+        'OPTIONS': {
+            'connect_timeout': DB_CONNECT_TIMEOUT,
+            # Detect connections dropped by the network while idle
+            'keepalives': 1,
+            'keepalives_idle': 60,
+        },
     }
 }
 
+# Concurrency
+# With API_ASYNC=1 under ASGI (see sbots_api/asgi.py), the matchmaking endpoints run in a pool
+# of API_THREADS threads, instead of one request at a time. Off by default.
+# Every thread holds its own database connection: keep API_THREADS
+# below the max_connections of Postgres.
+API_ASYNC = os.getenv('API_ASYNC', '0') == '1'
+API_THREADS = int(os.getenv('API_THREADS', 16))
 
 now = datetime.datetime.now()
 file_name = f"logs/smashbotspain-{now.strftime('%Y%m%d%H%M')}.log"
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class SmashbotspainConfig(AppConfig):
     name = 'smashbotspain'
+
+    def ready(self):
+        # Keeps the matchmaking queue and the tier ladders in sync with the database,
+        # and notifies the bot of the changes
+        import smashbotspain.signals
@@ -0,0 +1,54 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+# Threads to run the sync views when the API is served by ASGI (see sbots_api/asgi.py)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.API_THREADS, thread_name_prefix='api')
+    return _executor
+
+
+def _run_view(view, request, args, kwargs):
+    """
+    Runs the view in a thread of the pool, as a single request.
+    Every thread has its own database connection: it's checked (and closed if needed)
+    before and after the view, as Django does on request_started and request_finished.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+
+        # DRF responses are rendered lazily: render it here, and not in Django's sync thread
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def threaded_view(view):
+    """
+    Turns a sync view into an async one, running in the thread pool.
+
+    Under ASGI, Django runs every sync view in the same thread, so the requests are served
+    one by one. Async views are awaited instead, so the requests to these views run in parallel
+    (up to API_THREADS at a time).
+    """
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), _run_view, view, request, args, kwargs)
+
+    # Keeps cls, actions, csrf_exempt... of the DRF view
+    return functools.update_wrapper(async_view, view)
@@ -0,0 +1,131 @@
+import json
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger('django')
+
+# The bot listens to this Postgres channel (LISTEN sbots_events)
+EVENTS_CHANNEL = getattr(settings, 'EVENTS_CHANNEL', 'sbots_events')
+
+# {guild pk: guild discord_id}. Guilds are never renumbered, so this never gets stale.
+_guild_discord_ids = {}
+
+
+def guild_discord_id(guild_id):
+    from smashbotspain.models import Guild
+
+    if guild_id not in _guild_discord_ids:
+        discord_id = Guild.objects.filter(id=guild_id).values_list('discord_id', flat=True).first()
+        if discord_id is None:
+            return None
+        _guild_discord_ids[guild_id] = discord_id
+    return _guild_discord_ids[guild_id]
+
+
+def pending_event(key):
+    """
+    Returns the send() of the event with this key already waiting for the commit, or None.
+    Only events of the current savepoint count: they are rolled back along with a new one.
+    """
+    if not connection.in_atomic_block:
+        return None
+
+    savepoint_ids = set(connection.savepoint_ids)
+    for sids, func in connection.run_on_commit:
+        if sids == savepoint_ids and getattr(func, 'event_key', None) == key:
+            return func
+    return None
+
+
+def emit(build_payload, key=None):
+    """
+    Sends an event to the bot (through Postgres NOTIFY) once the current transaction is committed,
+    so the bot never sees changes that are rolled back.
+    build_payload is called at that point, and returns the event as a dict (or None to send nothing).
+
+    Events with the same key are sent once per transaction, built by the last build_payload.
+    """
+    if connection.vendor != 'postgresql':
+        return
+
+    if key is not None:
+        pending = pending_event(key)
+        if pending is not None:
+            pending.build_payload = build_payload
+            return
+
+    def send():
+        try:
+            payload = send.build_payload()
+            if payload is None:
+                return
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [EVENTS_CHANNEL, json.dumps(payload)])
+        except Exception as e:
+            logger.error(f"Error sending event to the bot: {e}")
+
+    send.build_payload = build_payload
+    send.event_key = key
+    transaction.on_commit(send)
+
+
+# ***************************
+#        E V E N T S
+# ***************************
+
+def arena_changed(arena, deleted=False):
+    guild_id = arena.guild_id
+    event = {
+        'type': "arena_deleted" if deleted else "arena_changed",
+        'arena': arena.id,
+        'status': arena.status,
+        'mode': arena.mode,
+    }
+
+    def build_payload():
+        guild = guild_discord_id(guild_id)
+        return dict(event, guild=guild) if guild else None
+    emit(build_payload)
+
+
+def rating_changed(rating, tier_id=None):
+    """
+    Sent once per rating and transaction, however many times it's saved.
+    tier_id is the discord_id of the player's tier, if it's known (it's read from the database if not).
+    """
+    def build_payload():
+        guild = guild_discord_id(rating.guild_id)
+        if guild is None:
+            return None
+        if tier_id is None:
+            tier = rating.player.tier(rating.guild_id)
+            tier_discord_id = tier.discord_id if tier else None
+        else:
+            tier_discord_id = tier_id
+        return {
+            'type': "rating_changed",
+            'guild': guild,
+            'player': rating.player.discord_id,
+            'tier': tier_discord_id,
+        }
+    emit(build_payload, key=('rating_changed', rating.guild_id, rating.player_id))
+
+
+def guild_changed(guild):
+    emit(lambda: {'type': "guild_changed", 'guild': guild.discord_id})
+
+
+def tier_changed(tier):
+    guild_id = tier.guild_id
+
+    def build_payload():
+        guild = guild_discord_id(guild_id)
+        return {'type': "tier_changed", 'guild': guild, 'tier': tier.discord_id} if guild else None
+    emit(build_payload)
+
+
+def stages_changed():
+    # Stages are the same in every guild
+    emit(lambda: {'type': "stages_changed", 'guild': None})
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from smashbotspain.models import GameSet, Rating
+
+
+class Command(BaseCommand):
+    help = "Recomputes the streak of every rating from the history of finished sets"
+
+    def handle(self, *args, **options):
+        # Every (player, guild, winner) of the finished sets, newest first
+        results = GameSet.players.through.objects.filter(gameset__winner__isnull=False)
+        results = results.values_list('player_id', 'gameset__guild_id', 'gameset__winner_id')
+        results = results.order_by('player_id', 'gameset__guild_id', '-gameset__created_at', '-gameset_id')
+
+        streaks = {}
+        finished = set()
+        for player_id, guild_id, winner_id in results.iterator():
+            key = (player_id, guild_id)
+            if key in finished:
+                continue
+
+            streak = streaks.get(key, 0)
+            won = (winner_id == player_id)
+
+            if won and streak >= 0:
+                streaks[key] = streak + 1
+            elif not won and streak <= 0:
+                streaks[key] = streak - 1
+            else:
+                finished.add(key)
+
+        with transaction.atomic():
+            ratings = list(Rating.objects.select_for_update())
+            for rating in ratings:
+                rating.streak = streaks.get((rating.player_id, rating.guild_id), 0)
+            Rating.objects.bulk_update(ratings, ['streak'], batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated the streak of {len(ratings)} ratings."))
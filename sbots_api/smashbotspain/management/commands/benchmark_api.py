@@ -0,0 +1,105 @@
+import asyncio
+import statistics
+import time
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.db.backends.signals import connection_created
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the throughput of a GET endpoint served by the ASGI application (in this process, no server needed). "
+        "Run it with API_ASYNC=0 and API_ASYNC=1 to compare both modes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="i.e /guilds/<id>/list_message/")
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--db-latency', type=float, default=0,
+            help="Milliseconds added to every query, to simulate a database in another host")
+
+    def handle(self, *args, **options):
+        application = get_asgi_application()
+        path = options['path']
+
+        if options['db_latency']:
+            self.add_db_latency(options['db_latency'] / 1000)
+
+        # Warm up (connections, caches)
+        asyncio.run(self.call(application, path))
+
+        elapsed, latencies, statuses = asyncio.run(
+            self.run(application, path, options['requests'], options['concurrency'])
+        )
+
+        mode = f"threaded ({settings.API_THREADS} threads)" if settings.API_ASYNC else "sync"
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        errors = sum(1 for status in statuses if status != 200)
+
+        self.stdout.write(f"Mode: {mode}, concurrency: {options['concurrency']}, db latency: {options['db_latency']}ms")
+        self.stdout.write(f"{len(latencies)} requests in {elapsed:.2f}s: {len(latencies) / elapsed:.1f} req/s")
+        self.stdout.write(f"Latency: median {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms")
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{errors} responses were not 200"))
+
+    def add_db_latency(self, seconds):
+        def latency(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def add_wrapper(sender, connection, **kwargs):
+            # Every thread has its own connection
+            if latency not in connection.execute_wrappers:
+                connection.execute_wrappers.append(latency)
+
+        connection_created.connect(add_wrapper, weak=False)
+
+    async def run(self, application, path, requests, concurrency):
+        latencies = []
+        statuses = []
+        pending = iter(range(requests))
+
+        async def client():
+            for _ in pending:
+                start = time.perf_counter()
+                status = await self.call(application, path)
+                latencies.append(time.perf_counter() - start)
+                statuses.append(status)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+        return time.perf_counter() - start, latencies, statuses
+
+    async def call(self, application, path):
+        """
+        Sends a GET request to the application, and returns the status of the response.
+        """
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost')],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        response = {}
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+
+        await application(scope, receive, send)
+        return response.get('status')
@@ -0,0 +1,311 @@
+import threading
+from bisect import bisect_right, insort
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+
+class SearchingArena:
+    """
+    In-memory snapshot of an arena in SEARCHING status.
+    Only the fields needed for matchmaking are kept.
+    """
+    __slots__ = ('id', 'guild_id', 'mode', 'created_by_id', 'tier_id', 'min_tier_id', 'max_tier_id',
+                'min_weight', 'max_weight', 'rejected')
+
+    def __init__(self, arena, rejected=()):
+        self.id = arena.id
+        self.guild_id = arena.guild_id
+        self.mode = arena.mode
+        self.created_by_id = arena.created_by_id
+        self.tier_id = arena.tier_id
+        self.min_tier_id = arena.min_tier_id
+        self.max_tier_id = arena.max_tier_id
+        self.min_weight = arena.min_tier.weight if arena.min_tier_id else None
+        self.max_weight = arena.max_tier.weight if arena.max_tier_id else None
+        self.rejected = set(rejected)
+
+    def index_key(self):
+        if self.mode == "RANKED":
+            return (self.guild_id, self.mode, self.tier_id)
+        return (self.guild_id, self.mode)
+
+    def index_entry(self):
+        """
+        Friendlies arenas are sorted by min_weight, so that every candidate in a search
+        is found with a bisection. Ranked arenas just keep the arrival order.
+        """
+        if self.mode == "RANKED":
+            return self.id
+        return (self.min_weight, self.id)
+
+
+class MatchmakingQueue:
+    """
+    Process-wide index of the SEARCHING arenas.
+
+    The database is still written first: the queue is kept in sync through the
+    signals in smashbotspain.signals, and it's built from the database the first
+    time it's used after startup (or after a reset).
+
+    Every change is applied once the transaction that made it is committed (transaction.on_commit),
+    so the queue never holds changes that are rolled back, or that other threads can't see yet.
+
+    The arenas are indexed by guild, mode and tier weight range. The rejected players
+    of every searching arena and today's opponents of every player are held in memory too,
+    so a search doesn't need to join anything.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self.reset()
+
+    def reset(self):
+        """
+        Drops everything. The queue will be rebuilt from the database on its next use.
+        """
+        with self._lock:
+            self._built = False
+            self._arenas = {}
+            self._index = defaultdict(list)
+            self._by_creator = {}
+            self._history = {}
+
+    # ****************************
+    #       B  U  I  L  D
+    # ****************************
+
+    def _ensure_built(self):
+        if not self._built:
+            self.rebuild()
+
+    def rebuild(self):
+        """
+        Loads every SEARCHING arena from the database.
+        The lock is held while reading: a transaction committed meanwhile waits to apply its changes
+        until the queue is built, instead of being dropped.
+        """
+        from smashbotspain.models import Arena
+
+        with self._lock:
+            arenas = Arena.objects.filter(status="SEARCHING").select_related('min_tier', 'max_tier')
+            arenas = list(arenas.prefetch_related('rejected_players'))
+
+            self.reset()
+            for arena in arenas:
+                self._add(SearchingArena(arena, [player.id for player in arena.rejected_players.all()]))
+            self._built = True
+
+    # ****************************
+    #       W  R  I  T  E  S
+    # ****************************
+
+    def _add(self, entry):
+        self._arenas[entry.id] = entry
+        insort(self._index[entry.index_key()], entry.index_entry())
+        if entry.created_by_id is not None:
+            self._by_creator[(entry.created_by_id, entry.mode)] = entry.id
+
+    def _remove(self, arena_id):
+        entry = self._arenas.pop(arena_id, None)
+        if entry is None:
+            return None
+
+        bucket = self._index[entry.index_key()]
+        position = bisect_right(bucket, entry.index_entry()) - 1
+        if position >= 0 and bucket[position] == entry.index_entry():
+            del bucket[position]
+
+        if self._by_creator.get((entry.created_by_id, entry.mode)) == entry.id:
+            del self._by_creator[(entry.created_by_id, entry.mode)]
+        return entry
+
+    def arena_saved(self, arena, created=False, rejected=None):
+        """
+        Updates the index after an arena has been saved (once the transaction is committed).
+        The ids of its rejected players can be given, if the caller already has them.
+        """
+        # The arena may change again before the commit: this save is applied as it is now
+        arena_id = arena.id
+        entry = SearchingArena(arena) if arena.status == "SEARCHING" else None
+        if created:
+            rejected = ()
+        transaction.on_commit(lambda: self._arena_saved(arena_id, entry, rejected))
+
+    def _arena_saved(self, arena_id, entry, rejected):
+        from smashbotspain.models import Arena
+
+        with self._lock:
+            if not self._built:
+                return
+
+            old_entry = self._remove(arena_id)
+            if entry is None:
+                return
+
+            if old_entry is not None:
+                rejected = old_entry.rejected
+            elif rejected is None:
+                rejected = Arena.rejected_players.through.objects.filter(arena_id=arena_id).values_list('player_id', flat=True)
+            entry.rejected = set(rejected)
+            self._add(entry)
+
+    def arena_deleted(self, arena_id):
+        transaction.on_commit(lambda: self._arena_deleted(arena_id))
+
+    def _arena_deleted(self, arena_id):
+        with self._lock:
+            self._remove(arena_id)
+
+    def players_rejected(self, arena_id, player_ids, removed=False):
+        """
+        Updates the rejected players of an arena.
+        """
+        player_ids = set(player_ids)
+        transaction.on_commit(lambda: self._players_rejected(arena_id, player_ids, removed))
+
+    def _players_rejected(self, arena_id, player_ids, removed):
+        with self._lock:
+            entry = self._arenas.get(arena_id)
+            if entry is None:
+                return
+            if removed:
+                entry.rejected.difference_update(player_ids)
+            else:
+                entry.rejected.update(player_ids)
+
+    def rejections_cleared(self, arena_id):
+        transaction.on_commit(lambda: self._rejections_cleared(arena_id))
+
+    def _rejections_cleared(self, arena_id):
+        with self._lock:
+            entry = self._arenas.get(arena_id)
+            if entry is not None:
+                entry.rejected.clear()
+
+    def player_rejections_cleared(self, player_id):
+        """
+        The player is not rejected by any arena anymore.
+        """
+        transaction.on_commit(lambda: self._player_rejections_cleared(player_id))
+
+    def _player_rejections_cleared(self, player_id):
+        with self._lock:
+            for entry in self._arenas.values():
+                entry.rejected.discard(player_id)
+
+    def tier_changed(self, tier, deleted=False):
+        """
+        Updates the weights of the arenas between this tier (its weight may have changed).
+        The arenas of a deleted tier are left without it in the database (SET_NULL), so they are dropped.
+        """
+        tier_id, weight = tier.id, tier.weight
+        transaction.on_commit(lambda: self._tier_changed(tier_id, weight, deleted))
+
+    def _tier_changed(self, tier_id, weight, deleted):
+        with self._lock:
+            entries = [entry for entry in self._arenas.values() if tier_id in (entry.min_tier_id, entry.max_tier_id)]
+            for entry in entries:
+                self._remove(entry.id)
+                if deleted:
+                    continue
+
+                if entry.min_tier_id == tier_id:
+                    entry.min_weight = weight
+                if entry.max_tier_id == tier_id:
+                    entry.max_weight = weight
+                self._add(entry)
+
+    def history_changed(self, player_ids=None):
+        """
+        Forgets the head-to-head history of the given players (i.e a set has been created or finished),
+        or of every player if player_ids is None.
+        """
+        if player_ids is not None:
+            player_ids = list(player_ids)
+        transaction.on_commit(lambda: self._history_changed(player_ids))
+
+    def _history_changed(self, player_ids):
+        with self._lock:
+            if player_ids is None:
+                self._history.clear()
+            for player_id in player_ids or ():
+                self._history.pop(player_id, None)
+
+    # ****************************
+    #       S  E  A  R  C  H
+    # ****************************
+
+    def already_matched(self, player):
+        """
+        Returns the ids of the players this player can't play a ranked set against right now.
+        Today's history is cached until a set of this player changes, or the day ends.
+        """
+        from smashbotspain.models import Player
+
+        today = timezone.now().date()
+
+        with self._lock:
+            cached = self._history.get(player.id)
+
+        if cached is None or cached[0] != today:
+            cached = (today, player.get_daily_history())
+            with self._lock:
+                self._history[player.id] = cached
+
+        return {player_id for player_id, history in cached[1].items()
+                    if not Player.rematch_allowed(history, search=True)}
+
+    def _rejected_by(self, player_id, mode):
+        arena_id = self._by_creator.get((player_id, mode))
+        if arena_id is None:
+            return set()
+        return self._arenas[arena_id].rejected
+
+    def search_ranked(self, player, guild, tier, excluded=()):
+        """
+        Returns the ids of the ranked arenas player can join, oldest first.
+        """
+        with self._lock:
+            self._ensure_built()
+
+            excluded = set(excluded) | self._rejected_by(player.id, "RANKED")
+            excluded.add(player.id)
+
+            bucket = self._index.get((guild.id, "RANKED", tier.id), [])
+            return [arena_id for arena_id in bucket if self._arenas[arena_id].created_by_id not in excluded]
+
+    def search(self, player, guild, min_weight, max_weight, excluded=(), invite=False):
+        """
+        Returns the ids of the friendlies arenas player can join, oldest first.
+
+        When inviting, player is the host of an arena, so every arena with at least one
+        tier below max_weight is valid.
+        """
+        with self._lock:
+            self._ensure_built()
+
+            excluded = set(excluded)
+            if not invite:
+                excluded |= self._rejected_by(player.id, "FRIENDLIES")
+                excluded.add(player.id)
+
+            bucket = self._index.get((guild.id, "FRIENDLIES"), [])
+            candidates = bucket[:bisect_right(bucket, (max_weight, float('inf')))]
+
+            arena_ids = []
+            for _, arena_id in candidates:
+                entry = self._arenas[arena_id]
+                if not invite and entry.max_weight < min_weight:
+                    continue
+                if entry.created_by_id in excluded or player.id in entry.rejected:
+                    continue
+                arena_ids.append(arena_id)
+
+            arena_ids.sort()
+            return arena_ids
+
+
+matchmaking_queue = MatchmakingQueue()
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smashbotspain', '0074_rating_promotion_bonus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rating',
+            name='streak',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 3.1.6 on 2026-10-18 10:59
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_ratings(apps, schema_editor):
+    """
+    Keeps the first rating of each player in each guild (the one that was being used).
+    """
+    Rating = apps.get_model('smashbotspain', 'Rating')
+
+    duplicates = Rating.objects.values('player', 'guild').annotate(count=Count('id'), first=Min('id')).filter(count__gt=1)
+    for duplicate in duplicates:
+        Rating.objects.filter(player=duplicate['player'], guild=duplicate['guild']).exclude(id=duplicate['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smashbotspain', '0075_rating_streak'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='arena',
+            index=models.Index(fields=['guild', 'status', 'mode'], name='arena_guild_status_mode'),
+        ),
+        migrations.AddIndex(
+            model_name='arena',
+            index=models.Index(fields=['created_by', 'status', 'mode'], name='arena_creator_status_mode'),
+        ),
+        migrations.AddIndex(
+            model_name='arena',
+            index=models.Index(condition=models.Q(status='SEARCHING'), fields=['guild', 'mode'], name='arena_searching'),
+        ),
+        migrations.AddIndex(
+            model_name='arena',
+            index=models.Index(fields=['channel_id'], name='arena_channel'),
+        ),
+        migrations.AddIndex(
+            model_name='arenaplayer',
+            index=models.Index(fields=['player', 'status'], name='arenaplayer_player_status'),
+        ),
+        migrations.AddIndex(
+            model_name='arenaplayer',
+            index=models.Index(fields=['arena', 'status'], name='arenaplayer_arena_status'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['game_set', 'winner'], name='game_set_winner'),
+        ),
+        migrations.AddIndex(
+            model_name='gameset',
+            index=models.Index(fields=['created_at'], name='gameset_created_at'),
+        ),
+        migrations.AddIndex(
+            model_name='gameset',
+            index=models.Index(fields=['guild', 'created_at'], name='gameset_guild_created_at'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['arena', 'mode'], name='message_arena_mode'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['guild', '-score'], name='rating_guild_score'),
+        ),
+        migrations.AddIndex(
+            model_name='tier',
+            index=models.Index(fields=['guild', 'weight'], name='tier_guild_weight'),
+        ),
+        migrations.RunPython(remove_duplicate_ratings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='rating',
+            constraint=models.UniqueConstraint(fields=('player', 'guild'), name='unique_rating'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.6 on 2026-10-18 11:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_wins(apps, schema_editor):
+    """
+    Fills the score of the existing sets from their games.
+    """
+    GameSet = apps.get_model('smashbotspain', 'GameSet')
+    Game = apps.get_model('smashbotspain', 'Game')
+
+    game_sets = {}
+    games = Game.objects.filter(game_set__isnull=False, winner__isnull=False).order_by('game_set', 'number')
+    for game_set_id, winner_id in games.values_list('game_set', 'winner').iterator():
+        game_set = game_sets.setdefault(game_set_id, GameSet(id=game_set_id, wins={}))
+        game_set.wins[str(winner_id)] = game_set.wins.get(str(winner_id), 0) + 1
+        game_set.last_winner_id = winner_id
+
+    GameSet.objects.bulk_update(game_sets.values(), ['wins', 'last_winner'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smashbotspain', '0076_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameset',
+            name='last_winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='smashbotspain.player'),
+        ),
+        migrations.AddField(
+            model_name='gameset',
+            name='wins',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(count_wins, migrations.RunPython.noop),
+    ]
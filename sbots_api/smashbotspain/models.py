@@ -1,9 +1,16 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Q
 from django.contrib.postgres.fields import ArrayField
 from django.core import validators
 from django.utils import timezone
 from functools import total_ordering
 from collections import defaultdict
+from datetime import timedelta
+
+from smashbotspain import events
+from smashbotspain.matchmaking import matchmaking_queue
+from smashbotspain.role_lists import role_lists
+from smashbotspain.tiers import tier_ladders
 
 
 # Create your models here.
@@ -41,6 +48,41 @@ class Guild(models.Model):
     class Meta:
         unique_together = ['discord_id']
 
+    def import_roles(self, model, roles):
+        """
+        Creates the roles (Region, Character or Tier) of this guild that don't exist yet, and updates the others,
+        in one transaction and with a fixed number of queries.
+        roles is a dict {discord_id: {field: value}}. Returns the number of roles created and updated.
+
+        bulk_create and bulk_update don't send post_save, so the caches of the guild are dropped here.
+        """
+        with transaction.atomic():
+            existing = list(model.objects.select_for_update().filter(guild=self, discord_id__in=roles.keys()))
+            existing_ids = {role.discord_id for role in existing}
+            
+            new_roles = [model(guild=self, discord_id=discord_id, **fields)
+                            for discord_id, fields in roles.items() if discord_id not in existing_ids]
+            model.objects.bulk_create(new_roles)
+
+            update_fields = set()
+            for role in existing:
+                for field, value in roles[role.discord_id].items():
+                    setattr(role, field, value)
+                    update_fields.add(field)
+            if update_fields:
+                model.objects.bulk_update(existing, update_fields)
+
+        role_lists.invalidate(self.id)
+        if model is Tier:
+            for tier in existing:
+                matchmaking_queue.tier_changed(tier)
+            tier_ladders.invalidate(self.id)
+            # The bot reloads all the tiers of the guild on any tier_changed
+            if new_roles or existing:
+                events.tier_changed((new_roles or existing)[0])
+
+        return len(new_roles), len(existing)
+
 class Region(models.Model):
     discord_id = models.BigIntegerField()
     guild = models.ForeignKey(Guild, null=True, on_delete=models.CASCADE)
@@ -73,6 +115,11 @@ class Tier(models.Model):
     threshold = models.IntegerField(default=1200)
     leaderboard_message = models.BigIntegerField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['guild', 'weight'], name='tier_guild_weight'),
+        ]
+
     def __str__(self):
         return f"Tier {self.discord_id} (Weight: {self.weight})"
     
@@ -95,14 +142,14 @@ class Tier(models.Model):
         Returns the next tier in this guild (i.e if self is Tier 3, return Tier 2)
         Returns None if there isn't one.
         """
-        return Tier.objects.filter(guild=self.guild, weight= self.weight + 1).first()
+        return tier_ladders.get(self.guild_id).next(self)
     
     def previous(self, guild):
         """
         Returns the previous tier in this guild (i.e if self is Tier 3, return Tier 4)
         Returns None if there isn't one.
         """
-        return Tier.objects.filter(guild=self.guild, weight= self.weight - 1).first()
+        return tier_ladders.get(self.guild_id).previous(self)
 
 
 class Player(models.Model):
@@ -149,13 +196,23 @@ class Player(models.Model):
         """
         Returns the status of the player
         """
-        for status in ArenaPlayer.CANT_JOIN_STATUS:
-            if ArenaPlayer.objects.filter(player=self, status=status):
-                return status        
-        for status in ArenaPlayer.CAN_JOIN_STATUS:
-            if ArenaPlayer.objects.filter(player=self, status=status):
-                return status
-        return False
+        statuses = ArenaPlayer.objects.filter(player=self).values_list('status', flat=True).distinct()
+        return ArenaPlayer.priority_status(statuses)
+
+    @staticmethod
+    def bulk_status(players):
+        """
+        Returns a dict with the status of each of the given players, keyed by their id.
+        All of them are resolved with a single query.
+        """
+        player_ids = [player.id for player in players]
+        player_statuses = defaultdict(set)
+
+        arena_players = ArenaPlayer.objects.filter(player__in=player_ids).values_list('player', 'status').distinct()
+        for player_id, status in arena_players:
+            player_statuses[player_id].add(status)
+
+        return {player_id: ArenaPlayer.priority_status(player_statuses[player_id]) for player_id in player_ids}
 
     def search_ranked(self, guild, tier):
         """
@@ -163,135 +220,139 @@ class Player(models.Model):
 
         TODO: Add MMR constraints
         """
-        arenas = Arena.objects.filter(guild=guild)
-        arenas = arenas.filter(status="SEARCHING")
-        arenas = arenas.filter(mode="RANKED")
-        arenas = arenas.filter(tier=tier)
-        arenas = arenas.exclude(created_by=self)
+        already_matched = matchmaking_queue.already_matched(self)
+        arena_ids = matchmaking_queue.search_ranked(player=self, guild=guild, tier=tier, excluded=already_matched)
 
-        # CHECK REJECTED
-        my_arena = Arena.objects.filter(created_by=self, status="SEARCHING", mode="RANKED").first()
-        if my_arena is not None:
-            arenas = arenas.exclude(created_by__in=my_arena.rejected_players.all())
+        return Arena.objects.filter(id__in=arena_ids, status="SEARCHING").order_by('id')
 
-        # FILTER REMATCH
-        arenas = arenas.exclude(created_by__in=self.get_already_matched().all())
-        
-        return arenas
+    def search(self, min_tier, max_tier, guild, invite=False):
+        """
+        Search compatible friendlies arenas. If invite is True, self is the host of
+        an arena looking for players to invite.
+        """
+        excluded = ()
+        if invite:
+            my_arena = Arena.objects.filter(created_by=self, status="PLAYING").first()
+            if my_arena is not None:
+                excluded = my_arena.rejected_players.values_list('id', flat=True)
 
-    def search(self, min_tier, max_tier, guild, invite=False):        
-        arenas = Arena.objects.filter(guild=guild)        
-        arenas = arenas.filter(status="SEARCHING")        
-        arenas = arenas.filter(mode = "FRIENDLIES")        
-        arenas = arenas.filter(min_tier__weight__lte = max_tier.weight)        
+        arena_ids = matchmaking_queue.search(player=self, guild=guild, min_weight=min_tier.weight,
+                        max_weight=max_tier.weight, excluded=excluded, invite=invite)
 
-        if not invite:
-            arenas = arenas.filter(max_tier__weight__gte = min_tier.weight)
-            arenas = arenas.exclude(created_by=self)
-        
-        arenas = arenas.exclude(rejected_players=self)
-        my_status = "PLAYING" if invite else "SEARCHING"
-        my_arena = Arena.objects.filter(created_by=self, status=my_status).first()
-        if my_arena is not None:
-            arenas = arenas.exclude(created_by__in=my_arena.rejected_players.all())
-        
-        return arenas
+        return Arena.objects.filter(id__in=arena_ids, status="SEARCHING").order_by('id')
     
     def confirmation(self, confirmation_arena):
         """
         A match has been found in <<confirmation_arena>>.
         Sets all other arenas of the player in waiting, and declines current invitations.
         """
-        my_other_arenas = Arena.objects.filter(created_by=self).exclude(id=confirmation_arena.id).all()
-
-        for arena in my_other_arenas:
-            arena.set_status(status="WAITING")
+        my_other_arenas = Arena.objects.filter(created_by=self).exclude(id=confirmation_arena.id)
+        Arena.bulk_set_status(my_other_arenas, "WAITING")
 
         # REMOVE INVITATIONS
-        for ap in ArenaPlayer.objects.filter(player=self, status="INVITED").all():
-            ap.delete()
+        ArenaPlayer.objects.filter(player=self, status="INVITED").delete()
 
     def get_game_set(self):
         """
-        Returns the current game set this player is playing
+        Returns the current game set this player is playing: the set of the ranked arena the player is playing in.
+        One query, through the indexes of ArenaPlayer (player, status) and GameSet.arena.
         """
-        arena_player = ArenaPlayer.objects.filter(player=self, status="PLAYING").first()
+        game_set = GameSet.objects.filter(
+            arena__mode="RANKED",
+            arena__arenaplayer__player=self,
+            arena__arenaplayer__status="PLAYING"
+        ).select_related('arena').first()
 
-        if not arena_player:
-            return False
-        
-        arena = arena_player.arena
-        
-        if arena.mode != "RANKED":
-            return False
-        
-        game_set = arena.gameset_set.first()
-
-        return game_set
+        return game_set or False
 
 
     def get_game(self):
         """
-        Returns the current game this player is playing.
+        Returns the current game this player is playing (the game with no winner of the current set),
+        with its set and arena. One query, like get_game_set.
         """
-        game_set = self.get_game_set()
-        # Get current game
-        game = Game.objects.filter(game_set=game_set, winner=None).first()
+        game = Game.objects.filter(
+            winner=None,
+            game_set__arena__mode="RANKED",
+            game_set__arena__arenaplayer__player=self,
+            game_set__arena__arenaplayer__status="PLAYING"
+        ).select_related('game_set__arena', 'guild').first()
         
         return game
     
-    def can_rematch(self, player, search = False):
+    def get_daily_history(self, opponent=None):
         """
-        Check if can rematch the other player in a ranked game
+        Returns a dict with today's head-to-head history against every opponent, keyed by their id.
+        Each value has the number of sets played, the wins and losses of this player,
+        the number of unfinished sets and when the last set finished.
 
-        If this method is called while searching, there's a limit of 3h between sets.
-        """        
-        today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)        
+        If opponent is given, only that opponent is fetched.
+        """
+        today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        my_sets = GameSet.objects.filter(players=self, created_at__gte=today)
+
+        versus = GameSet.players.through.objects.filter(gameset__in=my_sets).exclude(player=self)
+        if opponent is not None:
+            versus = versus.filter(player=opponent)
+
+        versus = versus.values('player').annotate(
+            sets=Count('gameset'),
+            wins=Count('gameset', filter=Q(gameset__winner=self)),
+            losses=Count('gameset', filter=Q(gameset__winner=F('player'))),
+            unfinished=Count('gameset', filter=Q(gameset__finished_at__isnull=True)),
+            last_finished_at=Max('gameset__finished_at')
+        )
+
+        return {row.pop('player'): row for row in versus}
+
+    @staticmethod
+    def rematch_allowed(history, search = False):
+        """
+        Given the head-to-head history of today (see get_daily_history), checks if the rematch is allowed:
+            - No more than 3 sets a day
+            - The third set is only allowed if it's 1-1
+            - If searching, there must be at least 1 hour since the last set
+        """
+        if not history:
+            return True
 
-        versus_sets = GameSet.objects.filter(players=player, created_at__gte=today).filter(players=self).order_by('-finished_at')
-        
         # Played three times or more
-        times_played = versus_sets.count()        
+        times_played = history['sets']
         if times_played > 2:
             return False
         # Played twice, allow only if 1-1
-        elif times_played == 2:
-            is_even = versus_sets.first().winner != versus_sets.last().winner
+        elif times_played == 2 and not (history['wins'] == 1 and history['losses'] == 1):
+            return False
 
-            if not is_even:
-                return False            
-        
-        game_set = versus_sets.first()
-        
-        # Haven't played or actual rematch
-        if not game_set or not search:
+        # Actual rematch
+        if not search:
             return True
 
         # Check if played in last hour
-        last_played_at = game_set.finished_at
-        if not last_played_at:
+        last_played_at = history['last_finished_at']
+        if history['unfinished'] or not last_played_at:
             return False
-        
-        time_delta = timezone.now() - last_played_at
-        hours_difference = time_delta.seconds // 3600
-        
-        played_in_last_hour =  hours_difference < 1
 
-        return not played_in_last_hour
+        return timezone.now() - last_played_at >= timedelta(hours=1)
+
+    def can_rematch(self, player, search = False):
+        """
+        Check if can rematch the other player in a ranked game
+
+        If this method is called while searching, there's a limit of 1h between sets.
+        """
+        history = self.get_daily_history(opponent=player).get(player.id)
+        return Player.rematch_allowed(history, search=search)
     
     def get_already_matched(self):
         """
-        Returns a queryset with all the players this user has played already today
+        Returns a set with the ids of the players this user has played already today,
+        and can't play again yet.
         """
-        today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        my_sets = GameSet.objects.filter(players=self, created_at__gte=today)
+        daily_history = self.get_daily_history()
 
-        players = Player.objects.exclude(discord_id=self.discord_id).filter(gameset__in=my_sets)
-
-        can_rematch_ids = [player.id for player in players.all() if self.can_rematch(player, search=True)]
-
-        players = players.exclude(id__in=can_rematch_ids)
-        return players
+        return {player_id for player_id, history in daily_history.items()
+                    if not Player.rematch_allowed(history, search=True)}
 
     def get_rating(self, guild):
         """
@@ -304,25 +365,12 @@ class Player(models.Model):
         Given a guild, returns how many sets in a row he has won/lost. The number will be positive if it's wins,
         negative if it's losses.
         If capped is True, this will limit the results to the last 4 sets
-        """        
-        last_sets = GameSet.objects.filter(guild=guild, players=self).order_by('-created_at')
-
-        if capped:
-            last_sets = last_sets[:4]
-
-        streak = 0
-        
-        for game_set in last_sets:
-            if game_set.winner is None:
-                continue
-            elif game_set.winner == self and streak >= 0:
-                streak += 1
-            elif game_set.winner != self and streak <= 0:
-                streak -= 1
-            else:
-                break
+        """
+        rating = self.get_rating(guild)
+        if rating is None:
+            return 0
         
-        return streak
+        return rating.capped_streak() if capped else rating.streak
 
 class Rating(models.Model):
     player = models.ForeignKey(Player, on_delete=models.CASCADE)
@@ -333,9 +381,35 @@ class Rating(models.Model):
     promotion_losses = models.IntegerField(null=True, blank=True)
     promotion_bonus = models.IntegerField(default=0)
 
+    # Sets won (positive) or lost (negative) in a row in this guild
+    streak = models.IntegerField(default=0)
+
+    # Only the last sets of the streak count towards the score
+    STREAK_CAP = 4
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'guild'], name='unique_rating'),
+        ]
+        indexes = [
+            # Leaderboards
+            models.Index(fields=['guild', '-score'], name='rating_guild_score'),
+        ]
 
     def __str__(self):
         return f"{self.player.discord_id} rating: {self.score}"
+
+    def update_streak(self, won):
+        """
+        Adds a set result to the streak. Doesn't save the rating.
+        """
+        if won:
+            self.streak = self.streak + 1 if self.streak >= 0 else 1
+        else:
+            self.streak = self.streak - 1 if self.streak <= 0 else -1
+
+    def capped_streak(self):
+        return max(-self.STREAK_CAP, min(self.streak, self.STREAK_CAP))
     
     def get_probability(self, other_rating):
         """
@@ -357,7 +431,7 @@ class Rating(models.Model):
         # Not in promotion
         if self.promotion_wins is None:
             if next_tier:
-                self.score = int(self.score + 20 + 5 * self.player.get_streak(self.guild))
+                self.score = int(self.score + 20 + 5 * self.capped_streak())
             else:
                 # Tier 1 uses ELO
                 prob_win = self.get_probability(other_rating=other_rating)
@@ -412,7 +486,7 @@ class Rating(models.Model):
         if self.promotion_losses is None:
             # Score update
             if next_tier:
-                new_score = int(self.score - 15 + 5 * self.player.get_streak(self.guild))
+                new_score = int(self.score - 15 + 5 * self.capped_streak())
             else:
                 # Tier 1 uses ELO
                 prob_win = self.get_probability(other_rating)
@@ -514,6 +588,15 @@ class Arena(models.Model):
     players = models.ManyToManyField(Player, through="ArenaPlayer", blank=True)
     rejected_players = models.ManyToManyField(Player, blank=True, related_name="rejected_players")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['guild', 'status', 'mode'], name='arena_guild_status_mode'),
+            models.Index(fields=['created_by', 'status', 'mode'], name='arena_creator_status_mode'),
+            # Only a few arenas are searching at a time: the matchmaking queue is built from them
+            models.Index(fields=['guild', 'mode'], name='arena_searching', condition=Q(status="SEARCHING")),
+            models.Index(fields=['channel_id'], name='arena_channel'),
+        ]
+
     def __str__(self):
         return f"Arena #{self.id}"
 
@@ -529,10 +612,7 @@ class Arena(models.Model):
         """
         Returns the iterable with all the tiers between min_tier and max_tier
         """
-        tiers = Tier.objects.filter(weight__gte=self.min_tier.weight)
-        tiers = tiers.filter(weight__lte=self.max_tier.weight)
-
-        return tiers.all()
+        return tier_ladders.get(self.guild_id).between(self.min_tier, self.max_tier)
 
     def get_players(self):
         """
@@ -567,23 +647,50 @@ class Arena(models.Model):
         
 
 
+    @staticmethod
+    def players_status(status):
+        """
+        Status of the ArenaPlayers of an arena in the given status
+        """
+        return "WAITING" if status == "SEARCHING" else status
+
     def set_status(self, status):
         """
         Sets the status of the arena, and all its ArenaPlayers
         """
         self.status = status
         self.save()
+        self.arenaplayer_set.update(status=self.players_status(status))
+        return status
 
-        players_status = status
-        arena_players = self.arenaplayer_set.all()        
-        
+    @classmethod
+    def bulk_set_status(cls, arenas, status):
+        """
+        Sets the status of every arena in the queryset, and all their ArenaPlayers,
+        with a fixed number of queries. Returns the list of updated arenas.
+
+        The arenas aren't saved one by one (no post_save), so the matchmaking queue
+        and the bot are notified here.
+        """
+        arenas = list(arenas.select_related('created_by', 'min_tier', 'max_tier'))
+        if not arenas:
+            return arenas
+
+        arena_ids = [arena.id for arena in arenas]
+        cls.objects.filter(id__in=arena_ids).update(status=status)
+        ArenaPlayer.objects.filter(arena__in=arena_ids).update(status=cls.players_status(status))
+
+        rejected = defaultdict(list)
         if status == "SEARCHING":
-            players_status = "WAITING"        
-        
-        for player in self.arenaplayer_set.all():
-            player.status = players_status
-            player.save()
-        return status
+            rejections = cls.rejected_players.through.objects.filter(arena__in=arena_ids).values_list('arena', 'player')
+            for arena_id, player_id in rejections:
+                rejected[arena_id].append(player_id)
+
+        for arena in arenas:
+            arena.status = status
+            matchmaking_queue.arena_saved(arena, rejected=rejected[arena.id])
+            events.arena_changed(arena)
+        return arenas
 
 class ArenaPlayer(models.Model):
     arena = models.ForeignKey(Arena, on_delete=models.CASCADE, null=True, blank=True)
@@ -601,9 +708,25 @@ class ArenaPlayer(models.Model):
     
     CANT_JOIN_STATUS = ["CONFIRMATION", "ACCEPTED", "PLAYING"]
     CAN_JOIN_STATUS = ["INVITED", "WAITING", "GGS"]
+    STATUS_PRIORITY = CANT_JOIN_STATUS + CAN_JOIN_STATUS
     
     status = models.CharField(max_length=12, choices=STATUS)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['player', 'status'], name='arenaplayer_player_status'),
+            models.Index(fields=['arena', 'status'], name='arenaplayer_arena_status'),
+        ]
+
+    @classmethod
+    def priority_status(cls, statuses):
+        """
+        Given all the statuses of a player, returns the one that defines them
+        (the CANT_JOIN ones go first). False if there are none.
+        """
+        statuses = set(statuses)
+        return next((status for status in cls.STATUS_PRIORITY if status in statuses), False)
+
     def set_status(self, status):
         self.status = status
         self.save()
@@ -625,10 +748,32 @@ class GameSet(models.Model):
         ("FT10", "FT10"),
     ]
     
+    # Games needed to win the set
+    FIRST_TO = {
+        "BO3": 2,
+        "BO5": 3,
+        "FT5": 5,
+        "FT10": 10,
+    }
+    
     win_condition = models.CharField(max_length=40, choices=WIN_CONDITIONS)
     winner = models.ForeignKey(Player, null=True, on_delete=models.SET_NULL, related_name="winner_set", blank=True)
     arena = models.ForeignKey(Arena, null=True, on_delete=models.SET_NULL)
 
+    # Score: games won by each player ({player id: wins}), and the winner of the last game
+    wins = models.JSONField(default=dict)
+    last_winner = models.ForeignKey(Player, null=True, on_delete=models.SET_NULL, related_name="+", blank=True)
+    
+    # Fields that only change the score of the set
+    SCORE_FIELDS = {'wins', 'last_winner'}
+
+    class Meta:
+        indexes = [
+            # Sets of the day
+            models.Index(fields=['created_at'], name='gameset_created_at'),
+            models.Index(fields=['guild', 'created_at'], name='gameset_guild_created_at'),
+        ]
+
     def add_game(self):
 
         game_number = Game.objects.filter(game_set=self).count()
@@ -642,32 +787,43 @@ class GameSet(models.Model):
     
         return game
     
+    def wins_of(self, player):
+        """
+        Games won by the player in this set
+        """
+        return self.wins.get(str(player.id), 0)
+    
+    def total_wins(self):
+        """
+        Games with a winner in this set
+        """
+        return sum(self.wins.values())
+
+    def win_game(self, game, player):
+        """
+        Sets the winner of the game, and adds it to the score.
+        The set should be locked (select_for_update) by the caller.
+        """
+        game.set_winner(player)
+        
+        self.wins[str(player.id)] = self.wins_of(player) + 1
+        self.last_winner = player
+        self.save(update_fields=['wins', 'last_winner'])
+
     def set_winner(self):
         """
         Checks if there's already a winner. If there is, it is set, and True is returned.
         
         Returns True if there's a winner, False if no winner is set.
         """
-        first_to = None
-        games = self.game_set.all()
-        
-        # SET NUM OF WINS
-        if self.win_condition == "BO3":
-            first_to = 2
-        elif self.win_condition == "BO5":
-            first_to = 3
-        elif self.win_condition == "FT5":
-            first_to = 5
-        elif self.win_condition == "FT10":
-            first_to = 10
-        else:
+        first_to = self.FIRST_TO.get(self.win_condition)
+        if first_to is None:
             return None
         
         # SET WINNER:
-        for player in self.players.all():
-            win_count = self.game_set.filter(winner=player).count()
+        for player_id, win_count in self.wins.items():
             if win_count >= first_to:
-                self.winner = player
+                self.winner_id = int(player_id)
                 self.save()
                 return True
         return False
@@ -676,9 +832,11 @@ class GameSet(models.Model):
         self.finished_at = timezone.now()        
         self.save()
 
-    def update_ratings(self):
+    def update_ratings(self, update_streaks=True):
         """
-        Updates the ELO of both players
+        Updates the ELO of both players.
+        The streaks are only updated if update_streaks: a set that already counted for them
+        (i.e. an admin corrects its winner) must not count twice.
         """
         # Get winner and loser
         winner = self.winner
@@ -692,9 +850,20 @@ class GameSet(models.Model):
             return False
         loser_rating = loser.get_rating(guild=self.guild)
 
-        # Update scores, promotions, etc.
-        winner_info = winner_rating.win(other_rating=loser_rating)
-        loser_info = loser_rating.lose(other_rating=winner_rating)
+        # A single transaction: the bot gets one rating_changed per player
+        with transaction.atomic():
+            # Update streaks (saved along with the scores)
+            if update_streaks:
+                winner_rating.update_streak(won=True)
+                loser_rating.update_streak(won=False)
+
+            # Update scores, promotions, etc.
+            winner_info = winner_rating.win(other_rating=loser_rating)
+            loser_info = loser_rating.lose(other_rating=winner_rating)
+
+            # The tiers are already known
+            events.rating_changed(winner_rating, tier_id=winner_info['tier']['new_id'])
+            events.rating_changed(loser_rating, tier_id=loser_info['tier']['new_id'])
 
         return winner_info, loser_info
 
@@ -721,6 +890,11 @@ class Game(models.Model):
     
     winner = models.ForeignKey(Player, null=True, on_delete=models.SET_NULL, related_name="winner_game")    
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game_set', 'winner'], name='game_set_winner'),
+        ]
+
     def set_winner(self, player):
         """
         Sets the winner of this game
@@ -748,3 +922,8 @@ class Message(models.Model):
     channel_id = models.BigIntegerField(null=True)
     arena = models.ForeignKey(Arena, on_delete=models.CASCADE)
     mode = models.CharField(max_length=10, choices=MODE, default="FRIENDLIES")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['arena', 'mode'], name='message_arena_mode'),
+        ]
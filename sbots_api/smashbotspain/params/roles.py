@@ -1,5 +1,3 @@
-from ..aux_methods.text import key_format
-
 SPANISH_REGIONS = [
     {'name': "Albacete", 'emoji' : r"<:albacete:821185419685003324>"},
     {'name': "Alicante", 'emoji' : r"<:alicante:821185419881480192>"},
@@ -108,5 +106,3 @@ SMASH_CHARACTERS = [
     {"name" : "Sephiroth","emoji" : r"<:sephiroth:821160190132224010>"},
     {"name" : "Pyra/Mythra","emoji" : r"<:pyra:821160189813850212>"},
 ]
-
-NORMALIZED_SMASH_CHARACTERS =  [key_format(character['name']) for character in SMASH_CHARACTERS]
\ No newline at end of file
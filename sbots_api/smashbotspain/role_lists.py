@@ -0,0 +1,105 @@
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+# Types of role lists (GET /players/roles/)
+CHARACTER_STATUS = ("MAIN", "SECOND", "POCKET")
+ROLE_TYPES = ("tiers", "regions") + CHARACTER_STATUS
+
+
+def build_role_list(guild_id, role_type):
+    """
+    Returns a list with all the roles of the chosen type in the guild, and the discord ids
+    of the players that have them: [{'id': role discord_id, 'players': [player discord_id, ...]}]
+
+    Tiers are sorted by weight (highest first), the other roles by number of players.
+    Two queries: the roles, and all the (role, player) pairs grouped in Python.
+    """
+    from smashbotspain.models import Character, Main, Player, Region, Tier
+
+    if role_type == "tiers":
+        roles = Tier.objects.filter(guild_id=guild_id).order_by('-weight')
+        pairs = Player.tiers.through.objects.filter(tier__guild_id=guild_id).values_list('tier_id', 'player__discord_id')
+    elif role_type == "regions":
+        roles = Region.objects.filter(guild_id=guild_id)
+        pairs = Player.regions.through.objects.filter(region__guild_id=guild_id).values_list('region_id', 'player__discord_id')
+    elif role_type in CHARACTER_STATUS:
+        roles = Character.objects.filter(guild_id=guild_id)
+        pairs = Main.objects.filter(character__guild_id=guild_id, status=role_type).values_list('character_id', 'player__discord_id')
+    else:
+        return None
+
+    players = defaultdict(list)
+    for role_id, player_id in pairs:
+        players[role_id].append(player_id)
+
+    role_list = [{'id': role.discord_id, 'players': players[role.id]} for role in roles.only('id', 'discord_id')]
+
+    if role_type != "tiers":
+        role_list.sort(key=lambda role: len(role['players']), reverse=True)
+
+    return role_list
+
+
+class RoleListCache:
+    """
+    Process-wide cache with the role lists of every guild, by role type.
+    Lists are built when first needed, and dropped when a change to a role or a player's role
+    of their guild is committed (see smashbotspain.signals).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lists = {}
+        # Changes on every invalidation, so a list built before is not kept
+        self._generation = 0
+
+    def get(self, guild, role_type):
+        """
+        Returns the role list (see build_role_list), or None if role_type is not valid.
+        Accepts both a Guild and its id.
+        """
+        guild_id = getattr(guild, 'id', guild)
+        key = (guild_id, role_type)
+
+        with self._lock:
+            role_list = self._lists.get(key)
+            generation = self._generation
+
+        if role_list is None:
+            role_list = build_role_list(guild_id, role_type)
+            if role_list is None:
+                return None
+            with self._lock:
+                if generation == self._generation:
+                    self._lists[key] = role_list
+
+        return role_list
+
+    def invalidate(self, guild_id=None, role_types=ROLE_TYPES):
+        """
+        Drops the lists of the given types in the guild, or in every guild if guild_id is None,
+        once the current transaction is committed.
+        """
+        role_types = tuple(role_types)
+        transaction.on_commit(lambda: self._invalidate(guild_id, role_types))
+
+    def reset(self):
+        """
+        Drops every list right away.
+        """
+        self._invalidate(None, ROLE_TYPES)
+
+    def _invalidate(self, guild_id, role_types):
+        with self._lock:
+            self._generation += 1
+            if guild_id is None:
+                for key in [key for key in self._lists if key[1] in role_types]:
+                    del self._lists[key]
+            else:
+                for role_type in role_types:
+                    self._lists.pop((guild_id, role_type), None)
+
+
+role_lists = RoleListCache()
@@ -77,6 +77,7 @@ class GameSetSerializer(serializers.ModelSerializer):
     class Meta:
         model = GameSet
         fields = '__all__'
+        read_only_fields = ['wins', 'last_winner']
 
 class GameSerializer(serializers.ModelSerializer):
     players = serializers.PrimaryKeyRelatedField(queryset=Player.objects.all(), many=True)
@@ -0,0 +1,139 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from smashbotspain import events
+from smashbotspain.models import Arena, Character, GameSet, Guild, Main, Player, Rating, Region, Stage, Tier
+from smashbotspain.matchmaking import matchmaking_queue
+from smashbotspain.role_lists import role_lists, CHARACTER_STATUS
+from smashbotspain.tiers import tier_ladders
+
+
+# ***************************************
+#    M A T C H M A K I N G   Q U E U E
+# ***************************************
+
+@receiver(post_save, sender=Arena)
+def arena_saved(sender, instance, created, **kwargs):
+    matchmaking_queue.arena_saved(instance, created=created)
+    events.arena_changed(instance)
+
+@receiver(post_delete, sender=Arena)
+def arena_deleted(sender, instance, **kwargs):
+    matchmaking_queue.arena_deleted(instance.id)
+    events.arena_changed(instance, deleted=True)
+
+@receiver(m2m_changed, sender=Arena.rejected_players.through)
+def rejected_players_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_clear":
+        if not reverse:
+            matchmaking_queue.rejections_cleared(instance.id)
+        else:
+            matchmaking_queue.player_rejections_cleared(instance.id)
+        return
+    
+    if action not in ("post_add", "post_remove"):
+        return
+    
+    removed = action == "post_remove"
+    if not reverse:
+        matchmaking_queue.players_rejected(instance.id, pk_set, removed=removed)
+    else:
+        for arena_id in pk_set:
+            matchmaking_queue.players_rejected(arena_id, {instance.id}, removed=removed)
+
+@receiver(post_save, sender=GameSet)
+def game_set_saved(sender, instance, created, update_fields, **kwargs):
+    # The score of a set doesn't change the history
+    if update_fields and update_fields <= GameSet.SCORE_FIELDS:
+        return
+
+    if not created:
+        matchmaking_queue.history_changed(instance.players.values_list('id', flat=True))
+
+@receiver(pre_delete, sender=GameSet)
+def game_set_deleted(sender, instance, **kwargs):
+    matchmaking_queue.history_changed(instance.players.values_list('id', flat=True))
+
+@receiver(m2m_changed, sender=GameSet.players.through)
+def game_set_players_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    
+    if reverse:
+        matchmaking_queue.history_changed([instance.id])
+    elif pk_set:
+        matchmaking_queue.history_changed(pk_set)
+    else:
+        matchmaking_queue.history_changed()
+
+
+# ***************************************
+#        T I E R   L A D D E R S
+# ***************************************
+
+@receiver(post_save, sender=Tier)
+@receiver(post_delete, sender=Tier)
+def tier_changed(sender, instance, signal, **kwargs):
+    matchmaking_queue.tier_changed(instance, deleted=signal is post_delete)
+    tier_ladders.invalidate(instance.guild_id)
+    role_lists.invalidate(instance.guild_id, ["tiers"])
+    events.tier_changed(instance)
+
+
+# ***************************************
+#        R O L E   L I S T S
+# ***************************************
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+def region_changed(sender, instance, **kwargs):
+    role_lists.invalidate(instance.guild_id, ["regions"])
+
+@receiver(post_save, sender=Character)
+@receiver(post_delete, sender=Character)
+def character_changed(sender, instance, **kwargs):
+    role_lists.invalidate(instance.guild_id, CHARACTER_STATUS)
+
+@receiver(post_save, sender=Main)
+@receiver(post_delete, sender=Main)
+def main_changed(sender, instance, **kwargs):
+    # None if the character has just been deleted: every guild is invalidated
+    guild_id = Character.objects.filter(id=instance.character_id).values_list('guild_id', flat=True).first()
+    role_lists.invalidate(guild_id, CHARACTER_STATUS)
+
+@receiver(m2m_changed, sender=Player.tiers.through)
+@receiver(m2m_changed, sender=Player.regions.through)
+def player_roles_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    
+    role_types = ["tiers"] if sender is Player.tiers.through else ["regions"]
+    if reverse:
+        role_lists.invalidate(instance.guild_id, role_types)
+    elif pk_set:
+        for guild_id in set(model.objects.filter(id__in=pk_set).values_list('guild_id', flat=True)):
+            role_lists.invalidate(guild_id, role_types)
+    else:
+        role_lists.invalidate(role_types=role_types)
+
+@receiver(post_delete, sender=Player)
+def player_deleted(sender, instance, **kwargs):
+    role_lists.invalidate()
+
+
+# ***************************************
+#        B O T   E V E N T S
+# ***************************************
+
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, **kwargs):
+    events.rating_changed(instance)
+
+@receiver(post_save, sender=Guild)
+def guild_saved(sender, instance, **kwargs):
+    events.guild_changed(instance)
+
+@receiver(post_save, sender=Stage)
+@receiver(post_delete, sender=Stage)
+def stage_changed(sender, instance, **kwargs):
+    events.stages_changed()
@@ -1,15 +1,33 @@
 # Django
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import close_old_connections, connection, connections, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 # Python
+import asyncio
 import json
+import threading
+import psycopg2
+import select
+from datetime import timedelta
+from io import StringIO
 
 # Django Rest Framework
 from rest_framework.test import APIClient
 from rest_framework import status
 
+# Matchmaking
+from smashbotspain import events, views
+from smashbotspain.concurrency import threaded_view
+from smashbotspain.matchmaking import matchmaking_queue
+from smashbotspain import role_lists as lists
+from smashbotspain.role_lists import build_role_list, role_lists
+from smashbotspain.tiers import TierLadder, tier_ladders
+
 # Models
-from smashbotspain.models import Arena, Player, ArenaPlayer, Rating, Tier, Message, Guild
+from smashbotspain.models import Arena, Player, ArenaPlayer, Rating, Tier, Message, Guild, GameSet, Game, Stage, Character, Region, Main
 
 def make_player(discord_id, tier=None):
     player = Player(
@@ -32,8 +50,10 @@ def make_tier(discord_id, channel_id, weight, guild):
     tier.save()
     return tier
 
-class ArenaTestCase(TestCase):    
+class ArenaTestCase(TransactionTestCase):    
     def setUp(self):
+        matchmaking_queue.reset()
+
         # Setup Guild
         self.guild = Guild(discord_id=1284839194, spam_channel=183813893, flairing_channel=3814884,
             list_channel=1190139, list_message=1949194, match_timeout=90, cancel_time=30, ggs_time=15)
@@ -488,7 +508,56 @@ class ArenaTestCase(TestCase):
         for arena in tropped_arenas:
             self.assertEqual(arena.status, "SEARCHING")    
 
-class MessageTestCase(TestCase):
+    def test_search(self):
+        client = APIClient()
+
+        body = {
+            'guild' : self.guild.discord_id,
+            'created_by' : self.tropped.discord_id,
+            'min_tier' : self.tier3.channel_id,  # Tier 3 channel
+            'roles' : [self.tier2.discord_id], # Tier 2
+            'mode' : 'FRIENDLIES'
+        }
+
+        # Started searching
+        response = client.post('/arenas/search/', body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.data['match_found'])
+        self.assertEqual(len(response.data['added_tiers']), 2)
+
+        tier_lists = {tier['id']: tier['friendlies_players'] for tier in response.data['list_message']['tiers']}
+        self.assertEqual(tier_lists[self.tier3.discord_id], [self.tropped.discord_id])
+
+        # Match found
+        body['created_by'] = self.razen.discord_id
+        response = client.post('/arenas/search/', body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['match_found'])
+        self.assertEqual(len(response.data['list_message']['confirmation']), 1)
+
+    def test_search_errors(self):
+        client = APIClient()
+
+        body = {
+            'guild' : self.guild.discord_id,
+            'created_by' : 1111111,  # Not registered
+            'min_tier' : self.tier3.channel_id,
+            'roles' : [self.tier2.discord_id],
+            'mode' : 'FRIENDLIES'
+        }
+
+        response = client.post('/arenas/search/', body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['cant_join'], "PLAYER_DOES_NOT_EXIST")
+
+        body['created_by'] = self.tropped.discord_id
+        body['min_tier'] = 1111111  # Not a tier channel
+        response = client.post('/arenas/search/', body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['cant_join'], "NOT_TIER_CHANNEL")
+        self.assertFalse(Arena.objects.exists())
+
+class MessageTestCase(TransactionTestCase):
     def setUp(self):
         # Setup Players
         # self.tropped = make_player(discord_id=12345678987654)
@@ -556,4 +625,1091 @@ class MessageTestCase(TestCase):
         self.assertEqual(result['tier'], self.message3['tier'])
         self.assertEqual(result['arena'], self.message3['arena'])
 
-        self.assertFalse(Message.objects.filter(id=self.message3['id']).exists())
\ No newline at end of file
+        self.assertFalse(Message.objects.filter(id=self.message3['id']).exists())
+
+class PlayerStatusTestCase(TestCase):
+    def setUp(self):
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+
+        self.tropped = make_player(discord_id=12345678987654)
+        self.razen = make_player(discord_id=45678987654321)
+        self.tito = make_player(discord_id=98765432123456)
+
+    def test_no_status(self):
+        self.assertFalse(self.tropped.status())
+
+    def test_status_priority(self):
+        searching_arena = Arena(guild=self.guild, created_by=self.tropped, status="SEARCHING")
+        searching_arena.save()
+        searching_arena.add_player(self.tropped, "WAITING")
+
+        self.assertEqual(self.tropped.status(), "WAITING")
+
+        confirmation_arena = Arena(guild=self.guild, created_by=self.razen, status="CONFIRMATION")
+        confirmation_arena.save()
+        confirmation_arena.add_player(self.tropped, "CONFIRMATION")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.tropped.status(), "CONFIRMATION")
+
+    def test_bulk_status(self):
+        arena = Arena(guild=self.guild, created_by=self.tropped, status="PLAYING")
+        arena.save()
+        arena.add_player(self.tropped, "PLAYING")
+        arena.add_player(self.razen, "INVITED")
+
+        with self.assertNumQueries(1):
+            statuses = Player.bulk_status([self.tropped, self.razen, self.tito])
+
+        self.assertEqual(statuses, {
+            self.tropped.id: "PLAYING",
+            self.razen.id: "INVITED",
+            self.tito.id: False
+        })
+
+
+class RematchTestCase(TestCase):
+    def setUp(self):
+        matchmaking_queue.reset()
+
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+
+        self.tropped = make_player(discord_id=12345678987654)
+        self.razen = make_player(discord_id=45678987654321)
+
+    def make_set(self, winner, finished_ago=None):
+        game_set = GameSet(guild=self.guild, win_condition="BO5", winner=winner)
+        if finished_ago is not None:
+            game_set.finished_at = timezone.now() - finished_ago
+        game_set.save()
+        game_set.players.add(self.tropped, self.razen)
+        return game_set
+
+    def test_no_history(self):
+        self.assertTrue(self.tropped.can_rematch(self.razen, search=True))
+        self.assertEqual(self.tropped.get_already_matched(), set())
+
+    def test_cooldown(self):
+        self.make_set(winner=self.tropped, finished_ago=timedelta(minutes=10))
+
+        self.assertTrue(self.tropped.can_rematch(self.razen))
+        self.assertFalse(self.tropped.can_rematch(self.razen, search=True))
+        self.assertEqual(self.tropped.get_already_matched(), {self.razen.id})
+
+    def test_two_sets(self):
+        self.make_set(winner=self.tropped, finished_ago=timedelta(hours=3))
+        self.make_set(winner=self.tropped, finished_ago=timedelta(hours=2))
+        self.assertFalse(self.tropped.can_rematch(self.razen))
+
+    def test_even_sets(self):
+        self.make_set(winner=self.tropped, finished_ago=timedelta(hours=3))
+        self.make_set(winner=self.razen, finished_ago=timedelta(hours=2))
+        self.assertTrue(self.razen.can_rematch(self.tropped, search=True))
+
+        self.make_set(winner=self.tropped, finished_ago=timedelta(hours=1, minutes=30))
+        self.assertFalse(self.razen.can_rematch(self.tropped))
+
+    def test_already_matched_queries(self):
+        self.make_set(winner=self.tropped, finished_ago=timedelta(minutes=10))
+        
+        with self.assertNumQueries(1):
+            self.tropped.get_already_matched()
+
+
+class MatchmakingQueueTestCase(TransactionTestCase):
+    def setUp(self):
+        matchmaking_queue.reset()
+
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+
+        self.tier1 = make_tier(discord_id=45678987654, channel_id=94939382, weight=3, guild=self.guild)
+        self.tier2 = make_tier(discord_id=54678987654, channel_id=9393938, weight=2, guild=self.guild)
+        self.tier3 = make_tier(discord_id=54678987655, channel_id=4848484, weight=1, guild=self.guild)
+
+        self.tropped = make_player(discord_id=12345678987654, tier=self.tier2)
+        self.razen = make_player(discord_id=45678987654321, tier=self.tier1)
+
+    def make_arena(self, player, mode="FRIENDLIES", min_tier=None, max_tier=None, tier=None):
+        arena = Arena(guild=self.guild, created_by=player, mode=mode, status="SEARCHING",
+            min_tier=min_tier, max_tier=max_tier, tier=tier)
+        arena.save()
+        arena.add_player(player)
+        return arena
+    
+    def test_rebuild(self):
+        arena = self.make_arena(self.tropped, min_tier=self.tier3, max_tier=self.tier2)
+        
+        # Built from the DB on first use
+        arenas = self.razen.search(self.tier2, self.tier1, self.guild)
+        self.assertEqual(list(arenas), [arena])
+
+        # Tier ranges that don't overlap
+        arenas = self.razen.search(self.tier1, self.tier1, self.guild)
+        self.assertEqual(list(arenas), [])
+
+    def test_write_through(self):
+        matchmaking_queue.rebuild()
+        arena = self.make_arena(self.tropped, min_tier=self.tier3, max_tier=self.tier2)        
+        self.assertEqual(list(self.razen.search(self.tier2, self.tier1, self.guild)), [arena])
+
+        arena.set_status("WAITING")
+        self.assertEqual(list(self.razen.search(self.tier2, self.tier1, self.guild)), [])
+
+        arena.set_status("SEARCHING")
+        self.assertEqual(list(self.razen.search(self.tier2, self.tier1, self.guild)), [arena])
+
+        arena.delete()
+        self.assertEqual(list(self.razen.search(self.tier2, self.tier1, self.guild)), [])
+
+    def test_rejected(self):
+        matchmaking_queue.rebuild()
+        arena = self.make_arena(self.tropped, min_tier=self.tier3, max_tier=self.tier2)
+        razen_arena = self.make_arena(self.razen, min_tier=self.tier2, max_tier=self.tier1)
+        
+        arena.rejected_players.add(self.razen)
+        self.assertEqual(list(self.razen.search(self.tier2, self.tier1, self.guild)), [])
+        self.assertEqual(list(self.tropped.search(self.tier3, self.tier2, self.guild)), [])
+
+        arena.rejected_players.remove(self.razen)
+        self.assertEqual(list(self.razen.search(self.tier2, self.tier1, self.guild)), [arena])
+        self.assertEqual(list(self.tropped.search(self.tier3, self.tier2, self.guild)), [razen_arena])
+
+    def test_invite_list(self):
+        matchmaking_queue.rebuild()
+        host_arena = Arena(guild=self.guild, created_by=self.razen, status="PLAYING", channel_id=555,
+            min_tier=self.tier3, max_tier=self.tier1)
+        host_arena.save()
+        host_arena.add_player(self.razen, "PLAYING")
+        self.make_arena(self.tropped, min_tier=self.tier3, max_tier=self.tier1)
+
+        def invite_list():
+            with CaptureQueriesContext(connection) as context:
+                response = APIClient().generic('GET', '/arenas/invite_list/', json.dumps({'channel': 555}), content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.data['players'], len(context.captured_queries)
+
+        players, few_queries = invite_list()
+        self.assertEqual(players, [{'id': self.tropped.discord_id, 'tier': self.tier2.discord_id}])
+
+        # Sorted by tier, and the number of queries doesn't depend on the number of players
+        for discord_id, tier in ((111, self.tier3), (222, self.tier1), (333, self.tier3)):
+            self.make_arena(make_player(discord_id=discord_id, tier=tier), min_tier=self.tier3, max_tier=self.tier1)
+        players, queries = invite_list()
+        self.assertEqual([player['tier'] for player in players],
+            [self.tier1.discord_id, self.tier2.discord_id, self.tier3.discord_id, self.tier3.discord_id])
+        self.assertEqual(queries, few_queries)
+
+    def count_queries(self, run):
+        """
+        Queries run, without the events sent to the bot (one per arena, sent right away out of a transaction)
+        """
+        with CaptureQueriesContext(connection) as context:
+            run()
+        return len([query for query in context.captured_queries if 'pg_notify' not in query['sql']])
+
+    def test_bulk_set_status(self):
+        matchmaking_queue.rebuild()
+        arena = self.make_arena(self.tropped, min_tier=self.tier3, max_tier=self.tier2)
+        ranked_arena = self.make_arena(self.tropped, mode="RANKED", tier=self.tier2)
+        arena.rejected_players.add(self.razen)
+        self.assertEqual(list(self.tropped.search(self.tier2, self.tier1, self.guild)), [])
+
+        # select, update arenas, update players
+        self.assertEqual(self.count_queries(lambda: Arena.bulk_set_status(Arena.objects.filter(created_by=self.tropped), "WAITING")), 3)
+        self.assertEqual(set(ArenaPlayer.objects.filter(player=self.tropped).values_list('status', flat=True)), {"WAITING"})
+        self.assertEqual(list(self.razen.search_ranked(self.guild, self.tier2)), [])
+
+        # + rejected players
+        self.assertEqual(self.count_queries(lambda: Arena.bulk_set_status(Arena.objects.filter(created_by=self.tropped), "SEARCHING")), 4)
+        self.assertEqual(list(self.razen.search_ranked(self.guild, self.tier2)), [ranked_arena])
+        self.assertEqual(list(self.razen.search(self.tier2, self.tier1, self.guild)), [])
+        arena.rejected_players.remove(self.razen)
+        self.assertEqual(list(self.razen.search(self.tier2, self.tier1, self.guild)), [arena])
+
+    def test_confirmation_queries(self):
+        confirmation_arena = Arena(guild=self.guild, created_by=self.razen, status="CONFIRMATION")
+        confirmation_arena.save()
+        
+        def count_queries():
+            return self.count_queries(lambda: self.tropped.confirmation(confirmation_arena))
+
+        self.make_arena(self.tropped, min_tier=self.tier3, max_tier=self.tier2)
+        ArenaPlayer(arena=confirmation_arena, player=self.tropped, status="INVITED").save()
+        few_arenas = count_queries()
+
+        for _ in range(4):
+            self.make_arena(self.tropped, min_tier=self.tier3, max_tier=self.tier2)
+        ArenaPlayer(arena=confirmation_arena, player=self.tropped, status="INVITED").save()
+        self.assertEqual(count_queries(), few_arenas)
+
+        self.assertEqual(set(ArenaPlayer.objects.filter(player=self.tropped).values_list('status', flat=True)), {"WAITING"})
+
+    def test_ranked_already_matched(self):
+        arena = self.make_arena(self.tropped, mode="RANKED", tier=self.tier2)
+        self.assertEqual(list(self.razen.search_ranked(self.guild, self.tier2)), [arena])
+        self.assertEqual(list(self.razen.search_ranked(self.guild, self.tier1)), [])
+
+        game_set = GameSet(guild=self.guild, win_condition="BO5", winner=self.tropped, finished_at=timezone.now())
+        game_set.save()
+        game_set.players.add(self.tropped, self.razen)
+
+        self.assertEqual(list(self.razen.search_ranked(self.guild, self.tier2)), [])
+
+        game_set.delete()
+        self.assertEqual(list(self.razen.search_ranked(self.guild, self.tier2)), [arena])
+
+
+class TierLadderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+
+        self.tier1 = make_tier(discord_id=45678987654, channel_id=94939382, weight=3, guild=self.guild)
+        self.tier2 = make_tier(discord_id=54678987654, channel_id=9393938, weight=2, guild=self.guild)
+        self.tier3 = make_tier(discord_id=54678987655, channel_id=4848484, weight=1, guild=self.guild)
+
+    def test_lookups(self):
+        tier_ladders.get(self.guild)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.tier2.next(self.guild), self.tier1)
+            self.assertEqual(self.tier2.previous(self.guild), self.tier3)
+            self.assertIsNone(self.tier1.next(self.guild))
+            self.assertIsNone(self.tier3.previous(self.guild))
+
+            ladder = tier_ladders.get(self.guild)
+            self.assertEqual(ladder.between(self.tier3, self.tier2), [self.tier2, self.tier3])
+            self.assertEqual(ladder.highest([self.tier3.discord_id, self.tier2.discord_id, 1234]), self.tier2)
+            self.assertEqual(ladder.by_channel(self.tier1.channel_id), self.tier1)
+
+    def test_invalidation(self):
+        client = APIClient()
+        tier_ladders.get(self.guild)
+
+        # PATCH
+        response = client.patch(f'/tiers/{self.tier3.discord_id}/', {'channel_id': 1313131}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(tier_ladders.get(self.guild).by_channel(1313131), self.tier3)
+
+        # Import
+        roles = [{'id': 65678987656, 'weight': 0}]
+        response = client.post('/tiers/import/', {'guild': self.guild.discord_id, 'roles': roles}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.tier3.previous(self.guild).discord_id, 65678987656)
+
+        # Delete
+        self.tier1.delete()
+        self.assertIsNone(self.tier2.next(self.guild))
+
+    def test_invalidation_on_commit(self):
+        tier_ladders.get(self.guild)
+
+        with transaction.atomic():
+            self.tier1.delete()
+            # Not committed yet
+            self.assertEqual(self.tier2.next(self.guild), self.tier1)
+        self.assertIsNone(self.tier2.next(self.guild))
+
+        try:
+            with transaction.atomic():
+                self.tier2.weight = 7
+                self.tier2.save()
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(tier_ladders.get(self.guild).highest([self.tier2.discord_id]).weight, 2)
+
+    def test_stale_ladder(self):
+        # An invalidation committed while the ladder is being loaded
+        ladder_init = TierLadder.__init__
+        def init(ladder, tiers):
+            tiers = list(tiers)
+            tier_ladders._invalidate(self.guild.id)
+            ladder_init(ladder, tiers)
+
+        TierLadder.__init__ = init
+        try:
+            tier_ladders.get(self.guild)
+        finally:
+            TierLadder.__init__ = ladder_init
+
+        with self.assertNumQueries(1):
+            tier_ladders.get(self.guild)
+
+    def test_copies(self):
+        tier = tier_ladders.get(self.guild).get(self.tier2.discord_id)
+        tier.weight = 10
+        self.assertEqual(tier_ladders.get(self.guild).get(self.tier2.discord_id).weight, 2)
+        self.assertEqual(self.tier2.next(self.guild), self.tier1)
+
+    def test_matchmaking_unknown_tier(self):
+        player = make_player(discord_id=12345678987654, tier=self.tier2)
+        Arena.objects.create(guild=self.guild, created_by=player, mode="FRIENDLIES", status="SEARCHING",
+            min_tier=self.tier3, max_tier=self.tier2)
+
+        response = APIClient().generic('GET', f'/players/{player.discord_id}/matchmaking/',
+            json.dumps({'guild': self.guild.discord_id, 'min_tier': 1234, 'max_tier': self.tier2.discord_id}), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "TIER_NOT_FOUND")
+
+    def test_filter_by_guild(self):
+        client = APIClient()
+        other_guild = Guild(discord_id=9999999)
+        other_guild.save()
+        make_tier(discord_id=11111111, channel_id=2222222, weight=1, guild=other_guild)
+
+        response = client.get(f'/tiers/?guild={self.guild.discord_id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({tier['channel_id'] for tier in response.data}, {94939382, 9393938, 4848484})
+
+class RoleListTestCase(TransactionTestCase):
+    def setUp(self):
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+        
+        self.tier1 = make_tier(discord_id=45678987654, channel_id=94939382, weight=2, guild=self.guild)
+        self.tier2 = make_tier(discord_id=54678987654, channel_id=9393938, weight=1, guild=self.guild)
+        self.mario = Character.objects.create(discord_id=1111, guild=self.guild)
+        self.link = Character.objects.create(discord_id=2222, guild=self.guild)
+        self.madrid = Region.objects.create(discord_id=3333, guild=self.guild)
+
+        self.tropped = make_player(discord_id=12345678987654, tier=self.tier1)
+        self.razen = make_player(discord_id=45678987654321, tier=self.tier2)
+        Main.objects.create(player=self.tropped, character=self.mario, status="MAIN")
+        Main.objects.create(player=self.razen, character=self.link, status="MAIN")
+        Main.objects.create(player=self.tropped, character=self.link, status="SECOND")
+
+        # Another guild
+        other_guild = Guild(discord_id=9999999)
+        other_guild.save()
+        Character.objects.create(discord_id=4444, guild=other_guild)
+
+        role_lists.reset()
+
+    def get_roles(self, role_type):
+        response = APIClient().generic('GET', '/players/roles/', json.dumps({'guild': self.guild.discord_id, 'role_type': role_type}), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(role['id'], sorted(role['players'])) for role in response.data['roles']]
+
+    def test_roles(self):
+        with self.assertNumQueries(3):
+            self.assertEqual(self.get_roles("mains"), [(1111, [self.tropped.discord_id]), (2222, [self.razen.discord_id])])
+        self.assertEqual(self.get_roles("seconds"), [(2222, [self.tropped.discord_id]), (1111, [])])
+        self.assertEqual(self.get_roles("tiers"), [(45678987654, [self.tropped.discord_id]), (54678987654, [self.razen.discord_id])])
+        self.assertEqual(self.get_roles("regions"), [(3333, [])])
+
+        # Cached: only the guild is read
+        with self.assertNumQueries(1):
+            self.get_roles("mains")
+
+        response = APIClient().generic('GET', '/players/roles/', json.dumps({'guild': self.guild.discord_id, 'role_type': "stages"}), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalidation(self):
+        client = APIClient()
+        self.get_roles("mains")
+        self.get_roles("regions")
+        self.get_roles("tiers")
+
+        # .main / .region
+        response = client.post(f'/players/{self.razen.discord_id}/roles/', {'guild': self.guild.discord_id, 'role_type': "main", 'role_id': 1111}, format='json')
+        self.assertEqual(response.data['action'], "ADD")
+        self.assertEqual(self.get_roles("mains"), [(1111, sorted([self.tropped.discord_id, self.razen.discord_id])), (2222, [self.razen.discord_id])])
+        
+        client.post(f'/players/{self.razen.discord_id}/roles/', {'guild': self.guild.discord_id, 'role_type': "region", 'role_id': 3333}, format='json')
+        self.assertEqual(self.get_roles("regions"), [(3333, [self.razen.discord_id])])
+        
+        Region.objects.get(discord_id=3333).player_set.clear()
+        self.assertEqual(self.get_roles("regions"), [(3333, [])])
+
+        # New player
+        response = client.post('/players/', {'player': 1234, 'guild': self.guild.discord_id, 'roles': [54678987654, 2222, 3333]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_roles("tiers"), [(45678987654, [self.tropped.discord_id]), (54678987654, sorted([1234, self.razen.discord_id]))])
+        self.assertEqual(dict(self.get_roles("mains")), {2222: sorted([1234, self.razen.discord_id]), 1111: sorted([self.tropped.discord_id, self.razen.discord_id])})
+        self.assertEqual(self.get_roles("regions"), [(3333, [1234])])
+
+        # Deleted role
+        self.mario.delete()
+        self.assertEqual([role for role, players in self.get_roles("mains")], [2222])
+
+    def test_invalidation_on_commit(self):
+        self.get_roles("regions")
+
+        try:
+            with transaction.atomic():
+                self.razen.regions.add(self.madrid)
+                # Not committed yet
+                self.assertEqual(self.get_roles("regions"), [(3333, [])])
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(self.get_roles("regions"), [(3333, [])])
+
+        with transaction.atomic():
+            self.razen.regions.add(self.madrid)
+        self.assertEqual(self.get_roles("regions"), [(3333, [self.razen.discord_id])])
+
+    def test_stale_list(self):
+        # An invalidation committed while the list is being built
+        def build(guild_id, role_type):
+            role_list = build_role_list(guild_id, role_type)
+            role_lists._invalidate(guild_id, [role_type])
+            return role_list
+
+        lists.build_role_list = build
+        try:
+            role_lists.get(self.guild, "regions")
+        finally:
+            lists.build_role_list = build_role_list
+
+        with self.assertNumQueries(2):
+            role_lists.get(self.guild, "regions")
+
+
+class RoleImportTestCase(TransactionTestCase):
+    def setUp(self):
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+
+    def import_roles(self, role_type, roles):
+        with CaptureQueriesContext(connection) as context:
+            response = APIClient().post(f'/{role_type}/import/', {'guild': self.guild.discord_id, 'roles': roles}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data, len(context.captured_queries)
+
+    def test_import(self):
+        data, few_queries = self.import_roles("characters", list(range(1, 11)))
+        self.assertEqual(data, {'count': 10, 'created': 10, 'updated': 0})
+
+        # The number of queries doesn't depend on the number of roles
+        data, queries = self.import_roles("characters", list(range(1, 81)))
+        self.assertEqual(data, {'count': 70, 'created': 70, 'updated': 10})
+        self.assertEqual(queries, few_queries)
+
+        data, _ = self.import_roles("regions", [101, 102])
+        self.assertEqual(data, {'count': 2, 'created': 2, 'updated': 0})
+        self.assertEqual(Character.objects.filter(guild=self.guild).count(), 80)
+        self.assertEqual(Region.objects.filter(guild=self.guild).count(), 2)
+
+    def test_import_tiers(self):
+        data, _ = self.import_roles("tiers", [{'id': 201, 'weight': 1}, {'id': 202, 'weight': 2}])
+        self.assertEqual(data, {'count': 2, 'created': 2, 'updated': 0})
+        self.assertEqual(tier_ladders.get(self.guild).highest([201, 202]).discord_id, 202)
+
+        data, _ = self.import_roles("tiers", [{'id': 201, 'weight': 3}, {'id': 203, 'weight': 1}])
+        self.assertEqual(data, {'count': 1, 'created': 1, 'updated': 1})
+        self.assertEqual(tier_ladders.get(self.guild).highest([201, 202]).discord_id, 201)
+        self.assertEqual(Tier.objects.get(discord_id=201).weight, 3)
+
+    def test_create_player(self):
+        tier = make_tier(discord_id=201, channel_id=301, weight=1, guild=self.guild)
+        self.import_roles("characters", list(range(1, 81)))
+        self.import_roles("regions", [101, 102])
+        tier_ladders.get(self.guild)
+
+        with CaptureQueriesContext(connection) as context:
+            response = APIClient().post('/players/', {'player': 1234, 'guild': self.guild.discord_id, 'roles': [201, 1, 2, 3, 101]}, format='json')
+        few_queries = len(context.captured_queries)
+        self.assertEqual(response.data['tier'], tier.discord_id)
+
+        player = Player.objects.get(discord_id=1234)
+        self.assertEqual(sorted(player.main_set.values_list('character__discord_id', 'status')), [(1, "MAIN"), (2, "MAIN"), (3, "SECOND")])
+        self.assertEqual(list(player.regions.values_list('discord_id', flat=True)), [101])
+        self.assertEqual(player.get_rating(self.guild).score, tier.threshold)
+
+        with CaptureQueriesContext(connection) as context:
+            APIClient().post('/players/', {'player': 5678, 'guild': self.guild.discord_id, 'roles': [201, 102] + list(range(1, 81))}, format='json')
+        self.assertEqual(len(context.captured_queries), few_queries)
+
+
+class ListMessageTestCase(TestCase):
+    def setUp(self):
+        matchmaking_queue.reset()
+
+        self.guild = Guild(discord_id=1284839194, list_channel=1190139, list_message=1949194)
+        self.guild.save()
+
+        self.tier1 = make_tier(discord_id=45678987654, channel_id=94939382, weight=3, guild=self.guild)
+        self.tier2 = make_tier(discord_id=54678987654, channel_id=9393938, weight=2, guild=self.guild)
+        self.tier3 = make_tier(discord_id=54678987655, channel_id=4848484, weight=1, guild=self.guild)
+
+        self.discord_id = 1000
+
+    def make_arena(self, status, mode="FRIENDLIES", min_tier=None, max_tier=None, tier=None, guild=None):
+        """
+        Creates an arena with two players (only one if it's searching)
+        """
+        players = []
+        for _ in range(1 if status == "SEARCHING" else 2):
+            self.discord_id += 1
+            players.append(make_player(discord_id=self.discord_id, tier=max_tier or tier or self.tier2))
+
+        arena = Arena(guild=guild or self.guild, created_by=players[0], status=status, mode=mode,
+                    min_tier=min_tier, max_tier=max_tier, tier=tier)
+        arena.save()
+
+        player_status = {"SEARCHING": "WAITING", "CONFIRMATION": "CONFIRMATION", "PLAYING": "PLAYING"}[status]
+        for player in players:
+            ArenaPlayer(arena=arena, player=player, status=player_status).save()
+        return arena
+
+    def make_arenas(self, guild=None):
+        self.make_arena("SEARCHING", min_tier=self.tier3, max_tier=self.tier2, guild=guild)
+        self.make_arena("SEARCHING", mode="RANKED", tier=self.tier1, guild=guild)
+        self.make_arena("CONFIRMATION", min_tier=self.tier2, max_tier=self.tier2, guild=guild)
+        self.make_arena("PLAYING", mode="RANKED", tier=self.tier1, guild=guild)
+
+    def test_content(self):
+        client = APIClient()
+        friendlies = self.make_arena("SEARCHING", min_tier=self.tier3, max_tier=self.tier2)
+        ranked = self.make_arena("SEARCHING", mode="RANKED", tier=self.tier1)
+        confirmation = self.make_arena("CONFIRMATION", min_tier=self.tier2, max_tier=self.tier2)
+        playing = self.make_arena("PLAYING", mode="RANKED", tier=self.tier1)
+
+        # Arenas of other guilds are left out
+        other_guild = Guild(discord_id=9999999)
+        other_guild.save()
+        self.make_arenas(guild=other_guild)
+
+        response = client.get(f'/guilds/{self.guild.discord_id}/list_message/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        friendlies_id = friendlies.created_by.discord_id
+        self.assertEqual(response.data['tiers'], [
+            {'id': self.tier1.discord_id, 'friendlies_players': [], 'ranked_players': [ranked.created_by.discord_id]},
+            {'id': self.tier2.discord_id, 'friendlies_players': [friendlies_id], 'ranked_players': []},
+            {'id': self.tier3.discord_id, 'friendlies_players': [friendlies_id], 'ranked_players': []},
+        ])
+        self.assertEqual(response.data['ranked_searching'], 1)
+        self.assertEqual(response.data['list_message'], 1949194)
+
+        self.assertEqual(len(response.data['confirmation']), 1)
+        self.assertEqual({player['id'] for player in response.data['confirmation'][0]},
+                        {player.discord_id for player in confirmation.players.all()})
+        self.assertEqual(response.data['confirmation'][0][0]['status'], "CONFIRMATION")
+        self.assertEqual(response.data['confirmation'][0][0]['tier'], self.tier2.discord_id)
+
+        self.assertEqual(len(response.data['playing']), 1)
+        self.assertEqual({player['tier'] for player in response.data['playing'][0]}, {self.tier1.discord_id})
+        self.assertEqual(response.data['playing'][0][0]['mode'], "RANKED")
+
+    def test_constant_queries(self):
+        client = APIClient()
+        self.make_arenas()
+        client.get(f'/guilds/{self.guild.discord_id}/list_message/')
+
+        # guild, searching arenas, arena players, tiers of the players, statuses
+        with self.assertNumQueries(5):
+            client.get(f'/guilds/{self.guild.discord_id}/list_message/')
+
+        for _ in range(5):
+            self.make_arenas()
+
+        with self.assertNumQueries(5):
+            response = client.get(f'/guilds/{self.guild.discord_id}/list_message/')
+        self.assertEqual(len(response.data['playing']), 6)
+
+class LeaderboardTestCase(TestCase):
+    def setUp(self):
+        matchmaking_queue.reset()
+
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+
+        self.tier1 = make_tier(discord_id=45678987654, channel_id=94939382, weight=2, guild=self.guild)
+        self.tier2 = make_tier(discord_id=54678987654, channel_id=9393938, weight=1, guild=self.guild)
+
+        self.tropped = make_player(discord_id=12345678987654, tier=self.tier2)
+        self.razen = make_player(discord_id=45678987654321, tier=self.tier2)
+        self.mazen = make_player(discord_id=45678987654322, tier=self.tier2)
+
+        Rating(player=self.tropped, guild=self.guild, score=1100, streak=2).save()
+        Rating(player=self.razen, guild=self.guild, score=1200, streak=-1).save()
+        Rating(player=self.mazen, guild=self.guild, score=1000).save()
+
+        # Ratings in other guilds are ignored
+        other_guild = Guild(discord_id=9999999)
+        other_guild.save()
+        Rating(player=self.tropped, guild=other_guild, score=3000).save()
+
+    def test_leaderboard(self):
+        client = APIClient()
+        client.get(f'/tiers/{self.tier2.discord_id}/leaderboards/')
+
+        # tier, ratings
+        with self.assertNumQueries(2):
+            response = client.get(f'/tiers/{self.tier2.discord_id}/leaderboards/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        players = response.data['players']
+        self.assertEqual([player['id'] for player in players],
+                        [self.razen.discord_id, self.tropped.discord_id, self.mazen.discord_id])
+        self.assertEqual([player['streak'] for player in players], [-1, 2, 0])
+        self.assertEqual(players[1]['rating'], 1100)
+
+    def test_pagination(self):
+        client = APIClient()
+        response = client.get(f'/tiers/{self.tier2.discord_id}/leaderboards/?offset=1&limit=1')
+        self.assertEqual([player['id'] for player in response.data['players']], [self.tropped.discord_id])
+
+        response = client.get(f'/tiers/{self.tier2.discord_id}/leaderboards/?offset=-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_streaks(self):
+        game_set = GameSet(guild=self.guild, win_condition="BO3", winner=self.razen)
+        game_set.save()
+        game_set.players.add(self.tropped, self.razen)
+
+        game_set.update_ratings()
+
+        self.assertEqual(self.razen.get_rating(self.guild).streak, 1)
+        self.assertEqual(self.tropped.get_rating(self.guild).streak, -1)
+
+    def test_backfill_streaks(self):
+        now = timezone.now()
+        for hours_ago, winner in ((4, self.razen), (3, self.tropped), (2, self.tropped), (1, None)):
+            game_set = GameSet(guild=self.guild, win_condition="BO3", winner=winner, created_at=now - timedelta(hours=hours_ago))
+            game_set.save()
+            game_set.players.add(self.tropped, self.razen)
+
+        call_command('backfill_streaks', stdout=StringIO())
+
+        self.assertEqual(self.tropped.get_rating(self.guild).streak, 2)
+        self.assertEqual(self.razen.get_rating(self.guild).streak, -2)
+        self.assertEqual(self.mazen.get_rating(self.guild).streak, 0)
+
+    def test_capped_streak(self):
+        rating = self.tropped.get_rating(self.guild)
+        rating.streak = 7
+        rating.save()
+
+        self.assertEqual(self.tropped.get_streak(self.guild), Rating.STREAK_CAP)
+        self.assertEqual(self.tropped.get_streak(self.guild, capped=False), 7)
+
+
+class GameSetScoreTestCase(TestCase):
+    def setUp(self):
+        matchmaking_queue.reset()
+
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+        self.tier = make_tier(discord_id=45678987654, channel_id=94939382, weight=1, guild=self.guild)
+        
+        self.tropped = make_player(discord_id=12345678987654, tier=self.tier)
+        self.razen = make_player(discord_id=45678987654321, tier=self.tier)
+        Rating(player=self.tropped, guild=self.guild).save()
+        Rating(player=self.razen, guild=self.guild).save()
+
+        arena = Arena(guild=self.guild, created_by=self.razen, mode="RANKED", tier=self.tier, status="PLAYING", channel_id=1234)
+        arena.save()
+        arena.add_player(self.razen, "PLAYING")
+        arena.add_player(self.tropped, "PLAYING")
+
+        self.game_set = GameSet(guild=self.guild, win_condition="BO3", arena=arena)
+        self.game_set.save()
+        self.game_set.players.add(self.tropped, self.razen)
+        self.game_set.add_game()
+
+    def score(self, player):
+        response = APIClient().get(f'/players/{player.discord_id}/score/')
+        return response.data['player_wins'], response.data['other_player_wins']
+
+    def last_winner(self, player):
+        response = APIClient().generic('GET', '/games/last_winner/', json.dumps({'player_id': player.discord_id}), content_type='application/json')
+        return response.data.get('last_winner') if response.status_code == status.HTTP_200_OK else None
+
+    def test_score(self):
+        client = APIClient()
+        self.assertEqual(self.score(self.tropped), (0, 0))
+        self.assertIsNone(self.last_winner(self.tropped))
+
+        response = client.post(f'/players/{self.tropped.discord_id}/win_game/')
+        self.assertFalse(response.data['set_finished'])
+        response = client.post(f'/players/{self.razen.discord_id}/win_game/')
+        self.assertFalse(response.data['set_finished'])
+        
+        self.assertEqual(self.score(self.tropped), (1, 1))
+        self.assertEqual(self.last_winner(self.tropped), self.razen.discord_id)
+
+        # The score is read from the set
+        with CaptureQueriesContext(connection) as context:
+            self.score(self.razen)
+        self.assertFalse([query for query in context.captured_queries if 'smashbotspain_game"' in query['sql']])
+
+        response = client.post(f'/players/{self.razen.discord_id}/win_game/')
+        self.assertTrue(response.data['set_finished'])
+        
+        self.game_set.refresh_from_db()
+        self.assertEqual(self.game_set.winner, self.razen)
+        self.assertEqual(self.game_set.wins, {str(self.tropped.id): 1, str(self.razen.id): 2})
+        self.assertEqual(self.game_set.game_set.filter(winner=self.razen).count(), 2)
+
+    def test_current_game(self):
+        game = self.game_set.game_set.get()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.tropped.get_game(), game)
+            self.assertEqual(game.game_set.arena, self.game_set.arena)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.razen.get_game_set(), self.game_set)
+        
+        # Next game
+        APIClient().post(f'/players/{self.tropped.discord_id}/win_game/')
+        self.assertEqual(self.razen.get_game().number, 2)
+
+        # Finished set: no current game, but the set is still there until the GGs
+        self.game_set.game_set.update(winner=self.razen)
+        self.assertIsNone(self.tropped.get_game())
+        self.assertEqual(self.tropped.get_game_set(), self.game_set)
+
+        # Not playing
+        ArenaPlayer.objects.filter(player=self.tropped).update(status="GGS")
+        self.assertFalse(self.tropped.get_game_set())
+        self.assertEqual(self.razen.get_game_set(), self.game_set)
+
+    def test_surrender(self):
+        client = APIClient()
+        client.post(f'/players/{self.tropped.discord_id}/win_game/')
+        
+        response = client.post(f'/players/{self.tropped.discord_id}/surrender/')
+        self.assertTrue(response.data['set_finished'])
+        
+        self.game_set.refresh_from_db()
+        self.assertEqual(self.game_set.winner, self.razen)
+        self.assertEqual(self.game_set.wins, {str(self.tropped.id): 1, str(self.razen.id): 1})
+        self.assertEqual(self.game_set.last_winner, self.razen)
+
+        # The set is only finished once
+        response = client.post(f'/players/{self.razen.discord_id}/surrender/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.razen.get_rating(self.guild).streak, 1)
+
+    def test_admin_set_winner(self):
+        client = APIClient()
+        response = client.post('/gamesets/set_winner/', {'channel': 1234, 'winner': self.razen.discord_id}, format='json')
+        self.assertTrue(response.data['set_finished'])
+        self.assertEqual(self.razen.get_rating(self.guild).streak, 1)
+
+        # Correcting the winner doesn't count the set again in the streaks
+        client.post('/gamesets/set_winner/', {'channel': 1234, 'winner': self.razen.discord_id}, format='json')
+        self.assertEqual(self.razen.get_rating(self.guild).streak, 1)
+        self.assertEqual(self.tropped.get_rating(self.guild).streak, -1)
+
+    def test_win_conditions(self):
+        for win_condition, first_to in GameSet.FIRST_TO.items():
+            game_set = GameSet(guild=self.guild, win_condition=win_condition, wins={str(self.tropped.id): first_to - 1})
+            game_set.save()
+            self.assertFalse(game_set.set_winner())
+
+            game_set.wins[str(self.tropped.id)] += 1
+            self.assertTrue(game_set.set_winner())
+            self.assertEqual(game_set.winner, self.tropped)
+
+
+class EventsTestCase(TransactionTestCase):
+    def setUp(self):
+        matchmaking_queue.reset()
+
+        # Listen on a second connection, as the bot does
+        self.listener = psycopg2.connect(**{key: value for key, value in {
+            'dbname': connection.settings_dict['NAME'],
+            'user': connection.settings_dict['USER'],
+            'password': connection.settings_dict['PASSWORD'],
+            'host': connection.settings_dict['HOST'],
+            'port': connection.settings_dict['PORT'],
+        }.items() if value})
+        self.listener.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self.listener.cursor() as cursor:
+            cursor.execute(f"LISTEN {events.EVENTS_CHANNEL}")
+
+    def tearDown(self):
+        self.listener.close()
+
+    def received_events(self):
+        # The notifications can take a moment to arrive
+        self.listener.poll()
+        while select.select([self.listener], [], [], 0.2)[0]:
+            self.listener.poll()
+        received = [json.loads(notify.payload) for notify in self.listener.notifies]
+        self.listener.notifies.clear()
+        return received
+
+    def test_events(self):
+        guild = Guild(discord_id=1284839194)
+        guild.save()
+        tier = make_tier(discord_id=45678987654, channel_id=94939382, weight=1, guild=guild)
+        player = make_player(discord_id=12345678987654, tier=tier)
+        self.received_events()
+
+        arena = Arena(guild=guild, created_by=player, min_tier=tier, max_tier=tier)
+        arena.save()
+        self.assertEqual(self.received_events(), [
+            {'type': "arena_changed", 'arena': arena.id, 'status': "SEARCHING", 'mode': "FRIENDLIES", 'guild': guild.discord_id}
+        ])
+
+        Rating(player=player, guild=guild).save()
+        self.assertEqual(self.received_events(), [
+            {'type': "rating_changed", 'guild': guild.discord_id, 'player': player.discord_id, 'tier': tier.discord_id}
+        ])
+
+        stage = Stage(name="Battlefield", emoji="B", type="STARTER")
+        stage.save()
+        stage.delete()
+        self.assertEqual(self.received_events(), [{'type': "stages_changed", 'guild': None}] * 2)
+
+    def test_rating_events(self):
+        guild = Guild(discord_id=1284839194)
+        guild.save()
+        tier = make_tier(discord_id=45678987654, channel_id=94939382, weight=1, guild=guild)
+        tropped = make_player(discord_id=12345678987654, tier=tier)
+        razen = make_player(discord_id=45678987654321, tier=tier)
+        Rating(player=tropped, guild=guild).save()
+        Rating(player=razen, guild=guild).save()
+        game_set = GameSet(guild=guild, win_condition="BO3", winner=razen)
+        game_set.save()
+        game_set.players.add(tropped, razen)
+        self.received_events()
+
+        # Every rating is saved several times, but sent once
+        game_set.update_ratings()
+        self.assertEqual(sorted([event for event in self.received_events() if event['type'] == "rating_changed"], key=lambda event: event['player']), [
+            {'type': "rating_changed", 'guild': guild.discord_id, 'player': tropped.discord_id, 'tier': tier.discord_id},
+            {'type': "rating_changed", 'guild': guild.discord_id, 'player': razen.discord_id, 'tier': tier.discord_id},
+        ])
+
+    def test_rollback(self):
+        guild = Guild(discord_id=1284839194)
+        guild.save()
+        self.received_events()
+
+        with transaction.atomic():
+            guild.spam_channel = 1234
+            guild.save()
+            transaction.set_rollback(True)
+
+        self.assertEqual(self.received_events(), [])
+
+class ConfirmationRaceTestCase(TransactionTestCase):
+    def setUp(self):
+        matchmaking_queue.reset()
+
+        self.guild = Guild(discord_id=1284839194)
+        self.guild.save()
+        self.tier = make_tier(discord_id=45678987654, channel_id=94939382, weight=1, guild=self.guild)
+        self.tropped = make_player(discord_id=12345678987654, tier=self.tier)
+        self.razen = make_player(discord_id=45678987654321, tier=self.tier)
+
+        self.arena = Arena(guild=self.guild, created_by=self.razen, status="CONFIRMATION", min_tier=self.tier, max_tier=self.tier)
+        self.arena.save()
+        self.arena.add_player(self.razen, "CONFIRMATION")
+        self.arena.add_player(self.tropped, "CONFIRMATION")
+
+    def test_both_accept(self):
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def accept(player):
+            try:
+                barrier.wait()
+                response = APIClient().patch(f'/players/{player.discord_id}/confirmation/', {'accepted': True}, format='json')
+                results[player.discord_id] = (response.status_code, json.loads(response.content))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=accept, args=(player,)) for player in (self.tropped, self.razen)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # One of them is the last to accept, and only that one starts the match
+        self.assertEqual([status_code for status_code, _ in results.values()], [200, 200])
+        self.assertEqual(sorted(body['all_accepted'] for _, body in results.values()), [False, True])
+
+        self.arena.refresh_from_db()
+        self.assertEqual(self.arena.status, "PLAYING")
+        self.assertEqual(set(self.arena.arenaplayer_set.values_list('status', flat=True)), {"PLAYING"})
+
+    def test_rollback(self):
+        # Rejecting without a WAITING arena fails: the rejection isn't saved
+        client = APIClient()
+        response = client.patch(f'/players/{self.tropped.discord_id}/confirmation/', {'accepted': False}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(self.arena.arenaplayer_set.filter(player=self.tropped, status="CONFIRMATION").exists())
+
+
+class ThreadedViewTestCase(TransactionTestCase):
+    def setUp(self):
+        # The threads of the pool must close their connections, or the test database can't be dropped
+        self.conn_max_age = connection.settings_dict['CONN_MAX_AGE']
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+
+    def tearDown(self):
+        connection.settings_dict['CONN_MAX_AGE'] = self.conn_max_age
+
+    def test_threaded_view(self):
+        guild = Guild(discord_id=1284839194, list_channel=1190139, list_message=1949194)
+        guild.save()
+        make_tier(discord_id=45678987654, channel_id=94939382, weight=1, guild=guild)
+
+        view = threaded_view(views.GuildViewSet.as_view({'get': 'list_message'}))
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertIs(view.cls, views.GuildViewSet)
+
+        async def get_many():
+            requests = [RequestFactory().get(f'/guilds/{guild.discord_id}/list_message/') for _ in range(5)]
+            return await asyncio.gather(*[view(request, discord_id=guild.discord_id) for request in requests])
+
+        for response in asyncio.run(get_many()):
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_rendered)
+            self.assertEqual(json.loads(response.content)['list_message'], 1949194)
+
+class ConnectionHealthCheckTestCase(TransactionTestCase):
+    def test_broken_connection(self):
+        connection.ensure_connection()
+        pid = connection.connection.get_backend_pid()
+
+        # Kept for the next request
+        close_old_connections()
+        self.assertEqual(connection.connection.get_backend_pid(), pid)
+
+        # Postgres drops it between requests
+        with psycopg2.connect(connection.connection.dsn) as other, other.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [pid])
+        
+        # The next request gets a new connection instead of an error
+        self.assertEqual(Guild.objects.count(), 0)
+        self.assertNotEqual(connection.connection.get_backend_pid(), pid)
+
+class QueryPlanTestCase(TestCase):
+    """
+    Runs the matchmaking queries against a big dataset, and fails if Postgres
+    reads a whole big table (Seq Scan) to answer any of them.
+    """
+    GUILDS = 200
+    PLAYERS = 10000
+    ARENAS = 10000
+    GAMESETS = 10000
+
+    BIG_TABLES = {
+        'smashbotspain_arena', 'smashbotspain_arenaplayer', 'smashbotspain_player', 'smashbotspain_player_tiers',
+        'smashbotspain_rating', 'smashbotspain_gameset', 'smashbotspain_gameset_players', 'smashbotspain_game',
+        'smashbotspain_message',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        guilds = Guild.objects.bulk_create([Guild(discord_id=i, list_channel=i, list_message=i) for i in range(1, cls.GUILDS + 1)])
+        tiers = Tier.objects.bulk_create([
+            Tier(discord_id=guild.discord_id * 10 + weight, channel_id=guild.discord_id * 10 + weight, weight=weight, guild=guild)
+            for guild in guilds for weight in range(1, 5)
+        ])
+
+        # Every player is in one guild, with one tier and one rating
+        players = Player.objects.bulk_create([Player(discord_id=1000 + i) for i in range(cls.PLAYERS)])
+        tier_of = {player.id: tiers[i % len(tiers)] for i, player in enumerate(players)}
+        Player.tiers.through.objects.bulk_create([
+            Player.tiers.through(player_id=player.id, tier_id=tier_of[player.id].id) for player in players
+        ])
+        Rating.objects.bulk_create([
+            Rating(player=player, guild_id=tier_of[player.id].guild_id, score=1000 + i % 500) for i, player in enumerate(players)
+        ])
+
+        # Few arenas are searching at a time
+        statuses = ["PLAYING"] * 7 + ["CONFIRMATION", "WAITING", "SEARCHING"]
+        player_statuses = {"SEARCHING": "WAITING", "WAITING": "WAITING", "CONFIRMATION": "CONFIRMATION", "PLAYING": "PLAYING"}
+        arenas = Arena.objects.bulk_create([
+            Arena(guild_id=tier_of[players[i % cls.PLAYERS].id].guild_id, created_by=players[i % cls.PLAYERS],
+                status=statuses[i % len(statuses)], mode="RANKED" if i % 2 else "FRIENDLIES",
+                min_tier=tier_of[players[i % cls.PLAYERS].id], max_tier=tier_of[players[i % cls.PLAYERS].id],
+                channel_id=i)
+            for i in range(cls.ARENAS)
+        ])
+        ArenaPlayer.objects.bulk_create([
+            ArenaPlayer(arena=arena, player=players[(i + offset) % cls.PLAYERS], status=player_statuses[arena.status])
+            for i, arena in enumerate(arenas) for offset in (0, 1)
+        ])
+        Message.objects.bulk_create([
+            Message(id=i, arena=arena, mode=arena.mode, channel_id=i) for i, arena in enumerate(arenas)
+        ])
+
+        # Sets of the last 100 days, 3 games each
+        now = timezone.now()
+        gamesets = GameSet.objects.bulk_create([
+            GameSet(guild_id=arenas[i % cls.ARENAS].guild_id, created_at=now - timedelta(days=i % 100), win_condition="BO3",
+                winner=players[i % cls.PLAYERS], arena=arenas[i % cls.ARENAS])
+            for i in range(cls.GAMESETS)
+        ])
+        GameSet.players.through.objects.bulk_create([
+            GameSet.players.through(gameset_id=gameset.id, player_id=players[(i + offset) % cls.PLAYERS].id)
+            for i, gameset in enumerate(gamesets) for offset in (0, 1)
+        ])
+        Game.objects.bulk_create([
+            Game(number=number, guild_id=gameset.guild_id, game_set=gameset, winner=players[i % cls.PLAYERS])
+            for i, gameset in enumerate(gamesets) for number in (1, 2, 3)
+        ])
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.guild = guilds[0]
+        cls.tier = tiers[0]
+        cls.player = players[0]
+        cls.arena = arenas[0]
+
+    def seq_scans(self, sql):
+        """
+        Returns the big tables that are read completely to run the query.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+        tables = set()
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if node['Node Type'] == 'Seq Scan' and node['Relation Name'] in self.BIG_TABLES:
+                tables.add(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return tables
+
+    def assertNoSeqScans(self, run):
+        with CaptureQueriesContext(connection) as context:
+            run()
+
+        queries = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertEqual(self.seq_scans(sql), set(), sql)
+
+    def test_player(self):
+        self.assertNoSeqScans(lambda: self.player.status())
+        self.assertNoSeqScans(lambda: Player.bulk_status(Player.objects.filter(discord_id__lt=1020)))
+        self.assertNoSeqScans(lambda: self.player.get_game())
+        self.assertNoSeqScans(lambda: self.player.get_game_set())
+        self.assertNoSeqScans(lambda: self.player.get_daily_history())
+        self.assertNoSeqScans(lambda: self.player.get_rating(self.guild))
+        self.assertNoSeqScans(lambda: Player.objects.get(discord_id=self.player.discord_id))
+
+    def test_arenas(self):
+        self.assertNoSeqScans(lambda: matchmaking_queue.rebuild())
+        self.assertNoSeqScans(lambda: Arena.objects.filter(channel_id=self.arena.channel_id).first())
+        self.assertNoSeqScans(lambda: Arena.objects.filter(guild=self.guild, created_by=self.player, mode="FRIENDLIES", status="SEARCHING").first())
+        self.assertNoSeqScans(lambda: list(Message.objects.filter(arena=self.arena, mode="RANKED")))
+        self.assertNoSeqScans(lambda: list(ArenaPlayer.objects.filter(arena=self.arena, status="CONFIRMATION")))
+
+    def test_guild(self):
+        client = APIClient()
+        self.assertNoSeqScans(lambda: views.GuildViewSet.list_message_info(self.guild))
+        self.assertNoSeqScans(lambda: client.get(f'/tiers/{self.tier.discord_id}/leaderboards/'))
+        for role_type in ("tiers", "MAIN"):
+            role_lists.reset()
+            self.assertNoSeqScans(lambda: role_lists.get(self.guild, role_type))
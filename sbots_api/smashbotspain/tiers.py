@@ -0,0 +1,131 @@
+import copy
+import threading
+from bisect import bisect_left, bisect_right
+
+from django.db import transaction
+
+
+def copy_tier(tier):
+    """
+    Returns a copy of the tier, so changing it doesn't change the cached one.
+    """
+    if tier is None:
+        return None
+    tier_copy = copy.copy(tier)
+    tier_copy._state = copy.copy(tier._state)
+    tier_copy._state.fields_cache = {}
+    return tier_copy
+
+
+class TierLadder:
+    """
+    All the tiers of a guild, sorted by weight (lowest first).
+    The ladder is shared by every thread, so it only hands out copies of its tiers.
+    """
+
+    def __init__(self, tiers):
+        self._tiers = sorted(tiers, key=lambda tier: tier.weight)
+        self._weights = [tier.weight for tier in self._tiers]
+
+        self._by_weight = {tier.weight: tier for tier in self._tiers}
+        self._by_discord_id = {tier.discord_id: tier for tier in self._tiers}
+        self._by_channel = {tier.channel_id: tier for tier in self._tiers if tier.channel_id is not None}
+
+    @property
+    def tiers(self):
+        return [copy_tier(tier) for tier in self._tiers]
+
+    def __iter__(self):
+        return iter(self.tiers)
+
+    def get(self, discord_id):
+        """
+        Returns the tier with this discord_id, or None if it isn't in this guild.
+        """
+        return copy_tier(self._by_discord_id.get(discord_id))
+
+    def by_channel(self, channel_id):
+        """
+        Returns the tier whose channel is channel_id, or None.
+        """
+        return copy_tier(self._by_channel.get(channel_id))
+
+    def highest(self, discord_ids):
+        """
+        Returns the highest tier among the given role ids, or None if none of them is a tier.
+        """
+        tiers = [self._by_discord_id[discord_id] for discord_id in discord_ids if discord_id in self._by_discord_id]
+        return copy_tier(max(tiers, key=lambda tier: tier.weight, default=None))
+
+    def next(self, tier):
+        """
+        Returns the tier right above this one (i.e if tier is Tier 3, return Tier 2)
+        """
+        return copy_tier(self._by_weight.get(tier.weight + 1))
+
+    def previous(self, tier):
+        """
+        Returns the tier right below this one (i.e if tier is Tier 3, return Tier 4)
+        """
+        return copy_tier(self._by_weight.get(tier.weight - 1))
+
+    def between(self, min_tier, max_tier):
+        """
+        Returns a list with all the tiers between min_tier and max_tier (both included),
+        highest first.
+        """
+        start = bisect_left(self._weights, min_tier.weight)
+        end = bisect_right(self._weights, max_tier.weight)
+        return [copy_tier(tier) for tier in self._tiers[start:end][::-1]]
+
+
+class TierLadderCache:
+    """
+    Process-wide cache with the TierLadder of every guild.
+    Ladders are loaded when first needed, and dropped when a change to a tier of their guild
+    is committed (see smashbotspain.signals).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ladders = {}
+        # Changes on every invalidation, so a ladder loaded before is not kept
+        self._generation = 0
+
+    def get(self, guild):
+        """
+        Returns the ladder of the guild. Accepts both a Guild and its id.
+        """
+        from smashbotspain.models import Tier
+
+        guild_id = getattr(guild, 'id', guild)
+
+        with self._lock:
+            ladder = self._ladders.get(guild_id)
+            generation = self._generation
+
+        if ladder is None:
+            ladder = TierLadder(Tier.objects.filter(guild_id=guild_id))
+            with self._lock:
+                if generation == self._generation:
+                    self._ladders[guild_id] = ladder
+
+        return ladder
+
+    def invalidate(self, guild_id=None):
+        """
+        Drops the ladder of the given guild, or all of them if guild_id is None,
+        once the current transaction is committed.
+        """
+        transaction.on_commit(lambda: self._invalidate(guild_id))
+
+    def _invalidate(self, guild_id):
+        with self._lock:
+            self._generation += 1
+            if guild_id is None:
+                self._ladders.clear()
+            else:
+                self._ladders.pop(guild_id, None)
+
+
+tier_ladders = TierLadderCache()
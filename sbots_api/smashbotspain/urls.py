@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.conf.urls import include, url
 from rest_framework.routers import DefaultRouter
 
 from smashbotspain import views
+from smashbotspain.concurrency import threaded_view
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
@@ -17,6 +19,17 @@ router.register(r'games', views.GameViewSet)
 router.register(r'gamesets', views.GameSetViewSet)
 router.register(r'ratings', views.RatingViewSet)
 
+# Matchmaking endpoints: under ASGI they run in a thread pool, so they don't wait for each other
+THREADED_VIEWSETS = (
+    views.PlayerViewSet, views.ArenaViewSet, views.GuildViewSet,
+    views.GameViewSet, views.GameSetViewSet,
+)
+
+if settings.API_ASYNC:
+    for pattern in router.urls:
+        if getattr(pattern.callback, 'cls', None) in THREADED_VIEWSETS:
+            pattern.callback = threaded_view(pattern.callback)
+
 # The API URLs are now determined automatically by the router.
 # Additionally, we include the login URLs for the browsable API.
 urlpatterns = [
@@ -3,14 +3,19 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 
+from collections import defaultdict
+
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.db.models import Count
 
 from smashbotspain.models import Player, Arena, Rating, Region, Tier, ArenaPlayer, Message, Guild, Character, Main, GameSet, Game, GamePlayer, Stage
 from smashbotspain.serializers import (GameSerializer, GameSetSerializer, PlayerSerializer, ArenaSerializer, RatingSerializer, TierSerializer, ArenaPlayerSerializer, MessageSerializer, GuildSerializer,
                                         MainSerializer, RegionSerializer, CharacterSerializer, StageSerializer)
 
-from smashbotspain.aux_methods.roles import normalize_character
+from smashbotspain.role_lists import role_lists
+from smashbotspain.tiers import tier_ladders
+
 from smashbotspain.aux_methods.text import key_format
 
 from smashbotspain.params.roles import SMASH_CHARACTERS, SPANISH_REGIONS
@@ -33,9 +38,10 @@ class PlayerViewSet(viewsets.ModelViewSet):
         guild = Guild.objects.get(discord_id=request.data['guild'])
         roles = request.data.get('roles', [])
 
-        characters = Character.objects.filter(guild=guild)
-        regions = Region.objects.filter(guild=guild)
-        tiers = Tier.objects.filter(guild=guild)
+        # Roles of the guild, by discord_id
+        tiers = tier_ladders.get(guild)
+        characters = {character.discord_id: character for character in Character.objects.filter(guild=guild, discord_id__in=roles)}
+        regions = {region.discord_id: region for region in Region.objects.filter(guild=guild, discord_id__in=roles)}
         
         # Create Player
         player, created = Player.objects.get_or_create(discord_id=player_id, defaults={
@@ -43,25 +49,27 @@ class PlayerViewSet(viewsets.ModelViewSet):
         })        
 
         tier_roles = []        
-        mains_count = 0        
+        mains = []
+        player_regions = []
         
         for role_id in roles:
             # Tier
-            if tier := tiers.filter(discord_id=role_id).first():
+            if tier := tiers.get(role_id):
                 tier_roles.append(tier)
             # Characters
-            elif character := characters.filter(discord_id=role_id).first():
+            elif character := characters.get(role_id):
                 if created:
-                    pocket, created = Main.objects.update_or_create(player=player, character=character, defaults={
-                        'player': player,
-                        'character': character,
-                        'status': "MAIN" if mains_count < 2 else "SECOND"
-                    })
-
-                    mains_count += 1
+                    mains.append(Main(player=player, character=character, status="MAIN" if len(mains) < 2 else "SECOND"))
             # Region
-            elif region := regions.filter(discord_id=role_id).first():
-                player.regions.add(region)
+            elif region := regions.get(role_id):
+                player_regions.append(region)
+        
+        # Mains and regions, at once
+        if mains:
+            Main.objects.bulk_create(mains)
+            role_lists.invalidate(guild.id, ["MAIN", "SECOND"])
+        if player_regions:
+            player.regions.add(*player_regions)
         
         # Remove previous tier
         if not created:
@@ -241,39 +249,14 @@ class PlayerViewSet(viewsets.ModelViewSet):
         guild = Guild.objects.get(discord_id=request.data['guild'])
         role_type = request.data['role_type']        
         
-        response = [] 
-        role_list = None
-
         # CHARACTER TYPE FIX
         if role_type in ("mains", "seconds", "pockets"):
             role_type = role_type[:-1].upper()
         
-        CHARACTER_STATUS = ("MAIN", "SECOND", "POCKET")
-        
-        # GET ROLE LIST
-        if role_type == "tiers":
-            role_list = guild.tier_set.order_by('-weight').all()
-        elif role_type == "regions":
-            role_list = guild.region_set.all()
-        elif role_type in CHARACTER_STATUS:
-            role_list = guild.character_set.all()
-        
-        
-        # GET MEMBERS
-        for role in role_list:
-            if role_type in CHARACTER_STATUS:
-                role_members = Player.objects.filter(main__in=role.main_set.filter(status=role_type)).all()
-            else:
-                role_members = role.player_set.all()
-            
-            role_detail = {'id': role.discord_id}
-            
-            role_detail['players'] = [player.discord_id for player in role_members]
-            response.append(role_detail)
-        
-        # SORT RESPONSE
-        if role_type != "tiers":
-            response.sort(key=lambda role : len(role['players']), reverse=True)
+        # Built with two queries, and cached until a role of the guild changes
+        response = role_lists.get(guild, role_type)
+        if response is None:
+            return Response({'bad_type': "BAD_ROLE_TYPE"}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({'roles': response}, status=status.HTTP_200_OK)
 
@@ -376,8 +359,11 @@ class PlayerViewSet(viewsets.ModelViewSet):
         if old_arena is None:
             return Response(status=status.HTTP_409_CONFLICT)
         
-        min_tier = Tier.objects.get(discord_id=request.data['min_tier'])
-        max_tier = Tier.objects.get(discord_id=request.data['max_tier'])        
+        tier_ladder = tier_ladders.get(guild)
+        min_tier = tier_ladder.get(request.data['min_tier'])
+        max_tier = tier_ladder.get(request.data['max_tier'])
+        if min_tier is None or max_tier is None:
+            return Response({'error': 'TIER_NOT_FOUND'}, status=status.HTTP_400_BAD_REQUEST)
 
         arenas = player.search(min_tier, max_tier, guild)
 
@@ -391,8 +377,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
             old_arena.set_status("WAITING")
 
             # REMOVE INVITATIONS
-            for ap in ArenaPlayer.objects.filter(player__discord_id__in=(player.discord_id, arena.created_by.discord_id), status="INVITED").all():
-                ap.delete()
+            ArenaPlayer.objects.filter(player__discord_id__in=(player.discord_id, arena.created_by.discord_id), status="INVITED").delete()
 
             return Response({
                 "match_found" : True,
@@ -403,8 +388,42 @@ class PlayerViewSet(viewsets.ModelViewSet):
             return Response({'no_match', True}, status=status.HTTP_404_NOT_FOUND)    
     
     @action(detail=True, methods=['patch'])
-    def confirmation(self, request, discord_id):        
+    def confirmation(self, request, discord_id):
+        """
+        A player accepts or rejects a match (or an invitation to an arena).
+
+        The whole confirmation is a single transaction, with every player of the arena locked:
+        if both players answer at the same time, the answers are applied one after the other.
+        Nothing is saved if it fails.
+        """
         player = self.get_object()
+
+        with transaction.atomic():
+            self.lock_confirmation_players(player, request.data)
+            response = self.confirm(request, player)
+
+            # The matchmaking queue only gets the changes that are committed
+            if response.status_code != status.HTTP_200_OK:
+                transaction.set_rollback(True)
+
+        return response
+
+    @staticmethod
+    def lock_confirmation_players(player, data):
+        """
+        Locks the player and the rest of players of the arena being confirmed, until the end of the transaction.
+        They're always locked in the same order (by id), so two confirmations can't deadlock.
+        """
+        if data.get('invited', False):
+            arenas = Arena.objects.filter(channel_id=data.get('channel')).values('id')
+        else:
+            arenas = ArenaPlayer.objects.filter(status__in=["CONFIRMATION", "ACCEPTED"], player=player).values('arena')
+
+        player_ids = set(ArenaPlayer.objects.filter(arena__in=arenas, player__isnull=False).values_list('player', flat=True))
+        player_ids.add(player.id)
+        list(Player.objects.select_for_update().filter(id__in=player_ids).order_by('id').values_list('id', flat=True))
+
+    def confirm(self, request, player):
         accepted = request.data['accepted']
         is_timeout = request.data.get('timeout', False)
 
@@ -429,19 +448,11 @@ class PlayerViewSet(viewsets.ModelViewSet):
                 arena_player.status = "PLAYING"
                 arena_player.save()
 
-                guest_arenas = Arena.objects.filter(created_by=player, status="SEARCHING").all()
+                guest_arenas = Arena.objects.filter(created_by=player, status="SEARCHING")
                 
-                # Fetch the messages of all other arenas
-                messages = []
-                for guest_arena in guest_arenas:
-                    messages += list(guest_arena.message_set.all())
-                
-                for message in messages:
-                    message.arena = arena
-                    message.save()
-                
-                for guest_arena in guest_arenas:
-                    guest_arena.delete()
+                # The messages of all other arenas now belong to this one
+                Message.objects.filter(arena__in=guest_arenas).update(arena=arena)
+                guest_arenas.delete()
 
                 players = arena.get_players()
 
@@ -474,9 +485,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
             
             if player == arena.created_by:
                 other_arenas = Arena.objects.filter(created_by__in=players, status="WAITING").exclude(id=arena.id)
-                for other_arena in other_arenas:
-                    other_arena.set_status("SEARCHING")
-                    searching_arenas.append(other_arena)
+                searching_arenas = Arena.bulk_set_status(other_arenas, "SEARCHING")
                 messages = arena.get_messages()
                 arena.delete()
             else:
@@ -488,10 +497,8 @@ class PlayerViewSet(viewsets.ModelViewSet):
                 messages = rejected_arena.get_messages()
                 rejected_arena.delete()
                 
-                other_arenas = Arena.objects.filter(created_by__in=list(players), status__in=("WAITING", "CONFIRMATION")).all()
-                for arena_to_search in other_arenas:
-                    arena_to_search.set_status("SEARCHING")
-                    searching_arenas.append(arena_to_search)
+                other_arenas = Arena.objects.filter(created_by__in=list(players), status__in=("WAITING", "CONFIRMATION"))
+                searching_arenas = Arena.bulk_set_status(other_arenas, "SEARCHING")
 
             # TIMEOUT
             if is_timeout:                
@@ -582,10 +589,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
         }
 
         if all_accepted:
-            # ArenaPlayer status -> PLAYING
-            arena_players = arena.arenaplayer_set.all()
-            for arena_player in arena_players:
-                arena_player.set_status("PLAYING")            
+            # Arena and ArenaPlayers status -> PLAYING
             arena.set_status("PLAYING")
 
             # Create GameSet if RANKED
@@ -601,21 +605,14 @@ class PlayerViewSet(viewsets.ModelViewSet):
                 else:
                     return Response(serializer.errors,  status=status.HTTP_400_BAD_REQUEST)                
 
-            #  Delete "search" arenas
-            obsolete_arenas = Arena.objects.filter(created_by__in=players, status__in=("WAITING", "SEARCHING"))            
-            for obsolete_arena in obsolete_arenas:
-                messages = Message.objects.filter(arena=obsolete_arena).all()
-                for message in messages:
-                    message.arena = arena
-                    message.save()
-                obsolete_arena.delete()
+            #  Delete "search" arenas (their messages now belong to this arena)
+            obsolete_arenas = Arena.objects.filter(created_by__in=players, status__in=("WAITING", "SEARCHING"))
+            Message.objects.filter(arena__in=obsolete_arenas).update(arena=arena)
+            obsolete_arenas.delete()
             
             # Delete ranked messages
-            ranked_messages = Message.objects.filter(arena=arena, mode="RANKED").all()
             response['messages'] = arena.get_messages()
-            
-            for message in ranked_messages:
-                message.delete()
+            Message.objects.filter(arena=arena, mode="RANKED").delete()
             
         else:
             response['waiting_for'] = unconfirmed_players.first().player.discord_id
@@ -698,11 +695,16 @@ class PlayerViewSet(viewsets.ModelViewSet):
         if not game:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        game_set = game.game_set
-        
-        # Set winner and check if ggs
-        game.set_winner(player)
-        is_over = game_set.set_winner()
+        with transaction.atomic():
+            # Both players can report at the same time: the score is updated one at a time
+            game_set = GameSet.objects.select_for_update().get(id=game.game_set_id)
+            game.refresh_from_db(fields=['winner'])
+            if game.winner_id is not None:
+                return Response(status=status.HTTP_400_BAD_REQUEST)
+            
+            # Set winner and check if ggs
+            game_set.win_game(game, player)
+            is_over = game_set.set_winner()
 
         if is_over:
             # Set finished_at
@@ -735,30 +737,33 @@ class PlayerViewSet(viewsets.ModelViewSet):
         Marks the current set as a loss.
         """
         player = self.get_object()
-        game_set = player.get_game_set()
-
-        if not game_set:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        
         game = player.get_game()
         
         if not game:
             return Response(status=status.HTTP_400_BAD_REQUEST)        
         
         # Set winner
+        game_set = game.game_set
         players = game_set.players.all()
 
         winner = players.exclude(discord_id=player.discord_id).first()
-        game.set_winner(winner)
+        with transaction.atomic():
+            # The other player can report the game at the same time: the set is finished only once
+            game_set = GameSet.objects.select_for_update().get(id=game_set.id)
+            game.refresh_from_db(fields=['winner'])
+            if game.winner_id is not None or game_set.winner_id is not None:
+                return Response(status=status.HTTP_400_BAD_REQUEST)
+
+            game_set.win_game(game, winner)
         
-        game_set.winner = winner
-        game_set.save()
+            game_set.winner = winner
+            game_set.save()
 
-        # Set finished_at
-        game_set.finish()        
+            # Set finished_at
+            game_set.finish()        
                         
-        # Update ratings
-        winner_info, loser_info = game_set.update_ratings()
+            # Update ratings
+            winner_info, loser_info = game_set.update_ratings()
 
         response = {
                 'set_finished': True,
@@ -783,8 +788,8 @@ class PlayerViewSet(viewsets.ModelViewSet):
         if not game_set:
             return Response(status=status.HTTP_400_BAD_REQUEST)        
 
-        this_player_wins = game_set.game_set.filter(winner=player).count()
-        other_player_wins = game_set.game_set.exclude(winner=player).exclude(winner__isnull=True).count()
+        this_player_wins = game_set.wins_of(player)
+        other_player_wins = game_set.total_wins() - this_player_wins
 
         return Response({
             'player_wins': this_player_wins,
@@ -935,7 +940,8 @@ class GameSetViewSet(viewsets.ModelViewSet):
         if not winner:
             return Response({'error': 'PLAYER_NOT_FOUND'}, status=status.HTTP_404_NOT_FOUND)
         
-        # UPDATE THE WINNER
+        # UPDATE THE WINNER (the set may have been finished already)
+        already_finished = game_set.winner_id is not None
         game_set.winner = winner
         game_set.save()
         game_set.finish()
@@ -944,7 +950,7 @@ class GameSetViewSet(viewsets.ModelViewSet):
         game_set.game_set.filter(winner__isnull=True).delete()
 
         # Update ratings
-        winner_info, loser_info = game_set.update_ratings()
+        winner_info, loser_info = game_set.update_ratings(update_streaks=not already_finished)
 
         response = {
             'set_finished': True,
@@ -966,17 +972,12 @@ class GameViewSet(viewsets.ModelViewSet):
         """
         player = Player.objects.get(discord_id = request.data['player_id'])
 
-        game = player.get_game()
+        game_set = player.get_game_set()
 
-        if not game:
+        if not game_set or game_set.last_winner_id is None:
             return Response(status=status.HTTP_400_BAD_REQUEST)
         
-        last_game = Game.objects.filter(game_set = game.game_set).exclude(winner__isnull=True).order_by('-number').first()
-        
-        if not last_game:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        
-        last_winner = last_game.winner
+        last_winner = game_set.last_winner
 
         return Response({'last_winner': last_winner.discord_id}, status=status.HTTP_200_OK)
 
@@ -1051,16 +1052,9 @@ class RegionViewSet(viewsets.ModelViewSet):
         guild = Guild.objects.get(discord_id=guild_id)                   
         
         # Create (or update) the Region roles
-        role_count = 0                        
-        for role_id in roles:
-            region_role, created = Region.objects.update_or_create(guild=guild, discord_id=role_id, defaults={                                    
-                                    'guild': guild,
-                                    'discord_id': role_id,
-                                })
-            if created:
-                role_count += 1
+        created, updated = guild.import_roles(Region, {role_id: {} for role_id in roles})
 
-        return Response({'count': role_count}, status=status.HTTP_200_OK)
+        return Response({'count': created, 'created': created, 'updated': updated}, status=status.HTTP_200_OK)
 
 class CharacterViewSet(viewsets.ModelViewSet):
     queryset = Character.objects.all()
@@ -1075,18 +1069,9 @@ class CharacterViewSet(viewsets.ModelViewSet):
         guild = Guild.objects.get(discord_id=guild_id)
         
         # Create (or update) the Character roles
-        role_count = 0        
-                
-        for role_id in roles:
-            char_role, created = Character.objects.update_or_create(discord_id=role_id, guild=guild,
-                                defaults={                                    
-                                    'discord_id': role_id,
-                                    'guild': guild
-                                })
-            if created:
-                role_count += 1
+        created, updated = guild.import_roles(Character, {role_id: {} for role_id in roles})
 
-        return Response({'count': role_count}, status=status.HTTP_200_OK)
+        return Response({'count': created, 'created': created, 'updated': updated}, status=status.HTTP_200_OK)
 
 class MessageViewSet(viewsets.ModelViewSet):
     queryset = Message.objects.all()
@@ -1128,6 +1113,16 @@ class TierViewSet(viewsets.ModelViewSet):
     queryset = Tier.objects.all()
     serializer_class = TierSerializer
 
+    def get_queryset(self):
+        """
+        The tiers can be filtered by guild (i.e /tiers/?guild=1234)
+        """
+        queryset = Tier.objects.select_related('guild')
+        guild_id = self.request.query_params.get('guild')
+        if guild_id is not None:
+            queryset = queryset.filter(guild__discord_id=guild_id)
+        return queryset
+
     @action(methods=['post'], detail=False, url_path="import")
     def import_tiers(self, request):
         roles = request.data['roles']
@@ -1137,17 +1132,9 @@ class TierViewSet(viewsets.ModelViewSet):
         guild = Guild.objects.get(discord_id=guild_id)
         
         # Create (or update) the Tier roles
-        role_count = 0                        
-        for role in roles:            
-            tier_role, created = Tier.objects.update_or_create(guild=guild, discord_id=role['id'], defaults={                                    
-                                    'guild': guild,
-                                    'discord_id': role['id'],
-                                    'weight': role['weight']
-                                })
-            if created:
-                role_count += 1
-
-        return Response({'count': role_count}, status=status.HTTP_200_OK)
+        created, updated = guild.import_roles(Tier, {role['id']: {'weight': role['weight']} for role in roles})
+
+        return Response({'count': created, 'created': created, 'updated': updated}, status=status.HTTP_200_OK)
 
     @action(methods=['get'], detail=True)
     def leaderboards(self, request, discord_id):
@@ -1157,13 +1144,23 @@ class TierViewSet(viewsets.ModelViewSet):
         tier = self.get_object()
         guild = tier.guild
 
-        # Get players in this tier
-        players = Player.objects.filter(tiers=tier).order_by('-rating__score').all()
+        # Get the ratings of the players in this tier, best first
+        ratings = Rating.objects.filter(guild=guild, player__tiers=tier).select_related('player').order_by('-score', 'id')
+
+        # Pagination (i.e ?offset=30&limit=30)
+        try:
+            offset = int(request.query_params.get('offset', 0))
+            limit = request.query_params.get('limit')
+            limit = int(limit) if limit is not None else None
+            if offset < 0 or (limit is not None and limit < 0):
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'BAD_PAGINATION'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ratings = ratings[offset:offset + limit] if limit is not None else ratings[offset:]
 
         player_infos = []
-        for player in players:
-            rating = Rating.objects.get(player=player)
-            
+        for rating in ratings:
             if rating.promotion_wins is None:
                 promotion_info = None
             else:
@@ -1173,10 +1170,10 @@ class TierViewSet(viewsets.ModelViewSet):
                 }
 
             player_info = {
-                'id' : player.discord_id,
+                'id' : rating.player.discord_id,
                 'rating': rating.score, 
                 'promotion_info': promotion_info,
-                'streak': player.get_streak(guild, capped=False)
+                'streak': rating.streak
             }
 
             player_infos.append(player_info)
@@ -1197,12 +1194,36 @@ class GuildViewSet(viewsets.ModelViewSet):
     
     @action(detail=True)
     def list_message(self, request, discord_id):
+        """
+        Sends the info needed to build the list message of the guild.
+        """
         guild = self.get_object()
+        return Response(self.list_message_info(guild), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def list_message_info(guild):
+        """
+        Returns the info of the list message of the guild.
+        Uses the same number of queries no matter how many arenas or tiers there are.
+        """
+        tier_ladder = tier_ladders.get(guild)
         
-        friendlies_searching = Arena.objects.filter(status="SEARCHING", mode="FRIENDLIES")
-        ranked_searching = Arena.objects.filter(status="SEARCHING", mode="RANKED")
+        searching_arenas = Arena.objects.filter(guild=guild, status="SEARCHING").order_by('id')
+        searching_arenas = searching_arenas.select_related('created_by', 'min_tier', 'max_tier')
         
-        tiers = Tier.objects.order_by('-weight').all()        
+        # TIERS
+        friendlies_players = {tier.id: [] for tier in tier_ladder}
+        ranked_players = {tier.id: [] for tier in tier_ladder}
+        ranked_searching = 0
+
+        for arena in searching_arenas:
+            if arena.mode == "RANKED":
+                ranked_searching += 1
+                if arena.tier_id in ranked_players:
+                    ranked_players[arena.tier_id].append(arena.created_by.discord_id)
+            elif arena.min_tier and arena.max_tier:
+                for tier in tier_ladder.between(arena.min_tier, arena.max_tier):
+                    friendlies_players[tier.id].append(arena.created_by.discord_id)
         
         response = {
             'tiers' : [],
@@ -1210,38 +1231,54 @@ class GuildViewSet(viewsets.ModelViewSet):
             'playing': [],
             'list_channel': guild.list_channel,
             'list_message': guild.list_message,
-            'ranked_searching': ranked_searching.count()
+            'ranked_searching': ranked_searching
         }
-        
-        # TIERS        
+
         tier_lists = response['tiers']
-        for tier in tiers:
-            tier_lists.append({'id' : tier.discord_id, 'friendlies_players': [arena.created_by.discord_id for arena in friendlies_searching
-                                if tier.between(arena.min_tier, arena.max_tier)],
-                                'ranked_players': [arena.created_by.discord_id for arena in ranked_searching if tier == arena.tier]})
-        # CONFIRMATION
-        confirmation_arenas = Arena.objects.filter(status="CONFIRMATION")
+        for tier in reversed(tier_ladder.tiers):
+            tier_lists.append({'id' : tier.discord_id, 'friendlies_players': friendlies_players[tier.id],
+                                'ranked_players': ranked_players[tier.id]})
+        
+        # CONFIRMATION AND PLAYING
+        arena_players = ArenaPlayer.objects.filter(arena__guild=guild, arena__status__in=("CONFIRMATION", "PLAYING"))
+        arena_players = arena_players.select_related('arena', 'player').order_by('arena__mode', 'arena_id', 'id')
+
+        confirmation_arenas = defaultdict(list)
+        playing_arenas = defaultdict(list)
+        for arena_player in arena_players:
+            if arena_player.player is None:
+                continue
+            if arena_player.arena.status == "CONFIRMATION":
+                confirmation_arenas[arena_player.arena].append(arena_player.player)
+            elif arena_player.status == "PLAYING":
+                playing_arenas[arena_player.arena].append(arena_player.player)
+
+        # Tier of every player in this guild
+        players = [player for arena_players in (*confirmation_arenas.values(), *playing_arenas.values()) for player in arena_players]
+        player_tiers = dict(
+            Player.tiers.through.objects.filter(player__in=players, tier__guild=guild).values_list('player_id', 'tier__discord_id')
+        )
+        player_statuses = Player.bulk_status([player for arena_players in confirmation_arenas.values() for player in arena_players])
+
         confirmation_list = response['confirmation']
-        for arena in confirmation_arenas:
+        for arena in sorted(confirmation_arenas, key=lambda arena: arena.id):
             confirmation_list.append(
                 [
-                    {'id' : player.discord_id, 'tier': player.tier(guild).discord_id,
-                    'status': player.status(),'mode': arena.mode}
-                    for player in arena.players.all()
+                    {'id' : player.discord_id, 'tier': player_tiers.get(player.id),
+                    'status': player_statuses[player.id],'mode': arena.mode}
+                    for player in confirmation_arenas[arena]
                 ]
             )
         
-        # PLAYING        
-        playing_arenas = Arena.objects.filter(status="PLAYING").order_by('mode')
         playing_list = response['playing']
-        for arena in playing_arenas:
+        for arena, players in playing_arenas.items():
             playing_list.append(
                 [
-                    {'id' : ap.player.discord_id, 'tier': ap.player.tier(guild).discord_id,
-                    'status': ap.status, 'mode': arena.mode} 
-                for ap in arena.arenaplayer_set.filter(status="PLAYING").all()])
+                    {'id' : player.discord_id, 'tier': player_tiers.get(player.id),
+                    'status': "PLAYING", 'mode': arena.mode}
+                for player in players])
         
-        return Response(response, status=status.HTTP_200_OK)        
+        return response
 
     @action(detail=False)
     def ranked_messages(self, request):
@@ -1445,6 +1482,35 @@ class ArenaViewSet(viewsets.ModelViewSet):
                 
         return Response({'messages': messages}, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'])
+    def search(self, request):
+        """
+        Everything a .friendlies command needs in a single call: checks the channel and the player,
+        searches (see create) and returns the new info of the list message.
+        Nothing is saved if the search fails.
+        """
+        guild = Guild.objects.filter(discord_id=request.data['guild']).first()
+        if guild is None:
+            return Response({"cant_join": "GUILD_NOT_FOUND"}, status=status.HTTP_404_NOT_FOUND)
+
+        if tier_ladders.get(guild).by_channel(request.data['min_tier']) is None:
+            return Response({"cant_join": "NOT_TIER_CHANNEL"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Searches of the same player are serialized
+            player = Player.objects.select_for_update().filter(discord_id=request.data['created_by']).first()
+            if player is None:
+                return Response({"cant_join": "PLAYER_DOES_NOT_EXIST"}, status=status.HTTP_404_NOT_FOUND)
+
+            response = self.create(request)
+
+            if response.status_code not in (status.HTTP_200_OK, status.HTTP_201_CREATED):
+                transaction.set_rollback(True)
+            else:
+                response.data['list_message'] = GuildViewSet.list_message_info(guild)
+
+        return response
+
     @action(detail=False)
     def invite_list(self, request):
         # Get arena
@@ -1463,13 +1529,22 @@ class ArenaViewSet(viewsets.ModelViewSet):
         max_tier = arena.max_tier
         
         hosts = arena.players.all()
-        hosts = [host.discord_id for host in hosts if host.status() == "PLAYING"]
+        host_statuses = Player.bulk_status(hosts)
+        hosts = [host.discord_id for host in hosts if host_statuses[host.id] == "PLAYING"]
         
         # Search players, and parse
-        arenas = host.search(min_tier, max_tier, guild, invite=True).all()        
-        players = [arena.created_by for arena in arenas if arena.created_by.status() != "INVITED"]
-        players.sort(key=lambda player: player.tier(guild).weight, reverse=True)
-        players = [{'id': player.discord_id, 'tier': player.tier(guild).discord_id} for player in players]
+        arenas = host.search(min_tier, max_tier, guild, invite=True).select_related('created_by')
+        players = [arena.created_by for arena in arenas]
+        player_statuses = Player.bulk_status(players)
+        players = [player for player in players if player_statuses[player.id] != "INVITED"]
+
+        # Tier of every player in this guild: {player id: (weight, discord_id)}, in a single query
+        player_tiers = {
+            player_id: (weight, discord_id) for player_id, weight, discord_id in
+            Player.tiers.through.objects.filter(player__in=players, tier__guild=guild).values_list('player_id', 'tier__weight', 'tier__discord_id')
+        }
+        players.sort(key=lambda player: player_tiers.get(player.id, (0, None))[0], reverse=True)
+        players = [{'id': player.discord_id, 'tier': player_tiers.get(player.id, (0, None))[1]} for player in players]
 
         return Response({'players': players, 'hosts': hosts}, status=status.HTTP_200_OK)    
 
@@ -1556,10 +1631,10 @@ class ArenaViewSet(viewsets.ModelViewSet):
         force_tier = request.data.get('force_tier', False)
         
         # Get player tier
-        tier_roles = Tier.objects.filter(discord_id__in=roles)        
-        if not tier_roles:
-            return Response({"cant_join":"NO_TIER"}, status=status.HTTP_400_BAD_REQUEST)        
-        player_tier = max(tier_roles, key=lambda role : role.weight)
+        tier_ladder = tier_ladders.get(guild)
+        player_tier = tier_ladder.highest(roles)
+        if not player_tier:
+            return Response({"cant_join":"NO_TIER"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Get player
         player_id = request.data['created_by']
@@ -1577,7 +1652,7 @@ class ArenaViewSet(viewsets.ModelViewSet):
             return Response({"cant_join" : player_status}, status=status.HTTP_409_CONFLICT)
 
         # Get tier range
-        min_tier = Tier.objects.filter(channel_id=request.data['min_tier']).first()
+        min_tier = tier_ladder.by_channel(request.data['min_tier'])
         max_tier = min_tier if force_tier else player_tier
         
         data = request.data.copy()
@@ -1590,8 +1665,8 @@ class ArenaViewSet(viewsets.ModelViewSet):
             old_arena = Arena.objects.filter(created_by=player, status="SEARCHING", mode="FRIENDLIES").get()
 
             # Get added and removed tiers
-            old_tiers = Tier.objects.filter(weight__gte=old_arena.min_tier.weight, weight__lte=old_arena.max_tier.weight)
-            new_tiers = Tier.objects.filter(weight__gte=min_tier.weight, weight__lte=max_tier.weight)
+            old_tiers = tier_ladder.between(old_arena.min_tier, old_arena.max_tier)
+            new_tiers = tier_ladder.between(min_tier, max_tier)
             
             added_tiers = [tier for tier in new_tiers if tier not in old_tiers]
             removed_tiers = [tier for tier in old_tiers if tier not in new_tiers]
@@ -1634,12 +1709,10 @@ class ArenaViewSet(viewsets.ModelViewSet):
                     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
             # Put the rest of your arenas or the other player's in WAITING
-            for other_arena in Arena.objects.filter(created_by__in=(player, arena.created_by)).exclude(id=arena.id).all():
-                other_arena.set_status("WAITING")
+            Arena.bulk_set_status(Arena.objects.filter(created_by__in=(player, arena.created_by)).exclude(id=arena.id), "WAITING")
 
             # REMOVE INVITATIONS
-            for ap in ArenaPlayer.objects.filter(player__discord_id__in=(player_id, arena.created_by.discord_id), status="INVITED").all():
-                ap.delete()
+            ArenaPlayer.objects.filter(player__discord_id__in=(player_id, arena.created_by.discord_id), status="INVITED").delete()
 
             # Messages
             arena_messages = Message.objects.filter(arena=arena).all()
@@ -1677,7 +1750,7 @@ class ArenaViewSet(viewsets.ModelViewSet):
                 response_data = serializer.data.copy()
                 response_data["match_found"] = False
                 
-                tiers = Tier.objects.filter(weight__gte=min_tier.weight, weight__lte=max_tier.weight)
+                tiers = tier_ladder.between(min_tier, max_tier)
                 response_data["added_tiers"] = [{'id': tier.discord_id, 'channel': tier.channel_id} for tier in tiers]
                 response_data["removed_tiers"] = []
             else: